@@ -0,0 +1,88 @@
+from datetime import time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef
+
+from users.models import Employee
+from .archive import reaches_archive
+from .models import ArchivedAttendance, Attendance, LeaveRequest
+from .stats import invalidate_employee_stats
+from .summary import refresh_summary
+
+
+def is_working_day(day):
+    return day.weekday() not in getattr(settings, 'WEEKEND_DAYS', (5, 6))
+
+
+def missing_employees(day):
+    """
+    Active employees (already joined on ``day``) with no attendance row for
+    it, as (employee pk, on approved leave) pairs from one anti-join query.
+    """
+    recorded = Attendance.objects.filter(employee=OuterRef('pk'), date=day)
+    on_leave = LeaveRequest.objects.filter(
+        employee=OuterRef('pk'), status='approved', start_date__lte=day, end_date__gte=day,
+    )
+    employees = Employee.objects.filter(is_active=True, date_joined__date__lte=day).exclude(Exists(recorded))
+    if reaches_archive(day):
+        employees = employees.exclude(
+            Exists(ArchivedAttendance.objects.filter(employee=OuterRef('pk'), date=day))
+        )
+    return employees.annotate(on_leave=Exists(on_leave)).values_list('pk', 'on_leave')
+
+
+def close_day(day, batch_size=1000):
+    """
+    Record ``absent`` (or ``on_leave`` under an approved leave) for every
+    active employee without attendance on ``day``.
+
+    Runs in one transaction and refreshes that day's summary. Rows that
+    appear meanwhile win thanks to ignore_conflicts. Returns the
+    (absent, on_leave) counts of the rows actually inserted.
+    """
+    def counts():
+        return dict(
+            Attendance.objects.filter(date=day, status__in=('absent', 'on_leave'))
+            .order_by().values('status').annotate(count=Count('id')).values_list('status', 'count')
+        )
+
+    with transaction.atomic():
+        rows = [
+            Attendance(
+                employee_id=employee_id,
+                date=day,
+                # Not a punch; midnight keeps time_in non-null for the records ordering
+                time_in=time.min,
+                status='on_leave' if on_leave else 'absent',
+            )
+            for employee_id, on_leave in missing_employees(day)
+        ]
+        if not rows:
+            return 0, 0
+        before = counts()
+        Attendance.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+        # Skipped conflicts are not in the candidate list's figures: count what landed
+        after = counts()
+        refresh_summary(day, day)
+    invalidate_employee_stats()
+
+    return tuple(after.get(status, 0) - before.get(status, 0) for status in ('absent', 'on_leave'))
+
+
+def close_days(start, end, batch_size=1000, include_weekends=False, progress=None):
+    """
+    Close every working day in start..end (inclusive), one transaction per
+    day. Returns the total (absent, on_leave) counts.
+    """
+    totals = [0, 0]
+    day = start
+    while day <= end:
+        if include_weekends or is_working_day(day):
+            absent, on_leave = close_day(day, batch_size=batch_size)
+            totals[0] += absent
+            totals[1] += on_leave
+            if progress:
+                progress(day, absent, on_leave)
+        day += timedelta(days=1)
+    return tuple(totals)
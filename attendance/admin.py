@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils import timezone
-from .models import Attendance, LeaveRequest
+from .models import ArchivedAttendance, Attendance, DailyAttendanceSummary, LeaveRequest, ReportJob
+from .stats import invalidate_employee_stats
 
 
 @admin.register(Attendance)
@@ -28,12 +29,51 @@ class LeaveRequestAdmin(admin.ModelAdmin):
 
     def approve_leaves(self, request, queryset):
         updated = queryset.update(status='approved', reviewed_by=request.user, reviewed_on=timezone.now())
+        invalidate_employee_stats()
         self.message_user(request, f'{updated} leave requests approved.')
 
     approve_leaves.short_description = "Approve selected leaves"
 
     def reject_leaves(self, request, queryset):
         updated = queryset.update(status='rejected', reviewed_by=request.user, reviewed_on=timezone.now())
+        invalidate_employee_stats()
         self.message_user(request, f'{updated} leave requests rejected.')
 
-    reject_leaves.short_description = "Reject selected leaves"
\ No newline at end of file
+    reject_leaves.short_description = "Reject selected leaves"
+
+
+@admin.register(DailyAttendanceSummary)
+class DailyAttendanceSummaryAdmin(admin.ModelAdmin):
+    list_display = ['date', 'department', 'status', 'count']
+    list_filter = ['status', 'department']
+    date_hierarchy = 'date'
+
+    # Maintained from Attendance writes; rebuild with
+    # `manage.py rebuild_attendance_summary` instead of editing by hand.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedAttendance)
+class ArchivedAttendanceAdmin(admin.ModelAdmin):
+    list_display = ['employee', 'date', 'time_in', 'time_out', 'status', 'archived_on']
+    list_filter = ['status']
+    search_fields = ['employee__user__first_name', 'employee__user__last_name', 'employee__employee_id']
+    date_hierarchy = 'date'
+
+    # Filled by `manage.py archive_attendance`; read-only history
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'report_type', 'file_format', 'department', 'status', 'progress', 'requested_by', 'created_on']
+    list_filter = ['status', 'report_type', 'file_format']
+    readonly_fields = ['status', 'progress', 'file', 'error', 'created_on', 'completed_on']
@@ -0,0 +1,91 @@
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import summary
+from .dates import months_before
+from .models import ArchivedAttendance, Attendance
+
+ARCHIVE_FIELDS = ('id', 'employee_id', 'date', 'time_in', 'time_out', 'status', 'manual')
+
+
+def default_cutoff(today=None):
+    """
+    First day that stays in the hot table: the start of the month
+    ATTENDANCE_HOT_MONTHS months back, so only closed months are archived.
+    """
+    today = today or timezone.localdate()
+    return months_before(today, getattr(settings, 'ATTENDANCE_HOT_MONTHS', 12))
+
+
+def archive_before(cutoff, batch_size=5000, progress=None):
+    """
+    Move Attendance rows dated before ``cutoff`` into ArchivedAttendance.
+
+    Each batch is copied and deleted in one transaction, so a crash never
+    loses or duplicates rows. The daily summary already counts these rows
+    and keeps counting them from the archive, so it is left untouched.
+    Returns the number of rows moved.
+    """
+    moved = 0
+    old_rows = Attendance.objects.filter(date__lt=cutoff).order_by('pk')
+
+    while True:
+        with transaction.atomic(), summary.suspended():
+            batch = list(old_rows.values(*ARCHIVE_FIELDS)[:batch_size])
+            if not batch:
+                break
+            ArchivedAttendance.objects.bulk_create(
+                [ArchivedAttendance(**row) for row in batch],
+                ignore_conflicts=True,
+            )
+            Attendance.objects.filter(pk__in=[row['id'] for row in batch]).delete()
+
+        moved += len(batch)
+        if progress:
+            progress(moved)
+
+    return moved
+
+
+def archived_until():
+    """
+    Latest archived date, or None while the archive is empty.
+
+    Read from the database every time (an index seek on
+    archive_date_time_in_idx): a per-process cache would keep serving the
+    old value to the web workers after archive_attendance ran elsewhere,
+    and archived rows would silently drop out of records and reports.
+    """
+    return ArchivedAttendance.objects.aggregate(latest=Max('date'))['latest']
+
+
+def reaches_archive(start_date):
+    """
+    True when a range starting at ``start_date`` (a date, an ISO string or
+    None for "from the beginning") includes archived days.
+    """
+    latest = archived_until()
+    if latest is None:
+        return False
+    if not start_date:
+        return True
+    if isinstance(start_date, str):
+        try:
+            start_date = date.fromisoformat(start_date)
+        except ValueError:
+            return True
+    return start_date <= latest
+
+
+def record_querysets(queryset, archive_queryset, start_date):
+    """
+    The querysets to read for a date range: the hot table alone, or the
+    hot table and the archive when the range reaches back into it.
+    """
+    if reaches_archive(start_date):
+        return [queryset, archive_queryset]
+    return [queryset]
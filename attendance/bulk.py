@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.db import transaction
+
+from .archive import reaches_archive
+from .models import ArchivedAttendance, Attendance
+from .stats import invalidate_employee_stats
+from .summary import refresh_summary
+
+BULK_BATCH_SIZE = 1000
+
+# Longest range one bulk request may cover
+MAX_BULK_DAYS = 366
+
+
+def bulk_mark(employees, start, end, status, batch_size=BULK_BATCH_SIZE):
+    """
+    Mark ``status`` for every (employee, day) in start..end (inclusive)
+    that has no attendance yet.
+
+    ``employees`` is an Employee queryset. Existing pairs are fetched with a
+    single query, the missing ones inserted with bulk_create in batches and
+    the daily summary refreshed for the range, all in one transaction.
+    Returns (created, skipped).
+    """
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    employee_ids = list(employees.values_list('pk', flat=True))
+
+    with transaction.atomic():
+        live = Attendance.objects.filter(employee__in=employees, date__gte=start, date__lte=end)
+        existing = set(live.values_list('employee_id', 'date'))
+        already_live = len(existing)
+        if reaches_archive(start):
+            existing.update(
+                ArchivedAttendance.objects.filter(
+                    employee__in=employees, date__gte=start, date__lte=end
+                ).values_list('employee_id', 'date')
+            )
+
+        missing = [
+            Attendance(employee_id=employee_id, date=day, status=status, manual=True)
+            for employee_id in employee_ids
+            for day in days
+            if (employee_id, day) not in existing
+        ]
+        # ignore_conflicts: a punch landing meanwhile wins over the backfill
+        Attendance.objects.bulk_create(missing, batch_size=batch_size, ignore_conflicts=True)
+
+        created = live.count() - already_live
+        if missing:
+            refresh_summary(start, end)
+
+    invalidate_employee_stats()
+    return created, len(employee_ids) * len(days) - created
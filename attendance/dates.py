@@ -0,0 +1,27 @@
+from datetime import date
+
+
+def month_range(year, month):
+    """
+    Return (first_day, first_day_of_next_month) for a month.
+
+    Filter with date__gte/date__lt instead of date__year/date__month so the
+    database can use the date indexes (EXTRACT(month ...) cannot).
+    """
+    start = date(year, month, 1)
+    if month == 12:
+        end = date(year + 1, 1, 1)
+    else:
+        end = date(year, month + 1, 1)
+    return start, end
+
+
+def year_range(year):
+    """Return (first_day, first_day_of_next_year) for a year"""
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def months_before(day, months):
+    """First day of the month ``months`` months before ``day``'s month"""
+    index = day.year * 12 + day.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
@@ -0,0 +1,36 @@
+from datetime import date
+
+
+def record_dates(params):
+    """
+    (start_date, end_date) of the records filters in a QueryDict, as dates
+    or None when not given. Raises ValueError for a malformed date.
+    """
+    return tuple(
+        date.fromisoformat(value) if value else None
+        for value in (params.get('start_date'), params.get('end_date'))
+    )
+
+
+def filter_records(records, params):
+    """
+    Apply the attendance records filters (start_date, end_date, employee_id,
+    status) from a QueryDict to an Attendance queryset.
+
+    Shared by the records page and the exports so both always agree.
+    Callers check the dates with record_dates() first.
+    """
+    start_date, end_date = record_dates(params)
+    employee_id = params.get('employee_id')
+    status_filter = params.get('status')
+
+    if start_date:
+        records = records.filter(date__gte=start_date)
+    if end_date:
+        records = records.filter(date__lte=end_date)
+    if employee_id:
+        records = records.filter(employee__employee_id=employee_id)
+    if status_filter:
+        records = records.filter(status=status_filter)
+
+    return records
@@ -1,3 +1,5 @@
+import logging
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
@@ -8,12 +10,14 @@ from django.template.loader import render_to_string
 from .models import LeaveRequest
 from users.models import Employee
 
+logger = logging.getLogger(__name__)
+
 
 @login_required
 def submit_leave(request):
     """Employee submits leave request"""
     try:
-        employee = Employee.objects.get(user=request.user)
+        employee = request.user.employee
     except Employee.DoesNotExist:
         messages.error(request, "Employee profile not found!")
         return redirect('dashboard')
@@ -60,7 +64,7 @@ def submit_leave(request):
 def my_leaves(request):
     """Employee views their leave requests"""
     try:
-        employee = Employee.objects.get(user=request.user)
+        employee = request.user.employee
         leaves = LeaveRequest.objects.filter(employee=employee).order_by('-applied_on')
     except Employee.DoesNotExist:
         messages.error(request, "Employee profile not found!")
@@ -179,5 +183,5 @@ def send_leave_notification(leave_request, action):
             html_message=message,
             fail_silently=True
         )
-    except Exception as e:
-        print(f"Email sending failed: {e}")
\ No newline at end of file
+    except Exception:
+        logger.warning("Leave notification email failed", exc_info=True, extra={'recipient': recipient})
\ No newline at end of file
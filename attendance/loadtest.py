@@ -0,0 +1,268 @@
+"""
+Load test harness for the kiosk check-in path (``manage.py loadtest``).
+
+An open-loop driver: requests are sent on a precomputed arrival schedule
+whether or not earlier ones have finished, and latency is measured from
+the scheduled send time, so queueing behind saturated workers is counted
+instead of hidden.
+"""
+import io
+import threading
+import time
+from http.cookiejar import CookieJar
+from pathlib import Path
+from urllib import error as urlerror, request as urlrequest
+from urllib.parse import urlencode, urljoin
+
+import numpy as np
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection
+from django.test import Client
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+
+PATTERNS = ('steady', 'poisson', 'spike')
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+
+# Share of a spike's requests inside the rush; the rest arrive uniformly
+SPIKE_SHARE = 0.8
+
+# Errors that mean a statement gave up waiting for a lock
+LOCK_ERRORS = ('is locked', 'deadlock detected', 'lock timeout', 'could not obtain lock')
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def arrival_times(pattern, rate, duration, rng):
+    """
+    Send offsets (seconds from the start, sorted) for about
+    ``rate * duration`` requests: evenly spaced, Poisson arrivals, or a
+    9am-style spike peaking halfway through the run.
+    """
+    count = max(1, int(round(rate * duration)))
+    if pattern == 'steady':
+        return np.arange(count) / rate
+    if pattern == 'poisson':
+        offsets = np.cumsum(rng.exponential(1 / rate, count * 2))
+        return offsets[offsets < duration]
+    rush = rng.normal(duration / 2, duration / 10, int(count * SPIKE_SHARE))
+    background = rng.uniform(0, duration, count - rush.size)
+    return np.sort(np.clip(np.concatenate([rush, background]), 0, duration))
+
+
+def load_images(directory=None, count=20, rng=None):
+    """
+    (name, bytes) image payloads: the images in ``directory``, or ``count``
+    generated 640x480 JPEGs, about the size of a webcam frame.
+    """
+    if directory:
+        paths = sorted(path for path in Path(directory).iterdir() if path.suffix.lower() in IMAGE_SUFFIXES)
+        if not paths:
+            raise ValueError(f"No {'/'.join(IMAGE_SUFFIXES)} images in {directory}")
+        return [(path.name, path.read_bytes()) for path in paths]
+
+    from PIL import Image
+
+    rng = rng or np.random.default_rng()
+    images = []
+    for index in range(count):
+        # Smooth gradients plus noise compress like a photo, unlike pure noise
+        gradient = np.linspace(0, 255, 640, dtype=np.float32)[None, :, None] * rng.random(3)
+        pixels = np.clip(gradient + rng.normal(0, 24, (480, 640, 3)), 0, 255).astype(np.uint8)
+        output = io.BytesIO()
+        Image.fromarray(pixels).save(output, 'JPEG', quality=85)
+        images.append((f'kiosk_{index:04d}.jpg', output.getvalue()))
+    return images
+
+
+class QueryMonitor:
+    """
+    execute_wrapper recording, for one request, the time spent in write
+    statements (where lock waits happen: SQLite's busy timeout, row locks
+    on PostgreSQL) and the statements that failed waiting for a lock.
+    """
+
+    def __init__(self):
+        self.write_seconds = 0.0
+        self.lock_errors = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except DatabaseError as e:
+            if any(text in str(e).lower() for text in LOCK_ERRORS):
+                self.lock_errors += 1
+            raise
+        finally:
+            if sql.lstrip()[:6].upper() in WRITE_STATEMENTS:
+                self.write_seconds += time.perf_counter() - started
+
+
+def allowed_host():
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+class TestClientTarget:
+    """Posts through Django's test client in this process, one client per thread"""
+    measures_db = True
+
+    def __init__(self, user):
+        self.user = user
+        self.path = reverse('mark_attendance')
+        self.local = threading.local()
+
+    def post(self, name, payload, monitor):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client(HTTP_HOST=allowed_host())
+            client.force_login(self.user)
+        with connection.execute_wrapper(monitor):
+            response = client.post(self.path, {'face_image': SimpleUploadedFile(name, payload, 'image/jpeg')})
+        return response.status_code
+
+
+class _NoRedirect(urlrequest.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpTarget:
+    """Posts to a running server; each thread logs in once and keeps its cookies"""
+    measures_db = False
+
+    def __init__(self, base_url, username, password, timeout=30):
+        self.login_url = urljoin(base_url, reverse('login'))
+        self.url = urljoin(base_url, reverse('mark_attendance'))
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def _open(self, opener, request):
+        try:
+            with opener.open(request, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urlerror.HTTPError as e:
+            # Redirects are not followed: a 302 is the view's normal answer
+            return e.code
+
+    def _session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            jar = CookieJar()
+            opener = urlrequest.build_opener(urlrequest.HTTPCookieProcessor(jar), _NoRedirect)
+            self._open(opener, self.login_url)
+            data = urlencode({
+                'username': self.username,
+                'password': self.password,
+                'csrfmiddlewaretoken': self._cookie(jar, 'csrftoken'),
+            }).encode()
+            status = self._open(opener, urlrequest.Request(self.login_url, data, headers={'Referer': self.login_url}))
+            if status != 302:
+                raise RuntimeError(f"Login as {self.username} failed (HTTP {status})")
+            session = self.local.session = (opener, jar)
+        return session
+
+    @staticmethod
+    def _cookie(jar, name):
+        return next((cookie.value for cookie in jar if cookie.name == name), '')
+
+    def post(self, name, payload, monitor):
+        opener, jar = self._session()
+        body = encode_multipart(BOUNDARY, {'face_image': SimpleUploadedFile(name, payload, 'image/jpeg')})
+        request = urlrequest.Request(self.url, body, headers={
+            'Content-Type': MULTIPART_CONTENT,
+            'X-CSRFToken': self._cookie(jar, 'csrftoken'),
+            'Referer': self.url,
+        })
+        return self._open(opener, request)
+
+
+def percentiles(values):
+    if not len(values):
+        return None
+    values = np.asarray(values) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'mean': round(float(values.mean()), 2),
+        'p50': round(float(p50), 2),
+        'p95': round(float(p95), 2),
+        'p99': round(float(p99), 2),
+        'max': round(float(values.max()), 2),
+    }
+
+
+def run_load(target, schedule, images, concurrency):
+    """
+    Send one request per offset in ``schedule`` from ``concurrency``
+    worker threads; returns (results, elapsed seconds).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    results = []
+    start = time.perf_counter()
+
+    def send(index, scheduled):
+        name, payload = images[index % len(images)]
+        monitor = QueryMonitor()
+        began = time.perf_counter()
+        try:
+            status, error = target.post(name, payload, monitor), None
+        except Exception as e:
+            status, error = None, type(e).__name__
+        finished = time.perf_counter()
+        results.append({
+            'latency': finished - scheduled,
+            'service': finished - began,
+            'status': status,
+            'error': error,
+            'write_seconds': monitor.write_seconds,
+            'lock_errors': monitor.lock_errors,
+        })
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='loadtest') as pool:
+        for index, offset in enumerate(schedule):
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, index, scheduled)
+
+    return results, time.perf_counter() - start
+
+
+def build_report(results, elapsed, config, measures_db):
+    """Machine-readable summary of a run"""
+    failed = [r for r in results if r['status'] is None or r['status'] >= 400 or r['lock_errors']]
+    status_codes = {}
+    for result in results:
+        key = str(result['status'] or result['error'])
+        status_codes[key] = status_codes.get(key, 0) + 1
+
+    report = {
+        'config': config,
+        'requests': len(results),
+        'succeeded': len(results) - len(failed),
+        'errors': len(failed),
+        'error_rate': round(len(failed) / len(results), 4) if results else 0,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round((len(results) - len(failed)) / elapsed, 2) if elapsed else 0,
+        'latency_ms': percentiles([r['latency'] for r in results]),
+        'service_ms': percentiles([r['service'] for r in results]),
+        'status_codes': status_codes,
+        'db': None,
+    }
+    if measures_db:
+        report['db'] = {
+            'lock_errors': sum(r['lock_errors'] for r in results),
+            'write_ms': percentiles([r['write_seconds'] for r in results]),
+            'write_total_s': round(sum(r['write_seconds'] for r in results), 3),
+        }
+    return report
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.archive import archive_before, default_cutoff
+
+
+def parse_month(value):
+    try:
+        return datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f'Invalid month "{value}", expected YYYY-MM')
+
+
+class Command(BaseCommand):
+    help = 'Move attendance records from closed months into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before', type=parse_month,
+            help='Archive months before this one (YYYY-MM, default: keep ATTENDANCE_HOT_MONTHS months)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Number of rows moved per transaction (default: 5000)',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = options['before'] or default_cutoff()
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        def progress(moved):
+            self.stdout.write(f'Archived {moved} records')
+
+        moved = archive_before(cutoff, batch_size=options['batch_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} attendance records dated before {cutoff}'))
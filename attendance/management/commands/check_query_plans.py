@@ -0,0 +1,120 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+from users.models import Employee
+from attendance.models import Attendance
+from attendance.dates import month_range
+import json
+import re
+
+
+def hot_queries():
+    """
+    The queries behind the dashboards, records and recognition views.
+
+    Each entry is (name, queryset, table that must not be fully scanned).
+    """
+    today = timezone.now().date()
+    month_start, next_month_start = month_range(today.year, today.month)
+
+    return [
+        (
+            'dashboard: attendance today',
+            Attendance.objects.filter(date=today).values('id'),
+            Attendance._meta.db_table,
+        ),
+        (
+            'dashboard: present today',
+            Attendance.objects.filter(date=today, status='present').values('id'),
+            Attendance._meta.db_table,
+        ),
+        (
+            'dashboard: status breakdown today',
+            Attendance.objects.filter(date=today).values('status').annotate(count=Count('status')),
+            Attendance._meta.db_table,
+        ),
+        (
+            'dashboard: monthly attendance',
+            Attendance.objects.filter(date__gte=month_start, date__lt=next_month_start).values('id'),
+            Attendance._meta.db_table,
+        ),
+        (
+            'records: date range',
+            Attendance.objects.filter(
+                date__gte=month_start, date__lt=next_month_start
+            ).order_by('-date', '-time_in')[:50],
+            Attendance._meta.db_table,
+        ),
+        (
+            'mark_attendance: recognition gallery',
+            Employee.objects.filter(face_encoding__isnull=False, is_active=True).values('employee_id'),
+            Employee._meta.db_table,
+        ),
+        (
+            'employee_list: active employees',
+            Employee.objects.filter(is_active=True).order_by('employee_id').values('id'),
+            Employee._meta.db_table,
+        ),
+    ]
+
+
+def full_scan_pattern(vendor, table):
+    """Regex matching a plan line that reads every row of ``table``"""
+    if vendor == 'sqlite':
+        # "SCAN attendance_attendance" without "USING ... INDEX"
+        return re.compile(r'\bSCAN (TABLE )?%s\b(?!.*USING)' % re.escape(table))
+    if vendor == 'postgresql':
+        return re.compile(r'Seq Scan on %s\b' % re.escape(table))
+    return None
+
+
+class Command(BaseCommand):
+    help = 'Capture EXPLAIN plans for the hot attendance queries and fail on full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Write the captured plans to this JSON file',
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Query plan checks support SQLite and PostgreSQL, not {vendor}')
+
+        if vendor == 'postgresql':
+            # Tiny test tables are always cheaper to seq scan; ask the planner
+            # what it would do once the tables are big.
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+        plans = {}
+        regressions = []
+
+        try:
+            for name, queryset, table in hot_queries():
+                plan = queryset.explain()
+                plans[name] = plan.splitlines()
+
+                pattern = full_scan_pattern(vendor, table)
+                if pattern.search(plan):
+                    regressions.append(name)
+                    self.stdout.write(self.style.ERROR(f'FULL SCAN  {name}'))
+                    self.stdout.write(plan)
+                else:
+                    self.stdout.write(f'ok         {name}')
+        finally:
+            if vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('RESET enable_seqscan')
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump({'vendor': vendor, 'plans': plans}, fh, indent=2)
+
+        if regressions:
+            raise CommandError(f'{len(regressions)} hot queries regressed to full table scans: '
+                               + ', '.join(regressions))
+
+        self.stdout.write(self.style.SUCCESS(f'All {len(plans)} query plans use indexes'))
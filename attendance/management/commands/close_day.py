@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from attendance.absence import close_days
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}", expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Record absences (or approved leave) for employees without attendance on past days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=parse_date, help='Day to close (YYYY-MM-DD, default: yesterday)')
+        parser.add_argument('--start', type=parse_date, help='First day of a backfill range (YYYY-MM-DD)')
+        parser.add_argument('--end', type=parse_date, help='Last day of a backfill range (YYYY-MM-DD)')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows inserted per statement (default: 1000)',
+        )
+        parser.add_argument(
+            '--include-weekends', action='store_true',
+            help='Also close days listed in WEEKEND_DAYS',
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['start'] or options['end']:
+            if options['date']:
+                raise CommandError('Use either --date or --start/--end')
+            start = options['start']
+            end = options['end'] or today - timedelta(days=1)
+            if start is None:
+                raise CommandError('--start is required with --end')
+        else:
+            start = end = options['date'] or today - timedelta(days=1)
+
+        if start > end:
+            raise CommandError('--start must not be after --end')
+        if end >= today:
+            # Employees may still check in today
+            raise CommandError('Only past days can be closed')
+
+        def progress(day, absent, on_leave):
+            self.stdout.write(f'{day}: {absent} absent, {on_leave} on leave')
+
+        absent, on_leave = close_days(
+            start, end,
+            batch_size=options['batch_size'],
+            include_weekends=options['include_weekends'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Closed {start} .. {end}: {absent} absent, {on_leave} on leave'))
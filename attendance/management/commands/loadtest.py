@@ -0,0 +1,85 @@
+import json
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.loadtest import (
+    PATTERNS, HttpTarget, TestClientTarget, arrival_times, build_report, load_images, run_load,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive concurrent mark_attendance check-ins with image payloads (steady, Poisson or 9am spike '
+        'arrivals) and report throughput, latency percentiles, errors and DB lock waits as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running server (e.g. http://127.0.0.1:8000); default: test client in-process',
+        )
+        parser.add_argument('--username', help='User to log in as (default in-process: first staff user)')
+        parser.add_argument('--password', help='Password for --username (required with --url)')
+        parser.add_argument('--pattern', choices=PATTERNS, default='poisson', help='Arrival process (default: poisson)')
+        parser.add_argument('--rate', type=float, default=10, help='Mean requests per second (default: 10)')
+        parser.add_argument('--duration', type=float, default=30, help='Length of the run in seconds (default: 30)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent client threads (default: 8)')
+        parser.add_argument('--images', help='Directory of .jpg/.png payloads (default: generated frames)')
+        parser.add_argument(
+            '--image-count', type=int, default=20,
+            help='Number of frames to generate without --images (default: 20)',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Seed for arrivals and generated frames')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['rate'] <= 0 or options['duration'] <= 0 or options['concurrency'] < 1:
+            raise CommandError('--rate, --duration and --concurrency must be positive')
+
+        if options['url']:
+            if not options['username'] or options['password'] is None:
+                raise CommandError('--username and --password are required with --url')
+            target = HttpTarget(options['url'], options['username'], options['password'])
+        else:
+            users = get_user_model().objects.filter(is_active=True)
+            if options['username']:
+                user = users.filter(username=options['username']).first()
+            else:
+                user = users.filter(is_staff=True).order_by('pk').first()
+            if user is None:
+                raise CommandError('No such active user; pass --username or create a staff user')
+            target = TestClientTarget(user)
+
+        rng = np.random.default_rng(options['seed'])
+        try:
+            images = load_images(options['images'], options['image_count'], rng)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        schedule = arrival_times(options['pattern'], options['rate'], options['duration'], rng)
+
+        self.stderr.write(
+            f"Sending {len(schedule)} requests ({options['pattern']}, {options['rate']}/s over "
+            f"{options['duration']}s) with {options['concurrency']} threads to {options['url'] or 'the test client'}..."
+        )
+        results, elapsed = run_load(target, schedule, images, options['concurrency'])
+
+        config = {
+            key: options[key]
+            for key in ('url', 'pattern', 'rate', 'duration', 'concurrency', 'seed')
+        }
+        config['images'] = len(images)
+        report = build_report(results, elapsed, config, target.measures_db)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            latency = report['latency_ms'] or {}
+            self.stdout.write(self.style.SUCCESS(
+                f"{report['throughput_rps']} req/s, p95 {latency.get('p95')} ms, "
+                f"error rate {report['error_rate']}; report written to {options['output']}"
+            ))
+        else:
+            self.stdout.write(output)
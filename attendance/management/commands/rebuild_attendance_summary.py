@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.summary import rebuild_summary
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}", expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Backfill or repair the daily attendance summary table from attendance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=parse_date, help='First date to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end', type=parse_date, help='Last date to rebuild (YYYY-MM-DD)')
+        parser.add_argument(
+            '--batch-days', type=int, default=31,
+            help='Number of days recomputed per transaction (default: 31)',
+        )
+
+    def handle(self, *args, **options):
+        start, end = options['start'], options['end']
+        if start and end and start > end:
+            raise CommandError('--start must not be after --end')
+
+        def progress(batch_start, batch_end):
+            self.stdout.write(f'Rebuilt {batch_start} .. {batch_end}')
+
+        days = rebuild_summary(start, end, batch_days=options['batch_days'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'Daily attendance summary rebuilt for {days} days'))
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from attendance.models import Attendance
+from attendance.recompute import recompute_status
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}", expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Reclassify attendance as present, late or half day from LATE_ARRIVAL_TIME and HALF_DAY_HOURS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=parse_date, help='First date (YYYY-MM-DD, default: earliest record)')
+        parser.add_argument('--end', type=parse_date, help='Last date (YYYY-MM-DD, default: today)')
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Number of rows read and updated per batch (default: 2000)',
+        )
+
+    def handle(self, *args, **options):
+        start = options['start'] or Attendance.objects.order_by('date').values_list('date', flat=True).first()
+        end = options['end'] or timezone.localdate()
+        if start is None:
+            self.stdout.write('No attendance records to recompute')
+            return
+        if start > end:
+            raise CommandError('--start must not be after --end')
+
+        def progress(month_start, month_end, changed):
+            self.stdout.write(f'{month_start} .. {month_end}: {changed} changed')
+
+        changed = recompute_status(start, end, batch_size=options['batch_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {start} .. {end}: {changed} records changed'))
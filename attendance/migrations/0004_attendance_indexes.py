@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "attendance",
+            "0003_alter_attendance_options_alter_leaverequest_options_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="attendance",
+            index=models.Index(
+                fields=["date", "status"], name="attendance_date_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="attendance",
+            index=models.Index(
+                fields=["date", "time_in"], name="attendance_date_time_in_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.comparison
+
+
+def backfill_summary(apps, schema_editor):
+    Attendance = apps.get_model("attendance", "Attendance")
+    DailyAttendanceSummary = apps.get_model("attendance", "DailyAttendanceSummary")
+
+    rows = (
+        Attendance.objects.order_by()
+        .values("date", "employee__department", "status")
+        .annotate(count=models.Count("id"))
+    )
+    DailyAttendanceSummary.objects.bulk_create(
+        [
+            DailyAttendanceSummary(
+                date=row["date"],
+                department_id=row["employee__department"],
+                status=row["status"],
+                count=row["count"],
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0003_employee_indexes"),
+        ("attendance", "0004_attendance_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyAttendanceSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("present", "Present"),
+                            ("absent", "Absent"),
+                            ("late", "Late"),
+                            ("half_day", "Half Day"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "department",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="users.department",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "daily attendance summaries",
+                "ordering": ["-date", "department", "status"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailyattendancesummary",
+            constraint=models.UniqueConstraint(
+                models.F("date"),
+                django.db.models.functions.comparison.Coalesce("department", 0),
+                models.F("status"),
+                name="daily_summary_unique_bucket",
+            ),
+        ),
+        migrations.RunPython(backfill_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0003_employee_indexes"),
+        ("attendance", "0006_reportjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedAttendance",
+            fields=[
+                ("time_out", models.TimeField(blank=True, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("present", "Present"),
+                            ("absent", "Absent"),
+                            ("late", "Late"),
+                            ("half_day", "Half Day"),
+                        ],
+                        default="present",
+                        max_length=20,
+                    ),
+                ),
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("date", models.DateField()),
+                ("time_in", models.TimeField()),
+                ("archived_on", models.DateTimeField(auto_now_add=True)),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="users.employee"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date", "employee"],
+                "indexes": [
+                    models.Index(
+                        fields=["date", "time_in"], name="archive_date_time_in_idx"
+                    ),
+                    models.Index(
+                        fields=["employee", "date"], name="archive_employee_date_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:06
+
+import attendance.models
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("attendance", "0007_archivedattendance"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="attendance",
+            name="date",
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.AlterField(
+            model_name="attendance",
+            name="time_in",
+            field=models.TimeField(default=attendance.models.current_time),
+        ),
+    ]
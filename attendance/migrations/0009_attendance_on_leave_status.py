@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("attendance", "0008_attendance_date_defaults"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="archivedattendance",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("present", "Present"),
+                    ("absent", "Absent"),
+                    ("late", "Late"),
+                    ("half_day", "Half Day"),
+                    ("on_leave", "On Leave"),
+                ],
+                default="present",
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="attendance",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("present", "Present"),
+                    ("absent", "Absent"),
+                    ("late", "Late"),
+                    ("half_day", "Half Day"),
+                    ("on_leave", "On Leave"),
+                ],
+                default="present",
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="dailyattendancesummary",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("present", "Present"),
+                    ("absent", "Absent"),
+                    ("late", "Late"),
+                    ("half_day", "Half Day"),
+                    ("on_leave", "On Leave"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0005_idsequence"),
+        ("attendance", "0009_attendance_on_leave_status"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="dailyattendancesummary",
+            name="department",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="users.department",
+            ),
+        ),
+    ]
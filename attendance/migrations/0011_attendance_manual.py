@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("attendance", "0010_summary_department_set_null"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedattendance",
+            name="manual",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="attendance",
+            name="manual",
+            field=models.BooleanField(default=False),
+        ),
+    ]
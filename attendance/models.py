@@ -1,29 +1,50 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.conf import settings
-from users.models import Employee
+from django.utils import timezone
+from users.models import Department, Employee
 
 
-class Attendance(models.Model):
+def current_time():
+    return timezone.localtime().time()
+
+
+# Statuses that mean the employee showed up (absent and on_leave rows are
+# materialized by `manage.py close_day`)
+ATTENDED_STATUSES = ('present', 'late', 'half_day')
+
+
+class AttendanceRecord(models.Model):
+    """Fields and helpers shared by live and archived attendance rows"""
     ATTENDANCE_STATUS = (
         ('present', 'Present'),
         ('absent', 'Absent'),
         ('late', 'Late'),
         ('half_day', 'Half Day'),
+        ('on_leave', 'On Leave'),
     )
 
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
-    date = models.DateField(auto_now_add=True)
-    time_in = models.TimeField(auto_now_add=True)
+    # Defaults rather than auto_now_add, so manual and bulk entries can
+    # record a past date (auto_now_add overwrites whatever is passed in)
+    date = models.DateField(default=timezone.localdate)
+    time_in = models.TimeField(default=current_time)
     time_out = models.TimeField(blank=True, null=True)
     status = models.CharField(max_length=20, choices=ATTENDANCE_STATUS, default='present')
+    # Entered by staff (single or bulk), not punched: time_in is only the
+    # entry time, so recompute_status leaves the chosen status alone
+    manual = models.BooleanField(default=False)
 
     class Meta:
-        unique_together = ['employee', 'date']
-        ordering = ['-date', 'employee']
+        abstract = True
 
     def __str__(self):
         return f"{self.employee} - {self.date}"
 
+    @property
+    def is_attended(self):
+        return self.status in ATTENDED_STATUSES
+
     def working_hours(self):
         """Calculate working hours if time_out is recorded"""
         if self.time_out:
@@ -37,6 +58,53 @@ class Attendance(models.Model):
         return None
 
 
+class Attendance(AttendanceRecord):
+    class Meta:
+        unique_together = ['employee', 'date']
+        ordering = ['-date', 'employee']
+        indexes = [
+            # Daily counts and status breakdowns (dashboards, reports)
+            models.Index(fields=['date', 'status'], name='attendance_date_status_idx'),
+            # Records listing, newest first
+            models.Index(fields=['date', 'time_in'], name='attendance_date_time_in_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the daily summary currently counts this row as
+        loaded = dict(zip(field_names, values))
+        instance._summary_key = (loaded.get('date'), loaded.get('status'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Keep the row and its DailyAttendanceSummary delta in one transaction
+        # (the post_save handler in attendance.signals applies the delta).
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class ArchivedAttendance(AttendanceRecord):
+    """
+    Attendance rows from closed months, moved out of the hot table by
+    `manage.py archive_attendance`.
+
+    Rows keep their original primary key and values; the daily summary
+    still counts them.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    date = models.DateField()
+    time_in = models.TimeField()
+    archived_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-date', 'employee']
+        indexes = [
+            models.Index(fields=['date', 'time_in'], name='archive_date_time_in_idx'),
+            models.Index(fields=['employee', 'date'], name='archive_employee_date_idx'),
+        ]
+
+
 class LeaveRequest(models.Model):
     LEAVE_TYPES = (
         ('sick', 'Sick Leave'),
@@ -82,4 +150,84 @@ class LeaveRequest(models.Model):
         return self.status == 'approved'
 
     def is_pending(self):
-        return self.status == 'pending'
\ No newline at end of file
+        return self.status == 'pending'
+
+
+class DailyAttendanceSummary(models.Model):
+    """
+    Attendance row counts per date, department and status.
+
+    Maintained incrementally by attendance.signals whenever an Attendance
+    row is saved or deleted, and rebuilt for the affected dates when an
+    employee changes department or a department is deleted; code paths that
+    bypass model signals (bulk_create, QuerySet.update) must call
+    attendance.summary.refresh_summary for the dates they touch.
+    `manage.py rebuild_attendance_summary` recomputes it from scratch.
+    """
+    date = models.DateField()
+    department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Attendance.ATTENDANCE_STATUS)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-date', 'department', 'status']
+        constraints = [
+            # NULLs are distinct in plain unique constraints, so fold the
+            # "no department" bucket into 0 for uniqueness.
+            models.UniqueConstraint(
+                'date', Coalesce('department', 0), 'status',
+                name='daily_summary_unique_bucket',
+            ),
+        ]
+        verbose_name_plural = 'daily attendance summaries'
+
+    def __str__(self):
+        return f"{self.date} - {self.department or 'No department'} - {self.status}: {self.count}"
+
+
+class ReportJob(models.Model):
+    """A monthly attendance report rendered in the background"""
+    REPORT_TYPES = (
+        ('department', 'Department Summary'),
+        ('employee', 'Employee Summary'),
+    )
+
+    FILE_FORMATS = (
+        ('pdf', 'PDF'),
+        ('xlsx', 'Excel'),
+    )
+
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+
+    report_type = models.CharField(max_length=20, choices=REPORT_TYPES, default='department')
+    file_format = models.CharField(max_length=10, choices=FILE_FORMATS, default='pdf')
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    progress = models.PositiveSmallIntegerField(default=0)
+    file = models.FileField(upload_to='reports/', blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='report_jobs'
+    )
+    created_on = models.DateTimeField(auto_now_add=True)
+    completed_on = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_on']
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} {self.year}-{self.month:02d} ({self.status})"
+
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
@@ -0,0 +1,119 @@
+import base64
+from datetime import date, time
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(record):
+    raw = f"{record.date.isoformat()}|{record.time_in.isoformat()}|{record.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        day, time_in, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return date.fromisoformat(day), time.fromisoformat(time_in), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+
+
+class KeysetPage:
+    """
+    One page of attendance records ordered newest first by (date, time_in, id).
+
+    Unlike Paginator this never counts the table and seeks straight to the
+    cursor, so page N costs the same as page 1.
+    """
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.object_list[-1]) if self.has_next else None
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor(self.object_list[0]) if self.has_previous else None
+
+
+def sort_key(record):
+    return record.date, record.time_in, record.pk
+
+
+def _newer_rows(queryset, cursor, limit):
+    day, time_in, pk = decode_cursor(cursor)
+    newer = (
+        Q(date__gt=day)
+        | Q(date=day, time_in__gt=time_in)
+        | Q(date=day, time_in=time_in, pk__gt=pk)
+    )
+    # The plain date bound lets the planner range-scan the date index
+    return list(queryset.filter(newer, date__gte=day).order_by('date', 'time_in', 'pk')[:limit])
+
+
+def _older_rows(queryset, cursor, limit):
+    queryset = queryset.order_by('-date', '-time_in', '-pk')
+    if cursor:
+        day, time_in, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(date__lt=day)
+            | Q(date=day, time_in__lt=time_in)
+            | Q(date=day, time_in=time_in, pk__lt=pk),
+            date__lte=day,
+        )
+    return list(queryset[:limit])
+
+
+def keyset_paginate(queryset, after=None, before=None, per_page=50):
+    """
+    Return the page of ``queryset`` following cursor ``after`` (older
+    records) or preceding cursor ``before`` (newer records).
+
+    ``queryset`` may also be a list of querysets over models with the same
+    fields (live and archived attendance); each is seeked separately and
+    the pages merged, so ids must be unique across them.
+
+    Raises InvalidCursor for a malformed cursor.
+    """
+    querysets = queryset if isinstance(queryset, (list, tuple)) else [queryset]
+
+    if before:
+        rows = sorted(
+            (row for qs in querysets for row in _newer_rows(qs, before, per_page + 1)),
+            key=sort_key,
+        )[:per_page + 1]
+        if not rows:
+            # Nothing newer any more (rows deleted): start from the top
+            return keyset_paginate(querysets, per_page=per_page)
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page]
+        rows.reverse()
+        return KeysetPage(rows, has_next=True, has_previous=has_previous)
+
+    rows = sorted(
+        (row for qs in querysets for row in _older_rows(qs, after, per_page + 1)),
+        key=sort_key,
+        reverse=True,
+    )[:per_page + 1]
+    has_next = len(rows) > per_page
+    return KeysetPage(rows[:per_page], has_next=has_next, has_previous=bool(after))
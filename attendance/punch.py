@@ -0,0 +1,129 @@
+import sqlite3
+from dataclasses import dataclass
+
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from . import summary
+from .models import Attendance
+from .stats import invalidate_employee_stats
+from .status import classify
+
+# RETURNING needs SQLite 3.35+
+UPSERT_VENDORS = {'postgresql'} | ({'sqlite'} if sqlite3.sqlite_version_info >= (3, 35) else set())
+
+
+@dataclass
+class PunchResult:
+    """
+    Outcome of a punch: 'check_in', 'check_out' or 'complete' (both already
+    recorded, or the day was entered by staff)
+    """
+    action: str
+    attendance_id: int
+    date: object
+    time_in: object
+    time_out: object
+    status: str
+
+    @property
+    def time(self):
+        """The time this punch recorded (or the last one, when complete)"""
+        return self.time_out or self.time_in
+
+
+def _upsert_sql():
+    table = connection.ops.quote_name(Attendance._meta.db_table)
+    return (
+        f'INSERT INTO {table} (employee_id, date, time_in, status, manual) VALUES (%s, %s, %s, %s, FALSE) '
+        f'ON CONFLICT (employee_id, date) DO UPDATE SET time_out = excluded.time_in '
+        f'WHERE {table}.time_out IS NULL AND NOT {table}.manual '
+        f'RETURNING id, time_in, time_out, status'
+    )
+
+
+def _result(row, action, day):
+    attendance_id, time_in, time_out, status = row
+    time_field = Attendance._meta.get_field('time_in')
+    return PunchResult(
+        action=action,
+        attendance_id=attendance_id,
+        date=day,
+        time_in=time_field.to_python(time_in),
+        time_out=time_field.to_python(time_out),
+        status=status,
+    )
+
+
+def _punch_upsert(employee, day, now, status):
+    params = [
+        employee.pk,
+        connection.ops.adapt_datefield_value(day),
+        connection.ops.adapt_timefield_value(now),
+        status,
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(_upsert_sql(), params)
+        row = cursor.fetchone()
+
+    if row is None:
+        # Conflict with a row that already has time_out, or a manual entry: nothing changed
+        record = Attendance.objects.get(employee=employee, date=day)
+        return _result((record.pk, record.time_in, record.time_out, record.status), 'complete', day)
+    return _result(row, 'check_out' if row[2] is not None else 'check_in', day)
+
+
+def _punch_orm(employee, day, now, status):
+    record = Attendance.objects.select_for_update().filter(employee=employee, date=day).first()
+    if record is None:
+        try:
+            with transaction.atomic():
+                with summary.suspended():
+                    record = Attendance.objects.create(employee=employee, date=day, time_in=now, status=status)
+                return _result((record.pk, record.time_in, None, record.status), 'check_in', day)
+        except IntegrityError:
+            # Another kiosk checked the same person in first
+            record = Attendance.objects.select_for_update().get(employee=employee, date=day)
+
+    if record.time_out is not None or record.manual:
+        return _result((record.pk, record.time_in, record.time_out, record.status), 'complete', day)
+
+    Attendance.objects.filter(pk=record.pk).update(time_out=now)
+    return _result((record.pk, record.time_in, now, record.status), 'check_out', day)
+
+
+def punch(employee, when=None):
+    """
+    Record a check-in, or a check-out when the employee already checked in
+    today, as one atomic statement.
+
+    On PostgreSQL and SQLite this is a single INSERT ... ON CONFLICT DO
+    UPDATE, so two kiosks punching the same person at once cannot collide
+    on the (employee, date) constraint; other databases lock the row with
+    select_for_update. Arrivals are classified present or late on insert;
+    a check-out short of HALF_DAY_HOURS turns the day into a half day. A
+    day entered by staff (manual or bulk) is left as it is. The daily
+    summary is updated in the same transaction.
+    """
+    local = timezone.localtime(when)
+    day, now = local.date(), local.time().replace(microsecond=0)
+
+    with transaction.atomic():
+        if connection.vendor in UPSERT_VENDORS:
+            result = _punch_upsert(employee, day, now, classify(now))
+        else:
+            result = _punch_orm(employee, day, now, classify(now))
+
+        if result.action == 'check_in':
+            summary.apply_delta(day, employee.department_id, result.status, 1)
+        elif result.action == 'check_out':
+            status = classify(result.time_in, result.time_out, result.status)
+            if status != result.status:
+                Attendance.objects.filter(pk=result.attendance_id).update(status=status)
+                summary.apply_delta(day, employee.department_id, result.status, -1)
+                summary.apply_delta(day, employee.department_id, status, 1)
+                result.status = status
+
+    if result.action != 'complete':
+        invalidate_employee_stats(employee.pk)
+    return result
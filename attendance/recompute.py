@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+import pandas as pd
+from django.db import transaction
+
+from .dates import month_range
+from .models import ATTENDED_STATUSES, Attendance
+from .stats import invalidate_employee_stats
+from .status import classify_frame
+from .summary import refresh_summary
+
+
+def recompute_range(start, end, batch_size=2000):
+    """
+    Reclassify punched present/late/half_day rows dated start..end
+    (inclusive) and refresh the summary for the range, in one transaction.
+    Manual entries keep the status staff chose.
+
+    Returns the number of rows whose status changed.
+    """
+    with transaction.atomic():
+        rows = Attendance.objects.filter(
+            date__gte=start, date__lte=end, status__in=ATTENDED_STATUSES, manual=False
+        ).values_list('pk', 'time_in', 'time_out', 'status')
+        frame = pd.DataFrame.from_records(
+            list(rows.iterator(chunk_size=batch_size)), columns=['pk', 'time_in', 'time_out', 'status']
+        )
+        if frame.empty:
+            return 0
+
+        frame['new_status'] = classify_frame(frame)
+        changed = frame[frame['new_status'] != frame['status']]
+
+        # Only three target values: one UPDATE ... WHERE pk IN (...) per status
+        # and batch is far cheaper than bulk_update's per-row CASE
+        for status, group in changed.groupby('new_status'):
+            pks = group['pk'].tolist()
+            for offset in range(0, len(pks), batch_size):
+                Attendance.objects.filter(pk__in=pks[offset:offset + batch_size]).update(status=status)
+
+        if len(changed):
+            refresh_summary(start, end)
+
+    return len(changed)
+
+
+def recompute_status(start, end, batch_size=2000, progress=None):
+    """
+    Reclassify start..end month by month (one transaction per month).
+    Returns the total number of rows changed.
+    """
+    total = 0
+    month_start = start
+    while month_start <= end:
+        next_month = month_range(month_start.year, month_start.month)[1]
+        month_end = min(next_month - timedelta(days=1), end)
+        changed = recompute_range(month_start, month_end, batch_size=batch_size)
+        total += changed
+        if progress:
+            progress(month_start, month_end, changed)
+        month_start = next_month
+
+    if total:
+        invalidate_employee_stats()
+    return total
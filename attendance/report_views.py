@@ -0,0 +1,102 @@
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import ReportJob
+from .tasks import enqueue_report
+from users.models import Department
+
+
+def report_job_status(job):
+    """JSON-friendly status of a report job, as polled by reports.html"""
+    data = {
+        'id': job.id,
+        'status': job.status,
+        'progress': job.progress,
+        'error': job.error,
+        'download_url': None,
+    }
+    if job.status == 'completed' and job.file:
+        data['download_url'] = reverse('download_report', args=[job.id])
+    return data
+
+
+@login_required
+def reports(request):
+    """Admin requests monthly reports and sees recent jobs"""
+    if not request.user.is_staff:
+        messages.error(request, "Access denied!")
+        return redirect('dashboard')
+
+    if request.method == 'POST':
+        try:
+            year, month = (int(part) for part in request.POST.get('month', '').split('-'))
+            if not 1 <= month <= 12:
+                raise ValueError
+        except ValueError:
+            messages.error(request, "❌ Please choose a valid month.")
+            return redirect('reports')
+
+        report_type = request.POST.get('report_type', 'department')
+        file_format = request.POST.get('file_format', 'pdf')
+        if report_type not in dict(ReportJob.REPORT_TYPES) or file_format not in dict(ReportJob.FILE_FORMATS):
+            messages.error(request, "❌ Unknown report type or format.")
+            return redirect('reports')
+
+        department = None
+        department_id = request.POST.get('department', '').strip()
+        if department_id:
+            department = Department.objects.filter(pk=department_id).first() if department_id.isdigit() else None
+            if department is None:
+                messages.error(request, "❌ Please choose a valid department.")
+                return redirect('reports')
+
+        job = ReportJob.objects.create(
+            report_type=report_type,
+            file_format=file_format,
+            year=year,
+            month=month,
+            department=department,
+            requested_by=request.user,
+        )
+        enqueue_report(job)
+
+        messages.success(request, "✅ Report queued! It will appear below when ready.")
+        return redirect('reports')
+
+    jobs = ReportJob.objects.select_related('department', 'requested_by')[:20]
+
+    return render(request, 'attendance/reports.html', {
+        'jobs': jobs,
+        'departments': Department.objects.order_by('name'),
+        'report_types': ReportJob.REPORT_TYPES,
+        'file_formats': ReportJob.FILE_FORMATS,
+        'current_month': timezone.now().strftime('%Y-%m'),
+    })
+
+
+@login_required
+def report_status(request, job_id):
+    """Progress of a report job, polled by the reports page"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+
+    job = get_object_or_404(ReportJob, id=job_id)
+    return JsonResponse(report_job_status(job))
+
+
+@login_required
+def download_report(request, job_id):
+    """Serve a finished report (reports contain personal data, so not via MEDIA_URL)"""
+    if not request.user.is_staff:
+        messages.error(request, "Access denied!")
+        return redirect('dashboard')
+
+    job = get_object_or_404(ReportJob, id=job_id, status='completed')
+    if not job.file:
+        raise Http404("Report file missing")
+
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=job.file.name.split('/')[-1])
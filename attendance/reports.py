@@ -0,0 +1,133 @@
+import tempfile
+
+from django.db.models import Count, Q, Sum
+
+from .archive import reaches_archive
+from .dates import month_range
+from .models import ArchivedAttendance, Attendance, DailyAttendanceSummary
+
+STATUSES = [code for code, _ in Attendance.ATTENDANCE_STATUS]
+STATUS_LABELS = [label for _, label in Attendance.ATTENDANCE_STATUS]
+
+
+def department_rows(job):
+    """
+    One row per department for the job's month, from a single grouped
+    query over the daily summary table.
+    """
+    start, end = month_range(job.year, job.month)
+    buckets = DailyAttendanceSummary.objects.filter(date__gte=start, date__lt=end)
+    if job.department_id:
+        buckets = buckets.filter(department_id=job.department_id)
+
+    totals = {}
+    for row in buckets.order_by().values('department__name', 'status').annotate(total=Sum('count')):
+        name = row['department__name'] or 'No Department'
+        totals.setdefault(name, dict.fromkeys(STATUSES, 0))[row['status']] = row['total']
+
+    header = ['Department'] + STATUS_LABELS + ['Total']
+    rows = [
+        [name] + [counts[s] for s in STATUSES] + [sum(counts.values())]
+        for name, counts in sorted(totals.items())
+    ]
+    return header, rows
+
+
+def employee_rows(job):
+    """
+    One row per employee for the job's month, from a grouped query with
+    conditional counts per status (plus one over the archive for archived
+    months).
+    """
+    start, end = month_range(job.year, job.month)
+    models = [Attendance, ArchivedAttendance] if reaches_archive(start) else [Attendance]
+
+    per_status = {status: Count('id', filter=Q(status=status)) for status in STATUSES}
+    totals = {}
+    for model in models:
+        records = model.objects.filter(date__gte=start, date__lt=end)
+        if job.department_id:
+            records = records.filter(employee__department_id=job.department_id)
+
+        grouped = records.order_by().values(
+            'employee__employee_id',
+            'employee__user__first_name',
+            'employee__user__last_name',
+            'employee__department__name',
+        ).annotate(total=Count('id'), **per_status)
+
+        for row in grouped.iterator(chunk_size=2000):
+            counts = totals.setdefault(row['employee__employee_id'], {
+                'name': f"{row['employee__user__first_name']} {row['employee__user__last_name']}".strip(),
+                'department': row['employee__department__name'] or '-',
+                'counts': dict.fromkeys(STATUSES + ['total'], 0),
+            })['counts']
+            for key in counts:
+                counts[key] += row[key]
+
+    header = ['Employee ID', 'Name', 'Department'] + STATUS_LABELS + ['Total']
+    rows = [
+        [employee_id, entry['name'], entry['department']]
+        + [entry['counts'][s] for s in STATUSES] + [entry['counts']['total']]
+        for employee_id, entry in sorted(totals.items())
+    ]
+    return header, rows
+
+
+def write_xlsx(title, header, rows, output):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Report')
+    sheet.append([title])
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(output)
+
+
+def write_pdf(title, header, rows, output):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+    document = SimpleDocTemplate(output, pagesize=landscape(A4), title=title)
+    table = Table([header] + rows, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4e73df')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fc')]),
+    ]))
+    document.build([Paragraph(title, getSampleStyleSheet()['Title']), table])
+
+
+def render_report(job, progress=None):
+    """
+    Render ``job`` to a temporary file.
+
+    Returns (filename, file object rewound to the start); the caller stores
+    it and closes the file, which deletes it.
+    """
+    progress = progress or (lambda percent: None)
+
+    if job.report_type == 'employee':
+        header, rows = employee_rows(job)
+    else:
+        header, rows = department_rows(job)
+    progress(50)
+
+    scope = job.department.name if job.department_id else 'All Departments'
+    title = f"{job.get_report_type_display()} - {scope} - {job.year}-{job.month:02d}"
+    filename = f"{job.report_type}_{job.year}_{job.month:02d}_{job.pk}.{job.file_format}"
+
+    output = tempfile.NamedTemporaryFile(suffix=f'.{job.file_format}')
+    if job.file_format == 'xlsx':
+        write_xlsx(title, header, rows, output)
+    else:
+        write_pdf(title, header, rows, output)
+    output.seek(0)
+    progress(90)
+
+    return filename, output
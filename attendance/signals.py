@@ -0,0 +1,54 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.models import Department, Employee
+from .models import Attendance, LeaveRequest
+from .stats import invalidate_dashboard_stats, invalidate_employee_stats
+from . import summary
+
+
+@receiver(post_save, sender=Attendance)
+def update_summary_on_save(sender, instance, raw=False, **kwargs):
+    invalidate_employee_stats(instance.employee_id)
+    if raw or summary.is_suspended():
+        # loaddata: rebuild_attendance_summary afterwards
+        return
+    summary.record_saved(instance)
+
+
+@receiver(post_delete, sender=Attendance)
+def update_summary_on_delete(sender, instance, **kwargs):
+    invalidate_employee_stats(instance.employee_id)
+    if summary.is_suspended():
+        return
+    summary.record_deleted(instance)
+
+
+@receiver(post_save, sender=LeaveRequest)
+@receiver(post_delete, sender=LeaveRequest)
+def invalidate_stats_on_leave_change(sender, instance, **kwargs):
+    invalidate_employee_stats(instance.employee_id)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_dashboard_on_staff_change(sender, **kwargs):
+    # Employee, face and department counts are on the dashboards
+    invalidate_dashboard_stats()
+
+
+@receiver(post_save, sender=Employee)
+def move_summary_on_department_change(sender, instance, created, raw=False, **kwargs):
+    # The summary files rows under the employee's department: move them all
+    previous = getattr(instance, '_loaded_department_id', instance.department_id)
+    instance._loaded_department_id = instance.department_id
+    if created or raw or previous == instance.department_id:
+        return
+    summary.move_employee(instance.pk, previous, instance.department_id)
+
+
+@receiver(pre_delete, sender=Department)
+def detach_summary_on_department_delete(sender, instance, **kwargs):
+    summary.detach_department(instance.pk)
@@ -0,0 +1,312 @@
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.routers import cache_timeout
+from users.models import Department, Employee
+from .dates import month_range, year_range
+from .models import ATTENDED_STATUSES, ArchivedAttendance, DailyAttendanceSummary, LeaveRequest
+
+
+@dataclass
+class DashboardStats:
+    """Aggregates shared by the core and attendance dashboards"""
+    today: date
+    total_employees: int = 0
+    employees_with_faces: int = 0
+    total_departments: int = 0
+    # Employees who showed up today (present, late or half day)
+    attendance_today: int = 0
+    # Rows with status 'present' today
+    present_today: int = 0
+    monthly_attendance: int = 0
+    # [{'status': 'present', 'count': 12}, ...] for today
+    today_status: list = field(default_factory=list)
+    # [(date, present_count), ...] oldest first
+    trend: list = field(default_factory=list)
+    department_stats: list = field(default_factory=list)
+
+    @property
+    def trend_labels(self):
+        return [day.strftime('%a') for day, _ in self.trend]
+
+    @property
+    def trend_counts(self):
+        return [count for _, count in self.trend]
+
+    @property
+    def weekly_trend(self):
+        return [(day.strftime('%Y-%m-%d'), count) for day, count in self.trend]
+
+
+def department_stats(today):
+    """
+    Departments annotated with employee_count and present_today_count.
+
+    Correlated subqueries (employee count, today's summary bucket) keep
+    this at one row per department instead of joining every employee's
+    whole attendance history before grouping.
+    """
+    employee_count = Employee.objects.filter(
+        department=OuterRef('pk')
+    ).order_by().values('department').annotate(count=Count('id')).values('count')
+
+    present_count = DailyAttendanceSummary.objects.filter(
+        department=OuterRef('pk'),
+        date=today,
+        status='present',
+    ).values('count')
+
+    return list(Department.objects.annotate(
+        employee_count=Coalesce(Subquery(employee_count, output_field=IntegerField()), 0),
+        present_today_count=Coalesce(Subquery(present_count, output_field=IntegerField()), 0),
+    ).order_by('name'))
+
+
+def get_dashboard_stats(days=7, today=None):
+    """
+    Compute dashboard statistics with one query per aggregate.
+
+    Attendance figures are read from DailyAttendanceSummary, so the cost
+    grows with the number of days shown rather than the number of rows.
+    The N-day trend and today's status breakdown come from a single
+    grouped query over (date, status).
+    """
+    today = today or timezone.now().date()
+    first_day = today - timedelta(days=days - 1)
+    month_start, next_month_start = month_range(today.year, today.month)
+
+    stats = DashboardStats(today=today)
+
+    employees = Employee.objects.filter(is_active=True).aggregate(
+        total=Count('id'),
+        with_faces=Count('id', filter=Q(face_encoding__isnull=False)),
+    )
+    stats.total_employees = employees['total']
+    stats.employees_with_faces = employees['with_faces']
+    stats.total_departments = Department.objects.count()
+
+    present_by_day = {}
+    rows = DailyAttendanceSummary.objects.filter(
+        date__gte=first_day, date__lte=today, count__gt=0
+    ).order_by('date', 'status').values('date', 'status').annotate(total=Sum('count'))
+    for row in rows:
+        if row['status'] == 'present':
+            present_by_day[row['date']] = row['total']
+        if row['date'] == today:
+            stats.today_status.append({'status': row['status'], 'count': row['total']})
+            if row['status'] in ATTENDED_STATUSES:
+                stats.attendance_today += row['total']
+
+    stats.trend = [
+        (first_day + timedelta(days=i), present_by_day.get(first_day + timedelta(days=i), 0))
+        for i in range(days)
+    ]
+    stats.present_today = present_by_day.get(today, 0)
+    stats.monthly_attendance = DailyAttendanceSummary.objects.filter(
+        date__gte=month_start, date__lt=next_month_start, status__in=ATTENDED_STATUSES
+    ).aggregate(total=Coalesce(Sum('count'), 0))['total']
+    stats.department_stats = department_stats(today)
+
+    return stats
+
+
+def _entry_timeout(timeout):
+    """
+    Lifetime of a cache entry that writes invalidate. Invalidation only
+    reaches other workers through a shared cache (USE_REDIS); with the
+    per-process default an entry lives LOCAL_CACHE_TIMEOUT seconds at most.
+    """
+    timeout = cache_timeout(timeout)
+    if not getattr(settings, 'USE_REDIS', False):
+        timeout = min(timeout, getattr(settings, 'LOCAL_CACHE_TIMEOUT', 5))
+    return timeout
+
+
+DASHBOARD_CACHE_KEY = 'attendance:dashboard'
+DASHBOARD_VERSION_KEY = 'attendance:dashboard:version'
+# A cached copy outlives its version, so it can be served stale while
+# one worker recomputes the new one
+DASHBOARD_STALE_TIMEOUT = 60 * 60
+# Longest a recomputation may hold the lock (a crashed worker releases it)
+DASHBOARD_LOCK_TIMEOUT = 30
+# How long a worker with no stale copy waits for another one's result
+DASHBOARD_WAIT = 2
+DASHBOARD_POLL_INTERVAL = 0.05
+
+
+def dashboard_version():
+    version = cache.get(DASHBOARD_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(DASHBOARD_VERSION_KEY, version, None)
+    return version
+
+
+def _bump_dashboard_version():
+    try:
+        cache.incr(DASHBOARD_VERSION_KEY)
+    except ValueError:
+        cache.add(DASHBOARD_VERSION_KEY, 2, None)
+
+
+def invalidate_dashboard_stats():
+    """
+    Bump the dashboard data version once the current transaction commits
+    (immediately outside one), so a reader can never cache pre-commit
+    figures under the new version.
+    """
+    transaction.on_commit(_bump_dashboard_version)
+
+
+def cached_dashboard_stats(days=7, today=None):
+    """
+    get_dashboard_stats() through the cache, keyed by the data version
+    that attendance, employee and department writes bump.
+
+    Single flight: when the cached copy is out of date, the worker that
+    wins cache.add() on the version's lock recomputes it; the others serve
+    the stale copy meanwhile, or, with none, wait up to DASHBOARD_WAIT
+    seconds for the fresh one before computing it themselves.
+    """
+    today = today or timezone.now().date()
+    key = f'{DASHBOARD_CACHE_KEY}:{days}:{today.isoformat()}'
+    version = dashboard_version()
+
+    entry = cache.get(key)
+    if entry is not None and entry['version'] == version:
+        return entry['stats']
+
+    lock_key = f'{key}:lock:{version}'
+    if not cache.add(lock_key, True, DASHBOARD_LOCK_TIMEOUT):
+        if entry is not None:
+            return entry['stats']
+        deadline = time.monotonic() + DASHBOARD_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(DASHBOARD_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None and entry['version'] >= version:
+                return entry['stats']
+        return get_dashboard_stats(days, today)
+
+    try:
+        stats = get_dashboard_stats(days, today)
+        cache.set(key, {'version': version, 'stats': stats}, _entry_timeout(DASHBOARD_STALE_TIMEOUT))
+    finally:
+        cache.delete(lock_key)
+    return stats
+
+
+EMPLOYEE_STATS_TIMEOUT = 60 * 60
+EMPLOYEE_STATS_GENERATION_KEY = 'attendance:employee_stats:generation'
+
+
+def _employee_stats_generation():
+    generation = cache.get(EMPLOYEE_STATS_GENERATION_KEY)
+    if generation is None:
+        generation = 1
+        cache.add(EMPLOYEE_STATS_GENERATION_KEY, generation, None)
+    return generation
+
+
+def _employee_stats_key(employee_id, month_start, generation):
+    return f'attendance:employee_stats:{generation}:{month_start:%Y-%m}:{employee_id}'
+
+
+def compute_employee_stats(employee_ids, today):
+    """
+    Profile statistics for ``employee_ids`` from one query: conditional
+    counts over the attendance join plus correlated counts for the archive
+    and leave requests (separate joins would multiply the rows).
+    """
+    month_start, next_month_start = month_range(today.year, today.month)
+    year_start, next_year_start = year_range(today.year)
+
+    def count_of(queryset):
+        return Coalesce(Subquery(
+            queryset.filter(employee=OuterRef('pk')).order_by().values('employee').annotate(
+                count=Count('id')
+            ).values('count'),
+            output_field=IntegerField(),
+        ), 0)
+
+    attended = Q(attendance__status__in=ATTENDED_STATUSES)
+    rows = Employee.objects.filter(pk__in=employee_ids).annotate(
+        monthly_attendance=Count('attendance', filter=attended & Q(
+            attendance__date__gte=month_start, attendance__date__lt=next_month_start,
+        )),
+        live_attendance=Count('attendance', filter=attended),
+        archived_attendance=count_of(ArchivedAttendance.objects.filter(status__in=ATTENDED_STATUSES)),
+        pending_leaves=count_of(LeaveRequest.objects.filter(status='pending')),
+        approved_leaves=count_of(LeaveRequest.objects.filter(
+            status='approved', start_date__gte=year_start, start_date__lt=next_year_start,
+        )),
+    ).values_list(
+        'pk', 'monthly_attendance', 'live_attendance', 'archived_attendance', 'pending_leaves', 'approved_leaves',
+    )
+
+    return {
+        pk: {
+            'monthly_attendance': monthly,
+            'total_attendance': live + archived,
+            'pending_leaves': pending,
+            'approved_leaves': approved,
+        }
+        for pk, monthly, live, archived, pending, approved in rows
+    }
+
+
+def get_employee_stats_bulk(employee_ids, today=None):
+    """
+    Profile statistics (monthly_attendance, total_attendance,
+    pending_leaves, approved_leaves) keyed by employee pk.
+
+    Served from per-employee cache entries; the misses are computed
+    together in one query and cached.
+    """
+    today = today or timezone.now().date()
+    month_start = month_range(today.year, today.month)[0]
+    generation = _employee_stats_generation()
+    keys = {_employee_stats_key(pk, month_start, generation): pk for pk in employee_ids}
+
+    cached = cache.get_many(keys)
+    stats = {keys[key]: value for key, value in cached.items()}
+
+    missing = [pk for key, pk in keys.items() if key not in cached]
+    if missing:
+        computed = compute_employee_stats(missing, today)
+        cache.set_many(
+            {_employee_stats_key(pk, month_start, generation): value for pk, value in computed.items()},
+            _entry_timeout(EMPLOYEE_STATS_TIMEOUT),
+        )
+        stats.update(computed)
+
+    return stats
+
+
+def get_employee_stats(employee, today=None):
+    return get_employee_stats_bulk([employee.pk], today).get(employee.pk, {})
+
+
+def invalidate_employee_stats(employee_id=None):
+    """
+    Drop one employee's cached statistics, or everyone's (after bulk
+    writes that bypass signals) when ``employee_id`` is None.
+    """
+    if employee_id is None:
+        try:
+            cache.incr(EMPLOYEE_STATS_GENERATION_KEY)
+        except ValueError:
+            cache.add(EMPLOYEE_STATS_GENERATION_KEY, 2, None)
+        return
+
+    today = timezone.now().date()
+    month_start = month_range(today.year, today.month)[0]
+    cache.delete(_employee_stats_key(employee_id, month_start, _employee_stats_generation()))
@@ -0,0 +1,59 @@
+from datetime import datetime, time
+
+import numpy as np
+from django.conf import settings
+
+from .models import ATTENDED_STATUSES
+
+
+def late_arrival_time():
+    """settings.LATE_ARRIVAL_TIME ('HH:MM') as a time"""
+    value = getattr(settings, 'LATE_ARRIVAL_TIME', '09:15')
+    if isinstance(value, time):
+        return value
+    return datetime.strptime(value, '%H:%M').time()
+
+
+def half_day_seconds():
+    return getattr(settings, 'HALF_DAY_HOURS', 4) * 3600
+
+
+def seconds(value):
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def classify(time_in, time_out=None, status='present'):
+    """
+    Status for a punch: half_day when fewer than HALF_DAY_HOURS were worked,
+    late when arriving after LATE_ARRIVAL_TIME, else present.
+
+    Statuses that are not attendance (absent, on_leave) are kept as they are.
+    """
+    if status not in ATTENDED_STATUSES or time_in is None:
+        return status
+    if time_out is not None and seconds(time_out) - seconds(time_in) < half_day_seconds():
+        return 'half_day'
+    if time_in > late_arrival_time():
+        return 'late'
+    return 'present'
+
+
+def classify_frame(frame):
+    """
+    Vectorized classify() over a DataFrame with time_in, time_out and
+    status columns; returns a NumPy array of statuses.
+    """
+    time_in = np.array([seconds(value) for value in frame['time_in']], dtype=np.int32)
+    time_out = np.array(
+        [seconds(value) if isinstance(value, time) else -1 for value in frame['time_out']], dtype=np.int32
+    )
+    checked_out = time_out >= 0
+
+    statuses = np.where(
+        checked_out & (time_out - time_in < half_day_seconds()),
+        'half_day',
+        np.where(time_in > seconds(late_arrival_time()), 'late', 'present'),
+    ).astype(object)
+
+    attended = frame['status'].isin(ATTENDED_STATUSES).to_numpy()
+    return np.where(attended, statuses, frame['status'].to_numpy(dtype=object))
@@ -0,0 +1,173 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from users.models import Employee
+from .models import ArchivedAttendance, Attendance, DailyAttendanceSummary
+from .stats import invalidate_dashboard_stats
+
+_suspended = ContextVar('attendance_summary_suspended', default=False)
+
+
+@contextmanager
+def suspended():
+    """Skip signal-driven summary updates, e.g. while rows move to the archive"""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def is_suspended():
+    return _suspended.get()
+
+
+def apply_delta(day, department_id, status, delta):
+    """Add ``delta`` to the summary bucket (day, department, status)"""
+    if not delta:
+        return
+    invalidate_dashboard_stats()
+
+    bucket = DailyAttendanceSummary.objects.filter(
+        date=day, department_id=department_id, status=status
+    )
+    if bucket.update(count=F('count') + delta):
+        return
+
+    try:
+        with transaction.atomic():
+            DailyAttendanceSummary.objects.create(
+                date=day, department_id=department_id, status=status, count=delta
+            )
+    except IntegrityError:
+        # Another writer created the bucket between our update and insert
+        bucket.update(count=F('count') + delta)
+
+
+def department_for(attendance):
+    """Department id the summary files an attendance row under"""
+    if Attendance.employee.is_cached(attendance):
+        return attendance.employee.department_id
+    return Employee.objects.filter(pk=attendance.employee_id).values_list(
+        'department_id', flat=True
+    ).first()
+
+
+def record_saved(attendance):
+    """Move a saved row's count from its previous bucket to its current one"""
+    previous = getattr(attendance, '_summary_key', (None, None))
+    current = (attendance.date, attendance.status)
+    attendance._summary_key = current
+
+    if previous == current:
+        return
+
+    department_id = department_for(attendance)
+    if previous[0] is not None:
+        apply_delta(previous[0], department_id, previous[1], -1)
+    apply_delta(current[0], department_id, current[1], 1)
+
+
+def record_deleted(attendance):
+    previous = getattr(attendance, '_summary_key', (None, None))
+    if previous[0] is not None:
+        apply_delta(previous[0], department_for(attendance), previous[1], -1)
+
+
+def move_employee(employee_id, old_department_id, new_department_id):
+    """
+    Move one employee's counts (archive included) from the old department's
+    buckets to the new one's, leaving everyone else's untouched.
+    """
+    counts = {}
+    for model in (Attendance, ArchivedAttendance):
+        rows = model.objects.filter(
+            employee_id=employee_id
+        ).order_by().values('date', 'status').annotate(count=Count('id'))
+        for row in rows:
+            key = (row['date'], row['status'])
+            counts[key] = counts.get(key, 0) + row['count']
+
+    with transaction.atomic():
+        for (day, status), count in counts.items():
+            apply_delta(day, old_department_id, status, -count)
+            apply_delta(day, new_department_id, status, count)
+
+
+def detach_department(department_id):
+    """
+    Move a department's buckets to "no department" before it is deleted,
+    where its employees end up (SET_NULL).
+    """
+    with transaction.atomic():
+        buckets = DailyAttendanceSummary.objects.filter(department_id=department_id)
+        moved = list(buckets.filter(count__gt=0).values_list('date', 'status', 'count'))
+        buckets.delete()
+        for day, status, count in moved:
+            apply_delta(day, None, status, count)
+
+
+def refresh_summary(start, end):
+    """
+    Recompute the summary for start..end (inclusive) from Attendance and
+    ArchivedAttendance rows.
+
+    Used after bulk writes that bypass model signals. Call it inside the
+    transaction that made the bulk write so readers never see a mismatch.
+    """
+    with transaction.atomic():
+        invalidate_dashboard_stats()
+        DailyAttendanceSummary.objects.filter(date__gte=start, date__lte=end).delete()
+        counts = {}
+        for model in (Attendance, ArchivedAttendance):
+            rows = model.objects.filter(
+                date__gte=start, date__lte=end
+            ).order_by().values('date', 'employee__department', 'status').annotate(count=Count('id'))
+            for row in rows:
+                key = (row['date'], row['employee__department'], row['status'])
+                counts[key] = counts.get(key, 0) + row['count']
+        DailyAttendanceSummary.objects.bulk_create(
+            [
+                DailyAttendanceSummary(date=day, department_id=department_id, status=status, count=count)
+                for (day, department_id, status), count in counts.items()
+            ],
+            batch_size=1000,
+        )
+
+
+def rebuild_summary(start=None, end=None, batch_days=31, progress=None):
+    """
+    Rebuild the summary over a date range in batches of ``batch_days``.
+
+    Defaults to the full span of recorded attendance, archive included.
+    Returns the number of days processed.
+    """
+    if start is None or end is None:
+        dates = [
+            day
+            for model in (Attendance, ArchivedAttendance)
+            for day in (
+                model.objects.order_by('date').values_list('date', flat=True).first(),
+                model.objects.order_by('-date').values_list('date', flat=True).first(),
+            )
+            if day is not None
+        ]
+        if not dates:
+            DailyAttendanceSummary.objects.all().delete()
+            return 0
+        start = start or min(dates)
+        end = end or max(dates)
+
+    day = start
+    while day <= end:
+        batch_end = min(day + timedelta(days=batch_days - 1), end)
+        refresh_summary(day, batch_end)
+        if progress:
+            progress(day, batch_end)
+        day = batch_end + timedelta(days=1)
+
+    return (end - start).days + 1
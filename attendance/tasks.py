@@ -0,0 +1,75 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connections, transaction
+from django.utils import timezone
+
+from core.routers import replica_reads
+from .models import ReportJob
+from .reports import render_report
+
+logger = logging.getLogger(__name__)
+
+try:
+    from celery import shared_task
+except ImportError:
+    shared_task = None
+
+_executor = None
+
+
+def run_report(job_id):
+    """Render a ReportJob and store the result under MEDIA_ROOT/reports/"""
+    job = ReportJob.objects.select_related('department').get(pk=job_id)
+    jobs = ReportJob.objects.filter(pk=job_id)
+    jobs.update(status='running', progress=5)
+
+    try:
+        # Reporting reads may go to the replica; the job row stays on the primary
+        with replica_reads(sticky=False):
+            filename, output = render_report(job, progress=lambda percent: jobs.update(progress=percent))
+        with output:
+            job.file.save(filename, File(output), save=False)
+        jobs.update(status='completed', progress=100, file=job.file.name, completed_on=timezone.now())
+    except Exception as e:
+        logger.exception("Report job %s failed", job_id)
+        jobs.update(status='failed', error=str(e), completed_on=timezone.now())
+
+
+if shared_task is not None:
+    generate_report = shared_task(name='attendance.generate_report')(run_report)
+else:
+    generate_report = None
+
+
+def _run_in_thread(job_id):
+    try:
+        run_report(job_id)
+    finally:
+        # Worker threads open their own connections; don't leak them
+        connections.close_all()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'REPORT_WORKERS', 2),
+            thread_name_prefix='report',
+        )
+    return _executor
+
+
+def enqueue_report(job):
+    """
+    Run ``job`` in the background once the current transaction commits.
+
+    Uses Celery when USE_CELERY is set (CELERY_TASK_ALWAYS_EAGER runs it
+    in-process), otherwise a local thread pool.
+    """
+    if getattr(settings, 'USE_CELERY', False) and generate_report is not None:
+        transaction.on_commit(lambda: generate_report.delay(job.pk))
+    else:
+        transaction.on_commit(lambda: get_executor().submit(_run_in_thread, job.pk))
@@ -1,3 +1,769 @@
-from django.test import TestCase
+import csv
+import json
+import tempfile
+from datetime import datetime, time, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from users.models import CustomUser, Department, Employee
+from .archive import archive_before
+from .loadtest import PATTERNS, arrival_times, load_images
+from .models import ArchivedAttendance, Attendance, DailyAttendanceSummary, LeaveRequest, ReportJob
+from .pagination import keyset_paginate
+from .punch import punch
+from .reports import render_report
+from .bulk import bulk_mark
+from . import stats as stats_module
+from . import summary
+from .stats import cached_dashboard_stats, get_dashboard_stats, get_employee_stats, get_employee_stats_bulk
+from .summary import rebuild_summary
+from .timesheet import timesheet
+from .utils import FaceRecognition
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertNotIn('FULL SCAN', out.getvalue())
+
+
+class DashboardStatsTests(TestCase):
+    def test_trend_and_department_counts(self):
+        today = timezone.now().date()
+        it = Department.objects.create(name='IT')
+        Department.objects.create(name='HR')
+        employees = [
+            Employee.objects.create(
+                user=CustomUser.objects.create_user(username=f'user{i}'),
+                employee_id=f'EMP{i:04d}',
+                department=it,
+            )
+            for i in range(3)
+        ]
+        Attendance.objects.create(employee=employees[0], status='present')
+        Attendance.objects.create(employee=employees[1], status='late')
+        yesterday = Attendance.objects.create(employee=employees[2], status='present')
+        yesterday.date = today - timedelta(days=1)
+        yesterday.save()
+
+        with self.assertNumQueries(5):
+            stats = get_dashboard_stats(days=7, today=today)
+
+        self.assertEqual(stats.trend_counts, [0, 0, 0, 0, 0, 1, 1])
+        self.assertEqual(stats.present_today, 1)
+        self.assertEqual(stats.attendance_today, 2)
+        self.assertEqual(
+            {d.name: (d.employee_count, d.present_today_count) for d in stats.department_stats},
+            {'IT': (3, 1), 'HR': (0, 0)},
+        )
+
+
+class DashboardCacheTests(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_cached_until_attendance_changes(self):
+        today = timezone.now().date()
+        employee = Employee.objects.create(user=CustomUser.objects.create_user(username='user'), employee_id='EMP0001')
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(employee=employee, status='present')
+
+        self.assertEqual(cached_dashboard_stats(days=7, today=today).present_today, 1)
+        with self.assertNumQueries(0):
+            cached_dashboard_stats(days=7, today=today)
+
+        # The version only moves once the write commits
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Attendance.objects.filter(employee=employee).update(status='late')
+            rebuild_summary(today, today)
+            self.assertEqual(cached_dashboard_stats(days=7, today=today).present_today, 1)
+        self.assertEqual(len(callbacks), 1)
+        stats = cached_dashboard_stats(days=7, today=today)
+        self.assertEqual((stats.present_today, stats.attendance_today), (0, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.create(user=CustomUser.objects.create_user(username='other'), employee_id='EMP0002')
+        self.assertEqual(cached_dashboard_stats(days=7, today=today).total_employees, 2)
+
+    def test_short_lived_without_a_shared_cache(self):
+        with mock.patch.object(cache, 'set', wraps=cache.set) as set_:
+            with override_settings(USE_REDIS=False, LOCAL_CACHE_TIMEOUT=5):
+                cached_dashboard_stats(days=7)
+            cache.clear()
+            with override_settings(USE_REDIS=True):
+                cached_dashboard_stats(days=7)
+        self.assertEqual([call.args[-1] for call in set_.call_args_list], [5, stats_module.DASHBOARD_STALE_TIMEOUT])
+
+    def test_single_flight_serves_stale_copy_while_locked(self):
+        today = timezone.now().date()
+        stale = cached_dashboard_stats(days=7, today=today)
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.create(user=CustomUser.objects.create_user(username='user'), employee_id='EMP0001')
+
+        # Another worker is recomputing the new version
+        key = f'{stats_module.DASHBOARD_CACHE_KEY}:7:{today.isoformat()}'
+        cache.add(f'{key}:lock:{stats_module.dashboard_version()}', True, 30)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_dashboard_stats(days=7, today=today).total_employees, stale.total_employees)
+
+        cache.clear()
+        self.assertEqual(cached_dashboard_stats(days=7, today=today).total_employees, 1)
+
+
+class DailySummaryTests(TestCase):
+    def buckets(self):
+        return {
+            (row.date, row.department_id, row.status): row.count
+            for row in DailyAttendanceSummary.objects.filter(count__gt=0)
+        }
+
+    def test_summary_follows_saves_and_deletes(self):
+        today = timezone.now().date()
+        department = Department.objects.create(name='IT')
+        employees = [
+            Employee.objects.create(
+                user=CustomUser.objects.create_user(username=f'user{i}'),
+                employee_id=f'EMP{i:04d}',
+                department=department if i else None,
+            )
+            for i in range(3)
+        ]
+        records = [Attendance.objects.create(employee=e, status='present') for e in employees]
+
+        edited = Attendance.objects.get(pk=records[1].pk)
+        edited.status = 'late'
+        edited.save()
+        Attendance.objects.get(pk=records[2].pk).delete()
+
+        self.assertEqual(self.buckets(), {
+            (today, None, 'present'): 1,
+            (today, department.id, 'late'): 1,
+        })
+
+        incremental = self.buckets()
+        rebuild_summary()
+        self.assertEqual(self.buckets(), incremental)
+
+    def test_department_change_moves_old_rows(self):
+        today = timezone.now().date()
+        it, hr = Department.objects.create(name='IT'), Department.objects.create(name='HR')
+        employee = Employee.objects.create(
+            user=CustomUser.objects.create_user(username='user'), employee_id='EMP0001', department=it,
+        )
+        old = Attendance.objects.create(employee=employee, date=today - timedelta(days=3), status='present')
+        Attendance.objects.create(employee=employee, status='late')
+        colleague = Employee.objects.create(
+            user=CustomUser.objects.create_user(username='colleague'), employee_id='EMP0002', department=it,
+        )
+        Attendance.objects.create(employee=colleague, status='present')
+        untouched = DailyAttendanceSummary.objects.get(date=today, department=it, status='present').pk
+
+        employee = Employee.objects.get(pk=employee.pk)
+        employee.department = hr
+        employee.save()
+        Attendance.objects.get(pk=old.pk).delete()
+
+        self.assertEqual(self.buckets(), {(today, hr.id, 'late'): 1, (today, it.id, 'present'): 1})
+        self.assertFalse(DailyAttendanceSummary.objects.filter(count__lt=0).exists())
+        # Moved by deltas, not rebuilt: other employees' buckets are left in place
+        self.assertTrue(DailyAttendanceSummary.objects.filter(pk=untouched).exists())
+
+    def test_department_delete_keeps_rows_counted(self):
+        today = timezone.now().date()
+        it = Department.objects.create(name='IT')
+        employees = [
+            Employee.objects.create(
+                user=CustomUser.objects.create_user(username=f'user{i}'), employee_id=f'EMP{i:04d}',
+                department=it if i else None,
+            )
+            for i in range(2)
+        ]
+        records = [Attendance.objects.create(employee=e, status='present') for e in employees]
+
+        it.delete()
+        self.assertEqual(self.buckets(), {(today, None, 'present'): 2})
+
+        Attendance.objects.get(pk=records[1].pk).delete()
+        self.assertEqual(self.buckets(), {(today, None, 'present'): 1})
+
+
+class KeysetPaginationTests(TestCase):
+    def test_pages_walk_forward_and_back(self):
+        today = timezone.now().date()
+        for i in range(7):
+            employee = Employee.objects.create(
+                user=CustomUser.objects.create_user(username=f'user{i}'), employee_id=f'EMP{i:04d}',
+            )
+            for day in (2, 1, 0):
+                record = Attendance.objects.create(employee=employee)
+                record.date = today - timedelta(days=day)
+                record.save()
+
+        expected = list(Attendance.objects.order_by('-date', '-time_in', '-pk'))
+        pages = []
+        page = keyset_paginate(Attendance.objects.all(), per_page=5)
+        pages.append(page)
+        while page.has_next:
+            page = keyset_paginate(Attendance.objects.all(), after=page.next_cursor, per_page=5)
+            pages.append(page)
+
+        self.assertEqual([r for p in pages for r in p], expected)
+        self.assertEqual([len(p) for p in pages], [5, 5, 5, 5, 1])
+
+        back = keyset_paginate(Attendance.objects.all(), before=pages[2].previous_cursor, per_page=5)
+        self.assertEqual(list(back), list(pages[1]))
+        self.assertTrue(back.has_previous)
+
+        with self.assertNumQueries(1):
+            keyset_paginate(Attendance.objects.all(), after=pages[3].next_cursor, per_page=5)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(username='staff', first_name='Sam', last_name='Lee', is_staff=True)
+        employee = Employee.objects.create(user=user, employee_id='EMP0001')
+        Attendance.objects.create(employee=employee, status='late')
+        self.client.force_login(user)
+
+    def test_csv_export_streams_filtered_rows(self):
+        response = self.client.get('/attendance/records/export/', {'format': 'csv', 'status': 'late'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['Date', 'Employee ID', 'First Name'])
+        self.assertEqual(len(lines), 2)
+        self.assertIn('EMP0001,Sam,Lee', lines[1])
+
+        response = self.client.get('/attendance/records/export/', {'format': 'csv', 'status': 'absent'})
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 1)
+
+    def test_xlsx_export(self):
+        from openpyxl import load_workbook
+
+        response = self.client.get('/attendance/records/export/', {'format': 'xlsx'})
+        workbook = load_workbook(BytesIO(b''.join(response.streaming_content)))
+        rows = list(workbook.active.values)
+        self.assertEqual(rows[1][1:4], ('EMP0001', 'Sam', 'Lee'))
+
+    def test_malformed_dates_redirect_with_an_error(self):
+        for url in ('/attendance/records/export/', '/attendance/records/'):
+            response = self.client.get(url, {'format': 'csv', 'start_date': '2024-13-45'})
+            self.assertRedirects(response, reverse('attendance_records'), fetch_redirect_response=False)
+        response = self.client.get(reverse('attendance_records'))
+        self.assertIn('valid date range', str(list(response.context['messages'])[0]))
+
+
+class ReportTests(TestCase):
+    def setUp(self):
+        self.it = Department.objects.create(name='IT')
+        hr = Department.objects.create(name='HR')
+        self.employees = [
+            Employee.objects.create(
+                user=CustomUser.objects.create_user(username=f'user{i}', first_name='User', last_name=str(i)),
+                employee_id=f'EMP{i:04d}', department=department,
+            )
+            for i, department in enumerate([self.it, hr])
+        ]
+        self.day = timezone.now().date().replace(day=1)
+        for employee, offset, status in [
+            (self.employees[0], 0, 'present'), (self.employees[0], 1, 'present'),
+            (self.employees[0], 2, 'late'), (self.employees[1], 0, 'absent'),
+        ]:
+            Attendance.objects.create(employee=employee, date=self.day + timedelta(days=offset), status=status)
+
+    def render(self, report_type, file_format, department=None):
+        job = ReportJob.objects.create(
+            report_type=report_type, file_format=file_format,
+            year=self.day.year, month=self.day.month, department=department,
+        )
+        filename, output = render_report(job)
+        with output:
+            return filename, output.read()
+
+    def xlsx_rows(self, content):
+        from openpyxl import load_workbook
+
+        sheet = load_workbook(BytesIO(content), read_only=True).active
+        return [list(row) for row in sheet.iter_rows(values_only=True)]
+
+    def status_column(self, header, status):
+        labels = dict(Attendance.ATTENDANCE_STATUS)
+        return header.index(labels[status])
+
+    def test_department_report_xlsx(self):
+        filename, content = self.render('department', 'xlsx')
+        self.assertTrue(filename.endswith('.xlsx'))
+        title, header, *rows = self.xlsx_rows(content)
+        self.assertIn('All Departments', title[0])
+        by_name = {row[0]: row for row in rows}
+        self.assertEqual(set(by_name), {'IT', 'HR'})
+        self.assertEqual(by_name['IT'][self.status_column(header, 'present')], 2)
+        self.assertEqual(by_name['IT'][self.status_column(header, 'late')], 1)
+        self.assertEqual(by_name['IT'][-1], 3)
+        self.assertEqual(by_name['HR'][self.status_column(header, 'absent')], 1)
+        self.assertEqual(by_name['HR'][-1], 1)
+
+    def test_employee_report_xlsx_for_one_department(self):
+        _, content = self.render('employee', 'xlsx', department=self.it)
+        title, header, *rows = self.xlsx_rows(content)
+        self.assertIn('IT', title[0])
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][:3], ['EMP0000', 'User 0', 'IT'])
+        self.assertEqual(rows[0][self.status_column(header, 'present')], 2)
+        self.assertEqual(rows[0][-1], 3)
+
+    def test_pdf_contains_rows_and_totals(self):
+        from reportlab import rl_config
+
+        # Uncompressed content streams keep the cell text searchable
+        with mock.patch.object(rl_config, 'pageCompression', 0):
+            filename, content = self.render('employee', 'pdf')
+        self.assertTrue(filename.endswith('.pdf'))
+        self.assertTrue(content.startswith(b'%PDF'))
+        for text in (b'(EMP0000)', b'(EMP0001)', b'(User 0)', b'(IT)', b'(HR)', b'(3)'):
+            self.assertIn(text, content)
+
+    def test_records_csv_export(self):
+        self.client.force_login(CustomUser.objects.create_user(username='staff', is_staff=True))
+        response = self.client.get(reverse('export_records'), {'format': 'csv'})
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:3], ['Date', 'Employee ID', 'First Name'])
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(sorted(row[6] for row in rows[1:]), ['absent', 'late', 'present', 'present'])
+
+    def test_rejects_unknown_department(self):
+        self.client.force_login(CustomUser.objects.create_user(username='staff', is_staff=True))
+        for department in ('abc', '999'):
+            response = self.client.post(reverse('reports'), {
+                'month': self.day.strftime('%Y-%m'), 'report_type': 'department',
+                'file_format': 'pdf', 'department': department,
+            }, follow=True)
+            self.assertIn('valid department', str(list(response.context['messages'])[0]))
+        self.assertFalse(ReportJob.objects.exists())
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.user = CustomUser.objects.create_user(username='staff', is_staff=True)
+        employee = Employee.objects.create(user=self.user, employee_id='EMP0001')
+        for day in (70, 40, 0):
+            record = Attendance.objects.create(employee=employee, status='late' if day else 'present')
+            record.date = self.today - timedelta(days=day)
+            record.save()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def summary(self):
+        return set(DailyAttendanceSummary.objects.filter(count__gt=0).values_list('date', 'status', 'count'))
+
+    def test_archive_moves_rows_and_keeps_them_readable(self):
+        summary_before = self.summary()
+        expected = list(Attendance.objects.order_by('-date', '-time_in', '-pk').values_list('pk', flat=True))
+
+        moved = archive_before(self.today - timedelta(days=10), batch_size=1)
+
+        self.assertEqual(moved, 2)
+        self.assertEqual(Attendance.objects.count(), 1)
+        self.assertEqual(ArchivedAttendance.objects.count(), 2)
+        self.assertEqual(self.summary(), summary_before)
+        rebuild_summary()
+        self.assertEqual(self.summary(), summary_before)
+
+        response = self.client.get('/attendance/records/')
+        self.assertEqual([r.pk for r in response.context['records']], expected)
+
+        recent = self.client.get('/attendance/records/', {'start_date': self.today.isoformat()})
+        self.assertEqual([r.pk for r in recent.context['records']], expected[:1])
+
+        response = self.client.get('/attendance/records/export/', {'format': 'csv', 'status': 'late'})
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 3)
+
+    def test_archive_written_by_another_process_is_seen(self):
+        self.assertEqual(len(self.client.get('/attendance/records/').context['records']), 3)
+
+        # What archive_attendance does in its own process, out of reach of this one's cache
+        old = Attendance.objects.filter(date__lt=self.today - timedelta(days=10))
+        with summary.suspended():
+            ArchivedAttendance.objects.bulk_create([
+                ArchivedAttendance(**row) for row in old.values('id', 'employee_id', 'date', 'time_in', 'time_out', 'status')
+            ])
+            old.delete()
+
+        self.assertEqual(len(self.client.get('/attendance/records/').context['records']), 3)
+
+    def test_pages_merge_live_and_archived_rows(self):
+        archive_before(self.today - timedelta(days=10))
+        querysets = [Attendance.objects.all(), ArchivedAttendance.objects.all()]
+
+        first = keyset_paginate(querysets, per_page=2)
+        second = keyset_paginate(querysets, after=first.next_cursor, per_page=2)
+        self.assertEqual([r.date for r in first] + [r.date for r in second], [
+            self.today, self.today - timedelta(days=40), self.today - timedelta(days=70),
+        ])
+        self.assertFalse(second.has_next)
+
+
+class BulkManualAttendanceTests(TestCase):
+    def test_bulk_marks_missing_pairs_only(self):
+        today = timezone.now().date()
+        department = Department.objects.create(name='IT')
+        staff = CustomUser.objects.create_user(username='staff', is_staff=True)
+        employees = [
+            Employee.objects.create(
+                user=CustomUser.objects.create_user(username=f'user{i}'),
+                employee_id=f'EMP{i:04d}',
+                department=department,
+            )
+            for i in range(3)
+        ]
+        Attendance.objects.create(employee=employees[0], date=today - timedelta(days=1), status='present')
+        self.client.force_login(staff)
+
+        response = self.client.post('/attendance/manual/', {
+            'mode': 'bulk',
+            'department': department.id,
+            'start_date': (today - timedelta(days=2)).isoformat(),
+            'end_date': today.isoformat(),
+            'status': 'absent',
+        }, follow=True)
+
+        self.assertIn('8 records created, 1 skipped', str(list(response.context['messages'])[0]))
+        self.assertEqual(Attendance.objects.filter(status='absent').count(), 8)
+        self.assertEqual(
+            DailyAttendanceSummary.objects.get(date=today, department=department, status='absent').count, 3
+        )
+
+    def test_rejects_invalid_department_and_unknown_employees(self):
+        today = timezone.now().date()
+        Employee.objects.create(user=CustomUser.objects.create_user(username='user'), employee_id='EMP0001')
+        self.client.force_login(CustomUser.objects.create_user(username='staff', is_staff=True))
+        form = {'mode': 'bulk', 'start_date': today.isoformat(), 'end_date': today.isoformat(), 'status': 'absent'}
+
+        for department in ('abc', '999'):
+            response = self.client.post('/attendance/manual/', dict(form, department=department), follow=True)
+            self.assertIn('valid department', str(list(response.context['messages'])[0]))
+        response = self.client.post(
+            '/attendance/manual/', dict(form, employee_ids=['EMP0001', 'EMP0404']), follow=True,
+        )
+        self.assertIn('EMP0404', str(list(response.context['messages'])[0]))
+        self.assertFalse(Attendance.objects.exists())
+
+
+class PunchTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name='IT')
+        self.employee = Employee.objects.create(
+            user=CustomUser.objects.create_user(username='user'), employee_id='EMP0001', department=self.department,
+        )
+
+    def assert_punches(self, punch_function):
+        today = timezone.localdate()
+        actions = []
+        for _ in range(3):
+            with transaction.atomic():
+                actions.append(punch_function(self.employee, today, timezone.localtime().time(), 'present'))
+
+        self.assertEqual([r.action for r in actions], ['check_in', 'check_out', 'complete'])
+        record = Attendance.objects.get(employee=self.employee, date=today)
+        self.assertEqual(record.time_out, actions[1].time_out)
+        self.assertEqual(actions[2].time_out, actions[1].time_out)
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(datetime.combine(timezone.localdate(), time(hour, minute)))
+
+    def test_upsert_checks_in_then_out(self):
+        # Savepoint, upsert, summary bucket update + create (first of the day), release
+        with self.assertNumQueries(7):
+            first = punch(self.employee, self.at(8, 55))
+        self.assertEqual(first.action, 'check_in')
+        self.assertEqual(
+            DailyAttendanceSummary.objects.get(date=first.date, department=self.department, status='present').count, 1
+        )
+        # Savepoint, upsert, release
+        with self.assertNumQueries(3):
+            self.assertEqual(punch(self.employee, self.at(17)).action, 'check_out')
+
+    @override_settings(LATE_ARRIVAL_TIME='09:15', HALF_DAY_HOURS=4)
+    def test_punches_are_classified(self):
+        self.assertEqual(punch(self.employee, self.at(10)).status, 'late')
+        self.assertEqual(punch(self.employee, self.at(12)).status, 'half_day')
+        self.assertEqual(Attendance.objects.get().status, 'half_day')
+        self.assertEqual(
+            set(DailyAttendanceSummary.objects.filter(count__gt=0).values_list('status', 'count')),
+            {('half_day', 1)},
+        )
+
+    @override_settings(LATE_ARRIVAL_TIME='09:15', HALF_DAY_HOURS=4)
+    def test_punch_leaves_manual_entries_alone(self):
+        from .punch import _punch_orm, _punch_upsert
+
+        today = timezone.localdate()
+        record = Attendance.objects.create(
+            employee=self.employee, date=today, time_in=time(8), status='present', manual=True,
+        )
+        self.assertEqual(punch(self.employee, self.at(8, 30)).action, 'complete')
+        with transaction.atomic():
+            self.assertEqual(_punch_orm(self.employee, today, time(8, 30), 'present').action, 'complete')
+            self.assertEqual(_punch_upsert(self.employee, today, time(8, 30), 'present').action, 'complete')
+
+        record.refresh_from_db()
+        self.assertEqual((record.status, record.time_out), ('present', None))
+        self.assertEqual(
+            set(DailyAttendanceSummary.objects.filter(count__gt=0).values_list('status', 'count')),
+            {('present', 1)},
+        )
+
+    def test_upsert_and_orm_paths_agree(self):
+        from .punch import _punch_orm, _punch_upsert
+
+        self.assert_punches(_punch_upsert)
+        Attendance.objects.all().delete()
+        self.assert_punches(_punch_orm)
+
+
+class CloseDayTests(TestCase):
+    def test_close_day_records_absence_and_leave(self):
+        day = timezone.localdate() - timedelta(days=3)
+        employees = [
+            Employee.objects.create(user=CustomUser.objects.create_user(username=f'user{i}'), employee_id=f'EMP{i:04d}')
+            for i in range(4)
+        ]
+        Employee.objects.update(date_joined=timezone.now() - timedelta(days=30))
+        Employee.objects.filter(pk=employees[3].pk).update(is_active=False)
+        Attendance.objects.create(employee=employees[0], date=day, status='present')
+        LeaveRequest.objects.create(
+            employee=employees[1], start_date=day, end_date=day, reason='Trip', status='approved',
+        )
+
+        call_command('close_day', '--date', day.isoformat(), '--include-weekends', stdout=StringIO())
+        call_command('close_day', '--date', day.isoformat(), '--include-weekends', stdout=StringIO())
+
+        self.assertEqual(
+            dict(Attendance.objects.filter(date=day).values_list('employee__employee_id', 'status')),
+            {'EMP0000': 'present', 'EMP0001': 'on_leave', 'EMP0002': 'absent'},
+        )
+        self.assertEqual(
+            DailyAttendanceSummary.objects.get(date=day, department=None, status='absent').count, 1
+        )
+
+    def test_close_day_counts_inserted_rows_only(self):
+        from .absence import close_day
+
+        day = timezone.localdate() - timedelta(days=3)
+        employees = [
+            Employee.objects.create(user=CustomUser.objects.create_user(username=f'user{i}'), employee_id=f'EMP{i:04d}')
+            for i in range(2)
+        ]
+        Attendance.objects.create(employee=employees[0], date=day, status='present')
+        # A punch lands between the anti-join and the insert
+        with mock.patch('attendance.absence.missing_employees', return_value=[(e.pk, False) for e in employees]):
+            self.assertEqual(close_day(day), (1, 0))
+
+
+class RecomputeStatusTests(TestCase):
+    @override_settings(LATE_ARRIVAL_TIME='09:15', HALF_DAY_HOURS=4)
+    def test_recompute_classifies_attended_rows(self):
+        today = timezone.localdate()
+        expected = {}
+        for i, (time_in, time_out, status, result) in enumerate([
+            (time(8, 50), time(17), 'present', 'present'),
+            (time(9, 40), time(18), 'present', 'late'),
+            (time(9), time(11), 'late', 'half_day'),
+            (time(9, 30), None, 'present', 'late'),
+            (time(0), None, 'absent', 'absent'),
+        ]):
+            employee = Employee.objects.create(
+                user=CustomUser.objects.create_user(username=f'user{i}'), employee_id=f'EMP{i:04d}',
+            )
+            Attendance.objects.create(employee=employee, date=today, time_in=time_in, time_out=time_out, status=status)
+            expected[employee.employee_id] = result
+
+        out = StringIO()
+        call_command('recompute_status', '--start', today.isoformat(), stdout=out)
+
+        self.assertIn('3 records changed', out.getvalue())
+        self.assertEqual(dict(Attendance.objects.values_list('employee__employee_id', 'status')), expected)
+        self.assertEqual(DailyAttendanceSummary.objects.get(date=today, status='late').count, 2)
+
+    @override_settings(LATE_ARRIVAL_TIME='09:15')
+    def test_manual_entries_keep_their_status(self):
+        today = timezone.localdate()
+        staff = CustomUser.objects.create_user(username='staff', is_staff=True)
+        manual = Employee.objects.create(user=CustomUser.objects.create_user(username='manual'), employee_id='EMP0001')
+        punched = Employee.objects.create(user=CustomUser.objects.create_user(username='punched'), employee_id='EMP0002')
+        self.client.force_login(staff)
+        self.client.post(reverse('manual_attendance'), {
+            'employee_id': 'EMP0001', 'date': today.isoformat(), 'status': 'present',
+        })
+        Attendance.objects.create(employee=punched, date=today, time_in=time(14, 30), status='present')
+        # Entered in the afternoon: time_in is the submission time
+        Attendance.objects.filter(employee=manual).update(time_in=time(14, 30))
+
+        call_command('recompute_status', '--start', today.isoformat(), stdout=StringIO())
+
+        self.assertEqual(Attendance.objects.get(employee=manual).status, 'present')
+        self.assertEqual(Attendance.objects.get(employee=punched).status, 'late')
+
+
+@override_settings(WORKDAY_HOURS=8)
+class TimesheetTests(TestCase):
+    def test_hours_late_days_and_overtime_per_period(self):
+        today = timezone.localdate()
+        staff = CustomUser.objects.create_user(username='staff', first_name='Sam', is_staff=True)
+        employee = Employee.objects.create(user=staff, employee_id='EMP0001')
+        Attendance.objects.create(employee=employee, date=today, time_in=time(9), time_out=time(19), status='present')
+        Attendance.objects.create(
+            employee=employee, date=today - timedelta(days=1), time_in=time(10), time_out=time(12), status='late',
+        )
+        Attendance.objects.create(employee=employee, date=today - timedelta(days=2), time_in=time(0), status='absent')
+
+        rows = timesheet(today - timedelta(days=2), today, 'month')
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(
+            {key: rows[0][key] for key in ('days', 'late', 'hours', 'overtime')},
+            {'days': 2, 'late': 1, 'hours': 12.0, 'overtime': 2.0},
+        )
+        self.assertEqual([r['hours'] for r in timesheet(today - timedelta(days=2), today, 'day')], [0.0, 2.0, 10.0])
+
+        self.client.force_login(staff)
+        response = self.client.get('/attendance/api/timesheets/', {'month': today.strftime('%Y-%m'), 'period': 'day'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(today.isoformat(), [row['period'] for row in response.json()['results']])
+        self.assertEqual(self.client.get('/attendance/api/timesheets/', {'period': 'year'}).status_code, 400)
+
+
+class EmployeeStatsTests(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_stats_are_cached_and_invalidated(self):
+        today = timezone.now().date()
+        employee = Employee.objects.create(user=CustomUser.objects.create_user(username='user'), employee_id='EMP0001')
+        Attendance.objects.create(employee=employee, status='present')
+        LeaveRequest.objects.create(employee=employee, start_date=today, end_date=today, reason='Trip')
+
+        with self.assertNumQueries(1):
+            stats = get_employee_stats(employee)
+        self.assertEqual(stats, {
+            'monthly_attendance': 1, 'total_attendance': 1, 'pending_leaves': 1, 'approved_leaves': 0,
+        })
+        with self.assertNumQueries(0):
+            get_employee_stats(employee)
+
+        leave = LeaveRequest.objects.get()
+        leave.status = 'approved'
+        leave.save()
+        self.assertEqual(get_employee_stats(employee)['approved_leaves'], 1)
+
+        bulk_mark(Employee.objects.all(), today - timedelta(days=3), today - timedelta(days=1), 'present')
+        self.assertEqual(get_employee_stats_bulk([employee.pk])[employee.pk]['total_attendance'], 4)
+
+    def test_short_lived_without_a_shared_cache(self):
+        employee = Employee.objects.create(user=CustomUser.objects.create_user(username='user'), employee_id='EMP0001')
+        with mock.patch.object(cache, 'set_many', wraps=cache.set_many) as set_many:
+            with override_settings(USE_REDIS=False, LOCAL_CACHE_TIMEOUT=5):
+                get_employee_stats(employee)
+            cache.clear()
+            with override_settings(USE_REDIS=True):
+                get_employee_stats(employee)
+        self.assertEqual(
+            [call.args[-1] for call in set_many.call_args_list], [5, stats_module.EMPLOYEE_STATS_TIMEOUT],
+        )
+
+    def test_employee_list_computes_stats_for_one_page(self):
+        staff = CustomUser.objects.create_user(username='staff', is_staff=True)
+        employees = [
+            Employee.objects.create(user=CustomUser.objects.create_user(username=f'user{i}'), employee_id=f'EMP{i:04d}')
+            for i in range(3)
+        ]
+        self.client.force_login(staff)
+
+        with mock.patch('users.auth_views.EMPLOYEES_PER_PAGE', 2), \
+                mock.patch.object(stats_module, 'get_employee_stats_bulk', wraps=get_employee_stats_bulk) as bulk:
+            response = self.client.get(reverse('users:employee_list'), {'page': 2})
+
+        self.assertEqual(response.context['employees'].paginator.count, 3)
+        bulk.assert_called_once_with([employees[2].pk])
+        self.assertContains(response, 'page=1')
+
+
+class LoadTestTests(TransactionTestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username='admin', is_staff=True)
+        # Enrolled from the frames the load test sends (--seed 42, three images)
+        self.images = load_images(count=3, rng=np.random.default_rng(42))
+        for number, (name, payload) in enumerate(self.images):
+            encoding, _ = FaceRecognition.encode_face_from_image(SimpleUploadedFile(name, payload))
+            Employee.objects.create(
+                user=CustomUser.objects.create_user(username=f'user{number}'),
+                employee_id=f'EMP000{number}',
+                face_encoding=json.dumps(encoding),
+            )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_arrival_patterns(self):
+        rng = np.random.default_rng(1)
+        steady = arrival_times('steady', 10, 2, rng)
+        self.assertEqual(len(steady), 20)
+        self.assertAlmostEqual(steady[1] - steady[0], 0.1)
+        for pattern in PATTERNS:
+            offsets = arrival_times(pattern, 50, 4, rng)
+            self.assertTrue((np.diff(offsets) >= 0).all())
+            self.assertTrue(((offsets >= 0) & (offsets <= 4)).all())
+        # The spike crowds most arrivals around the middle of the run
+        spike = arrival_times('spike', 50, 4, rng)
+        self.assertGreater(((spike > 1) & (spike < 3)).mean(), 0.7)
+
+    def post_frame(self, name, payload):
+        return self.client.post(
+            reverse('mark_attendance'), {'face_image': SimpleUploadedFile(name, payload, 'image/jpeg')},
+        )
+
+    def test_uploaded_frame_checks_in(self):
+        self.client.force_login(self.admin)
+        name, payload = self.images[1]
+        # Renamed: the encoding only depends on the image
+        self.assertEqual(self.post_frame('upload.jpg', payload).status_code, 302)
+        self.assertEqual(
+            list(Attendance.objects.filter(date=timezone.localdate()).values_list('employee__employee_id', flat=True)),
+            ['EMP0001'],
+        )
+
+    def test_unknown_frame_is_not_recognized(self):
+        self.client.force_login(self.admin)
+        name, payload = load_images(count=1, rng=np.random.default_rng(7))[0]
+        response = self.post_frame(name, payload)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_uploaded_frames_need_a_staff_account(self):
+        self.client.force_login(CustomUser.objects.get(username='user0'))
+        self.post_frame(*self.images[0])
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_command_writes_report(self):
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command(
+                'loadtest', '--pattern', 'steady', '--rate', '20', '--duration', '0.5', '--concurrency', '2',
+                '--image-count', '3', '--output', output.name, stdout=StringIO(), stderr=StringIO(),
+            )
+            report = json.load(output)
+
+        self.assertEqual(report['requests'], 10)
+        self.assertEqual(report['succeeded'] + report['errors'], report['requests'])
+        self.assertEqual(set(report['latency_ms']), {'mean', 'p50', 'p95', 'p99', 'max'})
+        self.assertIn('lock_errors', report['db'])
+        self.assertTrue(Attendance.objects.exists())
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+from django.utils import timezone
+
+from core.routers import reads_from_replica
+
+from .dates import month_range
+from .timesheet import PERIODS, TIMESHEET_FIELDS, timesheet
+from users.models import Department
+
+
+def timesheet_params(params):
+    """
+    (start, end, period, department_id) from the query string; the month
+    defaults to the current one. Raises ValueError for bad input.
+    """
+    month = params.get('month') or timezone.now().strftime('%Y-%m')
+    year, month = (int(part) for part in month.split('-'))
+    if not 1 <= month <= 12:
+        raise ValueError('month')
+    start, next_month = month_range(year, month)
+
+    period = params.get('period', 'month')
+    if period not in PERIODS:
+        raise ValueError('period')
+
+    department_id = params.get('department') or None
+    if department_id is not None:
+        department_id = int(department_id)
+
+    return start, next_month - timedelta(days=1), period, department_id
+
+
+@login_required
+@reads_from_replica
+def timesheets(request):
+    """Worked hours, late days and overtime per employee for a month"""
+    if not request.user.is_staff:
+        messages.error(request, "Access denied!")
+        return redirect('dashboard')
+
+    try:
+        start, end, period, department_id = timesheet_params(request.GET)
+    except ValueError:
+        messages.error(request, "❌ Please choose a valid month and period.")
+        return redirect('timesheets')
+
+    return render(request, 'attendance/timesheets.html', {
+        'rows': timesheet(start, end, period, department_id),
+        'month': start.strftime('%Y-%m'),
+        'period': period,
+        'periods': PERIODS,
+        'department_id': department_id,
+        'departments': Department.objects.order_by('name'),
+        'query': request.GET.urlencode(),
+    })
+
+
+@login_required
+@reads_from_replica
+def timesheet_api(request):
+    """Timesheet rows as JSON (same parameters as the timesheets page)"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+
+    try:
+        start, end, period, department_id = timesheet_params(request.GET)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid month, period or department'}, status=400)
+
+    rows = timesheet(start, end, period, department_id)
+    for row in rows:
+        row['period'] = row['period'].isoformat()
+
+    return JsonResponse({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'period': period,
+        'fields': TIMESHEET_FIELDS,
+        'results': rows,
+    })
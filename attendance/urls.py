@@ -1,11 +1,15 @@
 from django.urls import path
 from . import views
 from . import leave_views
+from . import export_views
+from . import report_views
+from . import timesheet_views
 
 urlpatterns = [
     # Attendance URLs
     path('mark/', views.mark_attendance, name='mark_attendance'),
     path('records/', views.attendance_records, name='attendance_records'),
+    path('records/export/', export_views.export_records, name='export_records'),
     path('dashboard/', views.attendance_dashboard, name='attendance_dashboard'),
     path('manual/', views.manual_attendance, name='manual_attendance'),
     path('register-face/', views.register_face, name='register_face'),
@@ -13,6 +17,15 @@ urlpatterns = [
     path('manage-faces/', views.manage_faces, name='manage_faces'),
     path('delete-face/<str:employee_id>/', views.delete_face, name='delete_face'),
 
+    # Report URLs
+    path('reports/', report_views.reports, name='reports'),
+    path('reports/<int:job_id>/status/', report_views.report_status, name='report_status'),
+    path('reports/<int:job_id>/download/', report_views.download_report, name='download_report'),
+
+    # Timesheet URLs
+    path('timesheets/', timesheet_views.timesheets, name='timesheets'),
+    path('api/timesheets/', timesheet_views.timesheet_api, name='timesheet_api'),
+
     # Leave management URLs
     path('leave/submit/', leave_views.submit_leave, name='submit_leave'),
     path('leave/my-leaves/', leave_views.my_leaves, name='my_leaves'),
@@ -1,16 +1,23 @@
 # attendance/utils.py
+import hashlib
+import logging
 import os
 import json
 import numpy as np
+from django.conf import settings
+
+from core.tracing import span
+
+logger = logging.getLogger(__name__)
 
 try:
     import cv2
 
     OPENCV_AVAILABLE = True
-    print("✅ OpenCV loaded successfully")
+    logger.info("OpenCV loaded")
 except ImportError as e:
     OPENCV_AVAILABLE = False
-    print(f"❌ OpenCV not available: {e}")
+    logger.warning("OpenCV not available, face recognition runs in simulation mode", extra={'error': str(e)})
 
 
 class FaceRecognition:
@@ -34,6 +41,73 @@ class FaceRecognition:
         except Exception as e:
             return None, f"❌ Face recognition failed: {str(e)}"
 
+    @staticmethod
+    def _image_size(image_file):
+        """(width, height) read from the image header, or None"""
+        from PIL import Image
+
+        try:
+            image_file.seek(0)
+            with Image.open(image_file) as image:
+                return image.size
+        except Exception:
+            return None
+        finally:
+            image_file.seek(0)
+
+    @staticmethod
+    def _record_size(stage, size):
+        if size:
+            stage.set('image.width', size[0])
+            stage.set('image.height', size[1])
+            stage.set('image.pixels', size[0] * size[1])
+
+    @staticmethod
+    def _unit(vectors):
+        """Encodings scaled to unit length, so distances don't depend on pixel scale"""
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    @staticmethod
+    def recognize_face_from_image(image_file, known_encodings):
+        """
+        Recognize the face in an uploaded image (kiosk clients, load tests)
+        as the nearest registered encoding of the same length, if it is
+        within FACE_MATCH_THRESHOLD
+        """
+        try:
+            if not known_encodings:
+                return None, "❌ No registered faces found"
+
+            result = FaceRecognition.encode_face_from_image(image_file)
+            if result is None or result[0] is None:
+                return None, result[1] if result else "❌ Face encoding failed"
+            encoding, message = result
+
+            with span('match') as stage:
+                candidates = [(employee_id, known) for employee_id, known in known_encodings.items()
+                              if len(known) == len(encoding)]
+                if not candidates:
+                    return None, "❌ No registered faces match this encoding format"
+
+                distances = np.linalg.norm(
+                    FaceRecognition._unit(np.array([known for _, known in candidates], dtype=np.float32))
+                    - FaceRecognition._unit(np.array(encoding, dtype=np.float32)),
+                    axis=1,
+                )
+                best = int(np.argmin(distances))
+                stage.set('match.candidates', len(candidates))
+                stage.set('match.distance', float(distances[best]))
+
+            # The nearest face is not necessarily a registered person
+            if distances[best] > getattr(settings, 'FACE_MATCH_THRESHOLD', 0.35):
+                return None, f"❌ Face not recognized (closest distance {distances[best]:.3f})"
+            mode = "" if OPENCV_AVAILABLE else " (Simulation Mode)"
+            return candidates[best][0], f"✅ Face recognized successfully{mode}, distance {distances[best]:.3f}"
+
+        except Exception as e:
+            return None, f"❌ Face recognition failed: {str(e)}"
+
     @staticmethod
     def encode_face_from_image(image_file):
         """
@@ -43,7 +117,7 @@ class FaceRecognition:
             if not image_file:
                 return None, "❌ No image provided"
 
-            print(f"DEBUG: Processing image: {image_file.name}")
+            logger.debug("Encoding face image", extra={'image_name': image_file.name})
 
             if OPENCV_AVAILABLE:
                 # Try OpenCV method
@@ -51,13 +125,16 @@ class FaceRecognition:
                 if result is not None:
                     return result
                 else:
-                    print("DEBUG: OpenCV method failed, falling back to simulation")
+                    logger.debug("OpenCV encoding failed, falling back to simulation",
+                                 extra={'image_name': image_file.name})
 
             # Fallback to simulation
+            with span('decode', simulation=True) as stage:
+                FaceRecognition._record_size(stage, FaceRecognition._image_size(image_file))
             return FaceRecognition._encode_simulation(image_file)
 
         except Exception as e:
-            print(f"DEBUG: Error in encode_face_from_image: {str(e)}")
+            logger.exception("Face encoding failed", extra={'image_name': getattr(image_file, 'name', None)})
             return None, f"❌ Face encoding failed: {str(e)}"
 
     @staticmethod
@@ -66,38 +143,43 @@ class FaceRecognition:
         Try to encode face using OpenCV
         """
         try:
-            # Save the uploaded file temporarily
-            temp_path = f"/tmp/{image_file.name}"
-            with open(temp_path, 'wb+') as destination:
-                for chunk in image_file.chunks():
-                    destination.write(chunk)
-
-            # Load image using OpenCV
-            image = cv2.imread(temp_path)
+            with span('decode') as stage:
+                # Save the uploaded file temporarily
+                temp_path = f"/tmp/{image_file.name}"
+                with open(temp_path, 'wb+') as destination:
+                    for chunk in image_file.chunks():
+                        destination.write(chunk)
+
+                # Load image using OpenCV
+                image = cv2.imread(temp_path)
+                if image is not None:
+                    FaceRecognition._record_size(stage, (image.shape[1], image.shape[0]))
 
             if image is None:
                 if os.path.exists(temp_path):
                     os.remove(temp_path)
                 return None, "❌ Could not read image file"
 
-            # Convert to grayscale for face detection
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            with span('detect') as stage:
+                # Convert to grayscale for face detection
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
-            # Load OpenCV face detector
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+                # Load OpenCV face detector
+                face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
 
-            if face_cascade.empty():
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-                return None, "❌ Could not load face detection model"
+                if face_cascade.empty():
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    return None, "❌ Could not load face detection model"
 
-            # Detect faces
-            faces = face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30)
-            )
+                # Detect faces
+                faces = face_cascade.detectMultiScale(
+                    gray,
+                    scaleFactor=1.1,
+                    minNeighbors=5,
+                    minSize=(30, 30)
+                )
+                stage.set('faces.count', len(faces))
 
             # Clean up temp file
             if os.path.exists(temp_path):
@@ -110,26 +192,31 @@ class FaceRecognition:
                 return None, f"❌ Multiple faces detected ({len(faces)} faces found)"
 
             # Create a simple encoding
-            x, y, w, h = faces[0]
-            face_region = gray[y:y + h, x:x + w]
-            face_encoding = cv2.resize(face_region, (100, 100)).flatten().tolist()
+            with span('encode'):
+                x, y, w, h = faces[0]
+                face_region = gray[y:y + h, x:x + w]
+                face_encoding = cv2.resize(face_region, (100, 100)).flatten().tolist()
 
             return face_encoding, "✅ Face encoded successfully with OpenCV"
 
         except Exception as e:
             if 'temp_path' in locals() and os.path.exists(temp_path):
                 os.remove(temp_path)
-            print(f"DEBUG: OpenCV encoding failed: {str(e)}")
+            logger.warning("OpenCV encoding failed", exc_info=True, extra={'image_name': image_file.name})
             return None
 
     @staticmethod
     def _encode_simulation(image_file):
         """
-        Fallback simulation for face encoding
+        Fallback simulation for face encoding, derived from the image bytes
+        so an image gets the same encoding in every process
         """
         try:
-            # Create a simulated encoding
-            simulated_encoding = [float(hash(image_file.name + str(i)) % 1000) / 1000.0 for i in range(128)]
+            with span('encode', simulation=True):
+                image_file.seek(0)
+                digest = hashlib.shake_256(image_file.read()).digest(256)
+                image_file.seek(0)
+                simulated_encoding = (np.frombuffer(digest, dtype='>u2') / 65535.0).tolist()
             return simulated_encoding, "✅ Face encoded successfully (Simulation Mode)"
         except Exception as e:
             return None, f"❌ Simulation encoding failed: {str(e)}"
@@ -161,32 +248,37 @@ class FaceRecognition:
         Verify single face using OpenCV
         """
         try:
-            temp_path = f"/tmp/verify_{image_file.name}"
-            with open(temp_path, 'wb+') as destination:
-                for chunk in image_file.chunks():
-                    destination.write(chunk)
+            with span('decode') as stage:
+                temp_path = f"/tmp/verify_{image_file.name}"
+                with open(temp_path, 'wb+') as destination:
+                    for chunk in image_file.chunks():
+                        destination.write(chunk)
 
-            image = cv2.imread(temp_path)
+                image = cv2.imread(temp_path)
+                if image is not None:
+                    FaceRecognition._record_size(stage, (image.shape[1], image.shape[0]))
 
             if image is None:
                 if os.path.exists(temp_path):
                     os.remove(temp_path)
                 return False, "❌ Could not read image file"
 
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+            with span('detect') as stage:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+                face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
 
-            if face_cascade.empty():
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-                return False, "❌ Could not load face detection model"
+                if face_cascade.empty():
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    return False, "❌ Could not load face detection model"
 
-            faces = face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30)
-            )
+                faces = face_cascade.detectMultiScale(
+                    gray,
+                    scaleFactor=1.1,
+                    minNeighbors=5,
+                    minSize=(30, 30)
+                )
+                stage.set('faces.count', len(faces))
 
             if os.path.exists(temp_path):
                 os.remove(temp_path)
@@ -202,7 +294,7 @@ class FaceRecognition:
         except Exception as e:
             if 'temp_path' in locals() and os.path.exists(temp_path):
                 os.remove(temp_path)
-            print(f"DEBUG: OpenCV verification failed: {str(e)}")
+            logger.warning("OpenCV verification failed", exc_info=True, extra={'image_name': image_file.name})
             return None
 
 
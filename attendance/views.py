@@ -4,9 +4,19 @@ from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from django.db.models import Q, Count
 import json
-
-from .models import Attendance
-from users.models import Employee
+import logging
+from datetime import datetime
+
+from .archive import record_querysets
+from .bulk import MAX_BULK_DAYS, bulk_mark
+from .models import ArchivedAttendance, Attendance
+from .filters import filter_records, record_dates
+from .pagination import InvalidCursor, keyset_paginate
+from .punch import punch
+from .stats import cached_dashboard_stats
+from core.routers import reads_from_replica
+from core.tracing import span
+from users.models import Department, Employee
 
 try:
     from .utils import FaceRecognition
@@ -14,6 +24,13 @@ try:
 except ImportError:
     FACE_RECOGNITION_AVAILABLE = False
 
+logger = logging.getLogger(__name__)
+
+RECORDS_PER_PAGE = 50
+
+# Employees without a face listed beside the registration form
+REGISTER_FACE_LIST_SIZE = 20
+
 
 @login_required
 def mark_attendance(request):
@@ -22,63 +39,67 @@ def mark_attendance(request):
     """
     if request.method == 'POST':
         try:
+            # An uploaded frame can show anyone: only staff (kiosk) accounts may send one
+            if request.FILES.get('face_image') and not request.user.is_staff:
+                messages.error(request, "❌ You don't have permission to check in with an uploaded image.")
+                return redirect('mark_attendance')
+
             # Check if face recognition is available
             if not FACE_RECOGNITION_AVAILABLE:
                 messages.error(request, "❌ Face recognition system is not available!")
                 return redirect('mark_attendance')
 
-            # Get all employees with face encodings
-            employees_with_faces = Employee.objects.filter(
-                face_encoding__isnull=False,
-                is_active=True
-            )
-
-            if not employees_with_faces.exists():
+            with span('gallery.load') as stage:
+                # Get all employees with face encodings
+                employees_with_faces = Employee.objects.filter(
+                    face_encoding__isnull=False,
+                    is_active=True
+                ).select_related('user')
+
+                # Prepare known encodings dictionary
+                known_encodings = {}
+                employees = {}
+                for emp in employees_with_faces:
+                    encoding = emp.get_face_encoding_list()
+                    if encoding:
+                        known_encodings[emp.employee_id] = encoding
+                        employees[emp.employee_id] = emp
+                stage.set('gallery.size', len(known_encodings))
+
+            if not known_encodings:
                 messages.error(request, "❌ No employees with registered faces found! Please register faces first.")
                 return redirect('mark_attendance')
 
-            # Prepare known encodings dictionary
-            known_encodings = {}
-            for emp in employees_with_faces:
-                encoding = emp.get_face_encoding_list()
-                if encoding:
-                    known_encodings[emp.employee_id] = encoding
-
-            print(f"🎯 Starting face recognition with {len(known_encodings)} registered faces...")
+            logger.debug("Starting face recognition", extra={'gallery_size': len(known_encodings)})
 
-            # REAL face recognition
-            employee_id, message = FaceRecognition.recognize_face_from_camera(known_encodings)
+            # REAL face recognition: an uploaded frame (kiosk clients) or the camera
+            face_image = request.FILES.get('face_image')
+            with span('recognize', source='upload' if face_image else 'camera'):
+                if face_image:
+                    employee_id, message = FaceRecognition.recognize_face_from_image(face_image, known_encodings)
+                else:
+                    employee_id, message = FaceRecognition.recognize_face_from_camera(known_encodings)
 
             if employee_id:
-                # Get employee
-                employee = Employee.objects.get(employee_id=employee_id, is_active=True)
-                today = timezone.now().date()
-                current_time = timezone.now()
+                employee = employees.get(employee_id)
+                if employee is None:
+                    raise Employee.DoesNotExist
 
-                # Check if already marked attendance today
-                existing_attendance = Attendance.objects.filter(
-                    employee=employee,
-                    date=today
-                ).first()
-
-                if existing_attendance:
-                    # Update time_out if marking departure
-                    if not existing_attendance.time_out:
-                        existing_attendance.time_out = current_time.time()
-                        existing_attendance.save()
-                        messages.success(request,
-                                         f"✅ Departure recorded for {employee.user.get_full_name()} at {current_time.strftime('%H:%M:%S')}!")
-                    else:
-                        messages.warning(request,
-                                         f"⏰ Attendance already completed for {employee.user.get_full_name()} today!")
+                # Check-in or check-out in one atomic upsert
+                with span('db.punch') as stage:
+                    result = punch(employee)
+                    stage.set('punch.action', result.action)
+                name = employee.user.get_full_name()
+
+                if result.action == 'check_out':
+                    messages.success(request,
+                                     f"✅ Departure recorded for {name} at {result.time.strftime('%H:%M:%S')}!")
+                elif result.action == 'complete':
+                    messages.warning(request,
+                                     f"⏰ Attendance already completed for {name} today!")
                 else:
-                    # Create attendance record for arrival
-                    Attendance.objects.create(
-                        employee=employee,
-                        status='present'
-                    )
                     messages.success(request,
-                                     f"✅ Attendance marked for {employee.user.get_full_name()} at {current_time.strftime('%H:%M:%S')}!")
+                                     f"✅ Attendance marked for {name} at {result.time.strftime('%H:%M:%S')}!")
 
                 messages.info(request, f"🔍 {message}")
                 return redirect('mark_attendance')
@@ -109,30 +130,42 @@ def mark_attendance(request):
 
 
 @login_required
+@reads_from_replica
 def attendance_records(request):
     """
     View to display attendance records with filtering options
     """
-    records = Attendance.objects.select_related('employee__user').all().order_by('-date', '-time_in')
-
-    # Date filtering
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-    employee_id = request.GET.get('employee_id')
-    status_filter = request.GET.get('status')
-
-    if start_date:
-        records = records.filter(date__gte=start_date)
-    if end_date:
-        records = records.filter(date__lte=end_date)
-    if employee_id:
-        records = records.filter(employee__employee_id=employee_id)
-    if status_filter:
-        records = records.filter(status=status_filter)
+    try:
+        record_dates(request.GET)
+    except ValueError:
+        messages.error(request, "❌ Please choose a valid date range.")
+        return redirect('attendance_records')
+
+    records = record_querysets(
+        filter_records(Attendance.objects.select_related('employee__user'), request.GET),
+        filter_records(ArchivedAttendance.objects.select_related('employee__user'), request.GET),
+        request.GET.get('start_date'),
+    )
+
+    try:
+        page = keyset_paginate(
+            records,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            per_page=RECORDS_PER_PAGE,
+        )
+    except InvalidCursor:
+        messages.error(request, "❌ Invalid page link, showing the newest records.")
+        page = keyset_paginate(records, per_page=RECORDS_PER_PAGE)
+
+    # Filters without the cursor, for building the page links
+    filters = request.GET.copy()
+    filters.pop('after', None)
+    filters.pop('before', None)
 
     context = {
-        'records': records,
-        'employees': Employee.objects.filter(is_active=True),
+        'records': page,
+        'filter_query': filters.urlencode(),
         'status_choices': Attendance.ATTENDANCE_STATUS,
     }
 
@@ -140,43 +173,28 @@ def attendance_records(request):
 
 
 @login_required
+@reads_from_replica
 def attendance_dashboard(request):
     """
     Dashboard view with attendance statistics
     """
-    today = timezone.now().date()
-    current_month = timezone.now().month
-    current_year = timezone.now().year
-
-    # Get statistics
-    total_employees = Employee.objects.filter(is_active=True).count()
-    present_today = Attendance.objects.filter(date=today).count()
-    employees_with_faces = Employee.objects.filter(face_encoding__isnull=False, is_active=True).count()
-
-    # Monthly statistics
-    monthly_attendance = Attendance.objects.filter(
-        date__year=current_year,
-        date__month=current_month
-    ).count()
+    stats = cached_dashboard_stats(days=7)
 
     # Get recent attendance
     recent_attendance = Attendance.objects.select_related('employee__user').filter(
-        date=today
+        date=stats.today
     ).order_by('-time_in')[:10]
 
-    # Get attendance by status for today
-    today_status = Attendance.objects.filter(date=today).values('status').annotate(
-        count=Count('status')
-    )
-
     context = {
-        'today': today,
-        'total_employees': total_employees,
-        'present_today': present_today,
-        'employees_with_faces': employees_with_faces,
-        'monthly_attendance': monthly_attendance,
+        'today': stats.today,
+        'total_employees': stats.total_employees,
+        'present_today': stats.attendance_today,
+        'employees_with_faces': stats.employees_with_faces,
+        'monthly_attendance': stats.monthly_attendance,
         'recent_attendance': recent_attendance,
-        'today_status': today_status,
+        'today_status': stats.today_status,
+        'weekly_trend': stats.weekly_trend,
+        'department_stats': stats.department_stats,
         'face_recognition_available': FACE_RECOGNITION_AVAILABLE,
     }
 
@@ -192,6 +210,9 @@ def manual_attendance(request):
         messages.error(request, "❌ You don't have permission to access this page.")
         return redirect('dashboard')
 
+    if request.method == 'POST' and request.POST.get('mode') == 'bulk':
+        return bulk_manual_attendance(request)
+
     if request.method == 'POST':
         employee_id = request.POST.get('employee_id')
         date = request.POST.get('date')
@@ -208,7 +229,8 @@ def manual_attendance(request):
                 Attendance.objects.create(
                     employee=employee,
                     date=date,
-                    status=status
+                    status=status,
+                    manual=True,
                 )
                 messages.success(request, f"✅ Manual attendance marked for {employee.user.get_full_name()}")
                 return redirect('attendance_records')
@@ -219,13 +241,65 @@ def manual_attendance(request):
             messages.error(request, f"❌ Error: {str(e)}")
 
     context = {
-        'employees': Employee.objects.filter(is_active=True),
+        'departments': Department.objects.order_by('name'),
         'status_choices': Attendance.ATTENDANCE_STATUS,
+        'today': timezone.now().date(),
+        'max_bulk_days': MAX_BULK_DAYS,
     }
 
     return render(request, 'attendance/manual_attendance.html', context)
 
 
+def bulk_manual_attendance(request):
+    """
+    Mark one status for a department or a list of employees over a date
+    range, skipping days that already have attendance
+    """
+    department_id = request.POST.get('department', '').strip()
+    employee_ids = [employee_id.strip() for employee_id in request.POST.getlist('employee_ids') if employee_id.strip()]
+    status = request.POST.get('status')
+
+    try:
+        start = datetime.strptime(request.POST.get('start_date', ''), '%Y-%m-%d').date()
+        end = datetime.strptime(request.POST.get('end_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        messages.error(request, "❌ Please choose a valid date range.")
+        return redirect('manual_attendance')
+
+    if start > end or end > timezone.now().date():
+        messages.error(request, "❌ The date range must not be reversed or in the future.")
+        return redirect('manual_attendance')
+    if (end - start).days + 1 > MAX_BULK_DAYS:
+        messages.error(request, f"❌ Bulk entries are limited to {MAX_BULK_DAYS} days at a time.")
+        return redirect('manual_attendance')
+    if status not in dict(Attendance.ATTENDANCE_STATUS):
+        messages.error(request, "❌ Unknown attendance status.")
+        return redirect('manual_attendance')
+
+    employees = Employee.objects.filter(is_active=True)
+    if employee_ids:
+        employees = employees.filter(employee_id__in=employee_ids)
+        unknown = sorted(set(employee_ids) - set(employees.values_list('employee_id', flat=True)))
+        if unknown:
+            messages.error(request, f"❌ No active employee with ID {', '.join(unknown)}; nothing was marked.")
+            return redirect('manual_attendance')
+    elif department_id:
+        if not department_id.isdigit() or not Department.objects.filter(pk=department_id).exists():
+            messages.error(request, "❌ Please choose a valid department.")
+            return redirect('manual_attendance')
+        employees = employees.filter(department_id=department_id)
+    else:
+        messages.error(request, "❌ Please select a department or employees.")
+        return redirect('manual_attendance')
+
+    created, skipped = bulk_mark(employees, start, end, status)
+    messages.success(
+        request,
+        f"✅ Bulk attendance saved: {created} records created, {skipped} skipped (already marked)."
+    )
+    return redirect('attendance_records')
+
+
 @login_required
 def register_face(request):
     """
@@ -240,7 +314,7 @@ def register_face(request):
             employee_id = request.POST.get('employee_id')
             face_image = request.FILES.get('face_image')
 
-            print(f"DEBUG: Starting face registration for employee: {employee_id}")
+            logger.debug("Starting face registration", extra={'employee_id': employee_id})
 
             if not employee_id or not face_image:
                 messages.error(request, "❌ Please select employee and upload image")
@@ -249,7 +323,6 @@ def register_face(request):
             # Get employee
             try:
                 employee = Employee.objects.get(employee_id=employee_id, is_active=True)
-                print(f"DEBUG: Found employee: {employee.user.get_full_name()}")
             except Employee.DoesNotExist:
                 messages.error(request, f"❌ Employee with ID '{employee_id}' not found or inactive!")
                 return redirect('register_face')
@@ -260,18 +333,20 @@ def register_face(request):
                 return redirect('register_face')
 
             # Verify single face
-            print("DEBUG: Verifying single face...")
             is_valid, verify_message = FaceRecognition.verify_single_face(face_image)
-            print(f"DEBUG: Face verification result: {is_valid}, message: {verify_message}")
+            logger.debug("Face verified", extra={'employee_id': employee_id, 'valid': is_valid})
 
             if not is_valid:
                 messages.error(request, verify_message)
                 return redirect('register_face')
 
             # Encode face
-            print("DEBUG: Encoding face...")
             result = FaceRecognition.encode_face_from_image(face_image)
-            print(f"DEBUG: Face encoding result: {result}")
+            # Only the size: the encoding itself can be thousands of numbers
+            logger.debug("Face encoded", extra={
+                'employee_id': employee_id,
+                'encoding_length': len(result[0]) if isinstance(result, tuple) and result[0] else None,
+            })
 
             # Check if result is None or not a tuple
             if result is None:
@@ -298,16 +373,17 @@ def register_face(request):
             messages.error(request, "❌ Employee not found!")
         except Exception as e:
             messages.error(request, f"❌ Error registering face: {str(e)}")
-            print(f"DEBUG: Exception in register_face: {str(e)}")
+            logger.exception("Face registration failed", extra={'employee_id': request.POST.get('employee_id')})
 
-    # Get employees without face encodings
+    # Get employees without face encodings (the form searches the rest)
     employees_without_faces = Employee.objects.filter(
         is_active=True,
         face_encoding__isnull=True
-    )
+    ).select_related('user', 'department').order_by('employee_id')
 
     context = {
-        'employees': employees_without_faces,
+        'employees': employees_without_faces[:REGISTER_FACE_LIST_SIZE],
+        'employees_count': employees_without_faces.count(),
         'face_recognition_available': FACE_RECOGNITION_AVAILABLE,
     }
     return render(request, 'attendance/register_face.html', context)
@@ -334,12 +410,12 @@ def manage_faces(request):
     employees_with_faces = Employee.objects.filter(
         face_encoding__isnull=False,
         is_active=True
-    ).select_related('user')
+    ).select_related('user', 'department')
 
     employees_without_faces = Employee.objects.filter(
         face_encoding__isnull=True,
         is_active=True
-    ).select_related('user')
+    ).select_related('user', 'department')
 
     context = {
         'employees_with_faces': employees_with_faces,
@@ -0,0 +1,16 @@
+"""
+Celery application for background jobs (monthly reports).
+
+Only used when USE_CELERY=True; without it reports run in a local
+thread pool.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_system.settings')
+
+app = Celery('attendance_system')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -5,7 +5,7 @@ Production-ready with environment variables.
 
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # --------------------------------------------------
 # BASE DIRECTORY
@@ -58,6 +58,10 @@ if DEBUG:
 
 
 MIDDLEWARE = [
+    # First, so request timings cover the whole stack
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.TracingMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
 
@@ -122,6 +126,33 @@ else:
         }
     }
 
+# Keep connections open across requests (seconds; 0 closes after each request)
+DATABASES['default']['CONN_MAX_AGE'] = config('CONN_MAX_AGE', default=60, cast=int)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Read replica (core.routers): dashboards, records, timesheets, exports and
+# report rendering read from it; writes and everything else use the primary.
+# For SQLite, REPLICA_DB_NAME is a second file kept current by sync_replica.
+REPLICA_DB_NAME = config('REPLICA_DB_NAME', default='')
+if REPLICA_DB_NAME:
+    DATABASES['replica'] = dict(DATABASES['default'], NAME=REPLICA_DB_NAME, TEST={'MIRROR': 'default'})
+    if 'HOST' in DATABASES['default']:
+        DATABASES['replica']['HOST'] = config('REPLICA_DB_HOST', default=DATABASES['default']['HOST'])
+        DATABASES['replica']['PORT'] = config('REPLICA_DB_PORT', default=DATABASES['default']['PORT'])
+    DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# How long a client reads from the primary after a write (seconds)
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+# Lifetime of cached dashboards, employee stats and signed-in users read
+# from the replica (seconds)
+REPLICA_CACHE_TIMEOUT = config('REPLICA_CACHE_TIMEOUT', default=30, cast=int)
+
+# SQLite production profile (core.sqlite): WAL, synchronous=NORMAL,
+# busy timeout, mmap and page cache pragmas on every new connection
+SQLITE_TUNING = config('SQLITE_TUNING', default=not DEBUG, cast=bool)
+SQLITE_BUSY_TIMEOUT = config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int)  # ms
+SQLITE_MMAP_SIZE = config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int)
+SQLITE_CACHE_SIZE_KB = config('SQLITE_CACHE_SIZE_KB', default=64 * 1024, cast=int)
+
 
 # --------------------------------------------------
 # PASSWORD VALIDATION
@@ -231,11 +262,31 @@ SESSION_COOKIE_AGE = 86400
 SESSION_COOKIE_HTTPONLY = True
 SESSION_SAVE_EVERY_REQUEST = False
 
+# Fast auth (users.auth_cache): sessions and signed-in users are read from
+# the cache, so authenticated requests skip both lookup queries. Needs a
+# cache shared by all workers (USE_REDIS) for password changes and
+# deactivations to take effect everywhere at once.
+FAST_AUTH = config('FAST_AUTH', default=False, cast=bool)
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=300, cast=int)
+if FAST_AUTH:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    AUTHENTICATION_BACKENDS = [
+        'users.auth_cache.CachedModelBackend',
+        # Sessions started before FAST_AUTH was switched on
+        'django.contrib.auth.backends.ModelBackend',
+    ]
+
 
 # --------------------------------------------------
 # CACHE
 # --------------------------------------------------
-if config('USE_REDIS', default=False, cast=bool):
+# A cache shared by all workers: needed for invalidation (dashboards,
+# employee stats, FAST_AUTH users) to reach every process
+USE_REDIS = config('USE_REDIS', default=False, cast=bool)
+# Without it each worker has its own cache, so entries that writes
+# invalidate only live this long (seconds)
+LOCAL_CACHE_TIMEOUT = config('LOCAL_CACHE_TIMEOUT', default=5, cast=int)
+if USE_REDIS:
     CACHES = {
         'default': {
             'BACKEND': 'django_redis.cache.RedisCache',
@@ -256,6 +307,32 @@ else:
     }
 
 
+# --------------------------------------------------
+# METRICS (core.metrics, served at /metrics/)
+# --------------------------------------------------
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# Shared directory for per-worker metric files (multi-process servers)
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=int)
+# Bearer token letting a Prometheus scraper read /metrics/ without a staff login
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Recognition pipeline spans (core.tracing)
+TRACING_ENABLED = config('TRACING_ENABLED', default=True, cast=bool)
+# Add Server-Timing and X-Trace-Id headers to responses
+TRACING_HEADER = config('TRACING_HEADER', default=False, cast=bool)
+# Append traces as OTLP/JSON lines to this file (empty: no export)
+TRACING_EXPORT_FILE = config('TRACING_EXPORT_FILE', default='')
+
+if METRICS_ENABLED:
+    # Count cache hits and misses through a proxy around the real backend
+    CACHES['default'] = {
+        'BACKEND': 'core.metrics.MeteredCache',
+        'LOCATION': CACHES['default'].get('LOCATION', ''),
+        'OPTIONS': dict(CACHES['default'].get('OPTIONS', {}), BACKEND=CACHES['default']['BACKEND']),
+    }
+
+
 # --------------------------------------------------
 # LOGGING
 # --------------------------------------------------
@@ -265,11 +342,22 @@ LOGS_DIR.mkdir(exist_ok=True)
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'console': {
+            '()': 'core.log.StructuredFormatter',
+            'format': '%(asctime)s %(levelname)s %(name)s: %(message)s',
+        },
+        'json': {'()': 'core.log.JsonFormatter'},
+    },
     'handlers': {
-        'console': {'class': 'logging.StreamHandler'},
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'console'},
         'file': {
-            'class': 'logging.FileHandler',
+            # Safe to share between gunicorn workers (flock around writes and rotation)
+            'class': 'core.log.LockedRotatingFileHandler',
             'filename': LOGS_DIR / 'django.log',
+            'maxBytes': config('LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int),
+            'backupCount': config('LOG_BACKUP_COUNT', default=5, cast=int),
+            'formatter': 'json',
         },
     },
     'loggers': {
@@ -282,9 +370,23 @@ LOGGING = {
             'level': 'DEBUG' if DEBUG else 'INFO',
             'propagate': False,
         },
+        'users': {
+            'handlers': ['console', 'file'],
+            'level': 'DEBUG' if DEBUG else 'INFO',
+            'propagate': False,
+        },
+        'core': {
+            'handlers': ['console', 'file'],
+            'level': 'DEBUG' if DEBUG else 'INFO',
+            'propagate': False,
+        },
     },
 }
 
+# Format and write log records on a background thread (core.log) instead
+# of the request thread
+LOG_QUEUE = config('LOG_QUEUE', default=True, cast=bool)
+
 
 # --------------------------------------------------
 # DEBUG TOOLBAR
@@ -298,6 +400,31 @@ if DEBUG:
 # --------------------------------------------------
 LATE_ARRIVAL_TIME = config('LATE_ARRIVAL_TIME', default='09:15')
 HALF_DAY_HOURS = config('HALF_DAY_HOURS', default=4, cast=int)
+# Hours beyond this per day count as overtime on timesheets
+WORKDAY_HOURS = config('WORKDAY_HOURS', default=8, cast=int)
+
+# Months kept in the live attendance table; older closed months are moved
+# to the archive by `manage.py archive_attendance`
+ATTENDANCE_HOT_MONTHS = config('ATTENDANCE_HOT_MONTHS', default=12, cast=int)
+
+# Weekdays (Monday=0) skipped by `manage.py close_day`
+WEEKEND_DAYS = config('WEEKEND_DAYS', default='5,6', cast=Csv(int))
+
+# Largest distance between an uploaded face and a registered one (both
+# scaled to unit length, so 0..2) still accepted as the same person
+FACE_MATCH_THRESHOLD = config('FACE_MATCH_THRESHOLD', default=0.35, cast=float)
+
+
+# --------------------------------------------------
+# BACKGROUND JOBS (REPORTS)
+# --------------------------------------------------
+USE_CELERY = config('USE_CELERY', default=False, cast=bool)
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+
+# Thread pool size when Celery is not used
+REPORT_WORKERS = config('REPORT_WORKERS', default=2, cast=int)
 
 
 # --------------------------------------------------
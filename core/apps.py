@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .sqlite import configure_connection
+
+        connection_created.connect(configure_connection)
+
+        if getattr(settings, 'LOG_QUEUE', False):
+            from .log import start_background_logging
+
+            start_background_logging(settings.LOGGING.get('loggers', {}))
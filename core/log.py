@@ -0,0 +1,152 @@
+"""
+Logging helpers: structured formatters, a multi-process-safe rotating file
+handler, and a queue that moves formatting and file I/O off request threads.
+
+Log with a constant message and the data as fields, e.g.
+``logger.info("Face registered", extra={'employee_id': employee_id})``;
+fields are only rendered when a handler formats the record, on the
+listener thread.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+def record_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in RESERVED_ATTRS}
+
+
+class StructuredFormatter(logging.Formatter):
+    """The usual format followed by the record's fields as key=value pairs"""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value!r}' if isinstance(value, str) and ' ' in value else f'{key}={value}'
+                                   for key, value in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, process and fields"""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+        }
+        data.update(record_fields(record))
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class LockedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that several processes (gunicorn workers) can share:
+    each write and rollover happens under an flock on ``<file>.lock``, and a
+    process reopens the file when another one has rotated it.
+    """
+
+    def __init__(self, filename, *args, **kwargs):
+        super().__init__(filename, *args, **kwargs)
+        self.lock_path = f'{self.baseFilename}.lock'
+
+    def _rotated_elsewhere(self):
+        try:
+            return os.fstat(self.stream.fileno()).st_ino != os.stat(self.baseFilename).st_ino
+        except OSError:
+            return True
+
+    def shouldRollover(self, record):
+        if self.stream is None or self._rotated_elsewhere():
+            if self.stream:
+                self.stream.close()
+            self.stream = self._open()
+        # Size of the shared file, not just what this process wrote
+        if self.maxBytes > 0 and os.path.getsize(self.baseFilename) + len(self.format(record)) + 1 >= self.maxBytes:
+            return True
+        return False
+
+    def emit(self, record):
+        if fcntl is None:
+            return super().emit(record)
+        with open(self.lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                super().emit(record)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler for an in-process queue: records are passed on untouched,
+    so message and field formatting happen on the listener thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+_listeners = []
+_hooks = []
+
+
+def _stop_listeners():
+    for listener in _listeners:
+        listener.stop()
+    _listeners.clear()
+
+
+def _restart_after_fork():
+    # Threads do not survive fork (gunicorn --preload): give the child its own
+    for listener in _listeners:
+        listener._thread = None
+        listener.start()
+
+
+def start_background_logging(logger_names):
+    """
+    Move the handlers of ``logger_names`` behind a LazyQueueHandler, with a
+    QueueListener thread per distinct set of handlers doing the writes.
+    Returns the listeners started.
+    """
+    queues, started = {}, []
+    for name in logger_names:
+        logger = logging.getLogger(name)
+        handlers = tuple(handler for handler in logger.handlers if not isinstance(handler, QueueHandler))
+        if not handlers:
+            continue
+        if handlers not in queues:
+            queues[handlers] = queue.SimpleQueue()
+            listener = QueueListener(queues[handlers], *handlers, respect_handler_level=True)
+            listener.start()
+            started.append(listener)
+        for handler in handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(LazyQueueHandler(queues[handlers]))
+
+    _listeners.extend(started)
+    if started and not _hooks:
+        # Flush what is queued on exit; restart the threads in forked children
+        _hooks.append(atexit.register(_stop_listeners))
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=_restart_after_fork)
+    return started
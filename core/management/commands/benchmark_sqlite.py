@@ -0,0 +1,62 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.sqlite_bench import PROFILES, benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent read and check-in write throughput on a copy of the SQLite database, '
+        'with Django defaults and with the SQLITE_TUNING / CONN_MAX_AGE profile'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', help='SQLite file to copy (default: the default database)')
+        parser.add_argument(
+            '--profile', action='append', choices=PROFILES, dest='profiles',
+            help='Profile to run; repeatable (default: all)',
+        )
+        parser.add_argument('--readers', type=int, default=8, help='Reader threads (default: 8)')
+        parser.add_argument('--writers', type=int, default=4, help='Writer threads (default: 4)')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per profile (default: 10)')
+        parser.add_argument('--seed', type=int, default=42, help='Seed for the writers\' employees and days')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        database = options['database']
+        if not database:
+            if settings.DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3':
+                raise CommandError('The default database is not SQLite; pass --database')
+            database = settings.DATABASES['default']['NAME']
+        if options['readers'] < 0 or options['writers'] < 0 or options['readers'] + options['writers'] == 0:
+            raise CommandError('--readers and --writers must not be negative, nor both zero')
+        if options['duration'] <= 0:
+            raise CommandError('--duration must be positive')
+
+        profiles = options['profiles'] or PROFILES
+        self.stderr.write(
+            f"Running {', '.join(profiles)} for {options['duration']}s each with "
+            f"{options['readers']} readers and {options['writers']} writers on a copy of {database}..."
+        )
+        try:
+            report = benchmark(
+                database, profiles, options['readers'], options['writers'], options['duration'], options['seed'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            for result in report['profiles']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{result['profile']}: {result['read']['throughput_ops']} reads/s, "
+                    f"{result['write']['throughput_ops']} writes/s, "
+                    f"{result['read']['lock_errors'] + result['write']['lock_errors']} lock errors"
+                ))
+            self.stdout.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
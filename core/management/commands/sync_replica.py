@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.routers import REPLICA_ALIAS
+from core.sqlite import copy_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database to the replica file (REPLICA_DB_NAME), once or every --interval '
+        'seconds, standing in for replication when trying the read replica locally'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep copying every N seconds, simulating replication lag (default: copy once)',
+        )
+
+    def handle(self, *args, **options):
+        if REPLICA_ALIAS not in settings.DATABASES:
+            raise CommandError('No replica database configured; set REPLICA_DB_NAME')
+        primary, replica = settings.DATABASES['default'], settings.DATABASES[REPLICA_ALIAS]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('sync_replica only copies SQLite files; use database replication (or pg_dump) instead')
+
+        while True:
+            started = time.perf_counter()
+            copy_database(str(primary['NAME']), str(replica['NAME']))
+            self.stdout.write(self.style.SUCCESS(
+                f"Copied {primary['NAME']} to {replica['NAME']} in {time.perf_counter() - started:.2f}s"
+            ))
+            if options['interval'] <= 0:
+                return
+            time.sleep(options['interval'])
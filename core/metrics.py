@@ -0,0 +1,276 @@
+"""
+Request metrics (latency, DB queries, cache hits, response size) per URL
+name, plus recognition pipeline histograms fed by core.tracing, exposed
+in the Prometheus text format by core.views.metrics.
+
+Each process aggregates in memory. With METRICS_DIR set, every process
+also writes its totals to METRICS_DIR/metrics-<pid>.json (atomically, at
+most every METRICS_FLUSH_INTERVAL seconds) and the endpoint sums all the
+files, so gunicorn workers report one view of the deployment. Files of
+exited workers are kept: counters must never go backwards.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+# 320x240, 640x480, 1280x720, 1920x1080, 3840x2160
+PIXEL_BUCKETS = (76800, 307200, 921600, 2073600, 8294400)
+FACE_BUCKETS = (0, 1, 2, 3, 5, 10)
+GALLERY_BUCKETS = (10, 100, 1000, 10000, 100000)
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests handled, by view, method and status', None),
+    'http_request_duration_seconds': ('histogram', 'Time spent handling requests', LATENCY_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Size of non-streaming response bodies', SIZE_BUCKETS),
+    'db_queries_total': ('counter', 'Database queries run while handling requests', None),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in database queries', None),
+    'cache_requests_total': ('counter', 'Cache lookups while handling requests, by result', None),
+    # Recorded by core.tracing spans
+    'pipeline_stage_duration_seconds': ('histogram', 'Time spent in each recognition pipeline stage', STAGE_BUCKETS),
+    'recognition_image_pixels': ('histogram', 'Pixels (width x height) of decoded face images', PIXEL_BUCKETS),
+    'recognition_faces_detected': ('histogram', 'Faces detected per image', FACE_BUCKETS),
+    'recognition_gallery_size': ('histogram', 'Registered encodings compared per recognition', GALLERY_BUCKETS),
+}
+
+# Collector of the request being handled in this thread / task, if any
+current_request = ContextVar('metrics_request', default=None)
+
+
+class RequestMetrics:
+    """What one request did; the middleware records it when the response is ready"""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - started
+
+
+def record_cache(hit, count=1):
+    request_metrics = current_request.get()
+    if request_metrics is not None:
+        if hit:
+            request_metrics.cache_hits += count
+        else:
+            request_metrics.cache_misses += count
+
+
+class MeteredCache:
+    """
+    Cache backend proxy that counts get()/get_many() hits and misses for
+    the metrics middleware. The real backend is OPTIONS['BACKEND'].
+    """
+
+    _missing = object()
+
+    def __init__(self, location, params):
+        params = dict(params)
+        options = dict(params.get('OPTIONS', {}))
+        backend = options.pop('BACKEND')
+        params['OPTIONS'] = options
+        self._cache = import_string(backend)(location, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cache, name)
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def get(self, key, default=None, version=None):
+        value = self._cache.get(key, self._missing, version=version)
+        record_cache(value is not self._missing)
+        return default if value is self._missing else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = self._cache.get_many(keys, version=version)
+        record_cache(True, len(values))
+        record_cache(False, len(keys) - len(values))
+        return values
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class MetricsStore:
+    """Counters and histograms of this process, optionally mirrored to METRICS_DIR"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.last_flush = 0.0
+        self.loaded = False
+
+    @property
+    def directory(self):
+        directory = getattr(settings, 'METRICS_DIR', '')
+        return Path(directory) if directory else None
+
+    @property
+    def path(self):
+        return self.directory / f'metrics-{os.getpid()}.json'
+
+    def _load_own_file(self):
+        # A worker reusing a dead worker's pid continues its totals
+        self.loaded = True
+        if self.directory and self.path.exists():
+            self.counters, self.histograms = read_file(self.path)
+
+    def inc(self, name, labels, amount=1):
+        with self.lock:
+            if not self.loaded:
+                self._load_own_file()
+            key = _key(name, labels)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        with self.lock:
+            if not self.loaded:
+                self._load_own_file()
+            key = _key(name, labels)
+            histogram = self.histograms.setdefault(key, {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0})
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram['buckets'][index] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counters), {key: dict(value, buckets=list(value['buckets']))
+                                         for key, value in self.histograms.items()}
+
+    def flush(self, force=False):
+        """Write this process's totals to METRICS_DIR (throttled unless forced)"""
+        directory = self.directory
+        now = time.monotonic()
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        if directory is None or (not force and now - self.last_flush < interval):
+            return
+        self.last_flush = now
+        counters, histograms = self.snapshot()
+        directory.mkdir(parents=True, exist_ok=True)
+        data = {
+            'counters': [[name, dict(labels), value] for (name, labels), value in counters.items()],
+            'histograms': [[name, dict(labels), value] for (name, labels), value in histograms.items()],
+        }
+        # Write then rename: readers never see a half-written file
+        handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-', suffix='.tmp')
+        with os.fdopen(handle, 'w') as output:
+            json.dump(data, output)
+        os.replace(temp_path, self.path)
+
+    def collect(self):
+        """Totals over every process (just this one without METRICS_DIR)"""
+        if self.directory is None:
+            return self.snapshot()
+        self.flush(force=True)
+        counters, histograms = {}, {}
+        for path in self.directory.glob('metrics-*.json'):
+            try:
+                file_counters, file_histograms = read_file(path)
+            except (OSError, ValueError):
+                continue
+            for key, value in file_counters.items():
+                counters[key] = counters.get(key, 0) + value
+            for key, value in file_histograms.items():
+                total = histograms.setdefault(key, {'buckets': [0] * len(value['buckets']), 'sum': 0.0, 'count': 0})
+                total['buckets'] = [a + b for a, b in zip(total['buckets'], value['buckets'])]
+                total['sum'] += value['sum']
+                total['count'] += value['count']
+        return counters, histograms
+
+    def reset(self):
+        with self.lock:
+            self.counters, self.histograms = {}, {}
+            self.loaded = True
+
+
+def read_file(path):
+    with open(path) as handle:
+        data = json.load(handle)
+    counters = {_key(name, labels): value for name, labels, value in data['counters']}
+    histograms = {_key(name, labels): value for name, labels, value in data['histograms']}
+    return counters, histograms
+
+
+store = MetricsStore()
+
+
+def record_request(view, method, status, duration, size, request_metrics):
+    labels = {'view': view}
+    store.inc('http_requests_total', dict(labels, method=method, status=str(status)))
+    store.observe('http_request_duration_seconds', labels, duration)
+    if size is not None:
+        store.observe('http_response_size_bytes', labels, size)
+    if request_metrics.queries:
+        store.inc('db_queries_total', labels, request_metrics.queries)
+        store.inc('db_query_duration_seconds_total', labels, request_metrics.query_seconds)
+    if request_metrics.cache_hits:
+        store.inc('cache_requests_total', dict(labels, result='hit'), request_metrics.cache_hits)
+    if request_metrics.cache_misses:
+        store.inc('cache_requests_total', dict(labels, result='miss'), request_metrics.cache_misses)
+    store.flush()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(counters, histograms):
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+            continue
+        for (metric, labels), value in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, value['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels, le=_number(bound))} {cumulative}')
+            lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} {value["count"]}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(value["sum"])}')
+            lines.append(f'{name}_count{_labels(labels)} {value["count"]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,113 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import routers, tracing
+from .metrics import RequestMetrics, current_request, record_request
+
+
+class MetricsMiddleware:
+    """
+    Record latency, DB queries, cache lookups and response size of every
+    request under its URL name (see core.metrics). Goes first in
+    MIDDLEWARE so the timing covers the whole stack.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = RequestMetrics()
+        token = current_request.set(request_metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(request_metrics))
+                response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+        match = getattr(request, 'resolver_match', None)
+        if response.streaming:
+            size = int(response['Content-Length']) if response.has_header('Content-Length') else None
+        else:
+            size = len(response.content)
+        record_request(
+            view=match.view_name if match else '<unmatched>',
+            method=request.method,
+            status=response.status_code,
+            duration=time.perf_counter() - started,
+            size=size,
+            request_metrics=request_metrics,
+        )
+        return response
+
+
+class TracingMiddleware:
+    """
+    Collect the core.tracing spans of each request into a trace (joining
+    an incoming W3C ``traceparent``). Traces with pipeline spans are
+    exported to TRACING_EXPORT_FILE; with TRACING_HEADER set, responses
+    carry their stage timings in ``Server-Timing`` and the trace id in
+    ``X-Trace-Id``.
+    """
+
+    def __init__(self, get_response):
+        if not tracing.tracing_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trace, *tokens = tracing.start_trace(request.path, request.headers.get('traceparent'))
+        try:
+            response = self.get_response(request)
+        finally:
+            tracing.finish_trace(trace, tokens)
+
+        match = getattr(request, 'resolver_match', None)
+        trace.root.name = match.view_name if match else request.path
+        trace.root.set('http.method', request.method)
+        trace.root.set('http.status_code', response.status_code)
+
+        if len(trace.spans) > 1:
+            tracing.export(trace)
+        if getattr(settings, 'TRACING_HEADER', False):
+            response['Server-Timing'] = tracing.server_timing(trace)
+            response['X-Trace-Id'] = trace.trace_id
+        return response
+
+
+class ReplicaMiddleware:
+    """
+    Per-request routing state for core.routers. A request that writes
+    gets a short-lived cookie pinning the client's next requests to the
+    primary, so it reads its own writes despite replication lag. Not used
+    without a ``replica`` database.
+    """
+
+    def __init__(self, get_response):
+        if routers.REPLICA_ALIAS not in connections.settings:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = routers.RoutingState(pinned=routers.REPLICA_PIN_COOKIE in request.COOKIES)
+        token = routers.current_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.current_state.reset(token)
+
+        if state.wrote:
+            response.set_cookie(
+                routers.REPLICA_PIN_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
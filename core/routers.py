@@ -0,0 +1,123 @@
+"""
+Optional read replica for reporting reads.
+
+With a ``replica`` database configured (REPLICA_DB_NAME), ReplicaRouter
+sends reads made inside replica_reads() to it: the dashboards, records,
+timesheets and exports (reads_from_replica views) and background report
+rendering. Everything else, including every write and the check-in path,
+stays on the primary.
+
+Reads go back to the primary, so a request sees its own writes:
+- for the rest of a request once it has written anything
+- for REPLICA_PIN_SECONDS afterwards, through a cookie that
+  ReplicaMiddleware sets, so the page a POST redirects to sees the write
+  despite replication lag
+- inside an atomic block on the primary
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = 'replica'
+REPLICA_PIN_COOKIE = 'replica_pin'
+
+
+class RoutingState:
+    """Routing flags of the request (or background job) being handled"""
+
+    def __init__(self, pinned=False, sticky=True):
+        self.use_replica = False
+        self.pinned = pinned
+        # Whether a write sends the following reads to the primary
+        self.sticky = sticky
+        self.wrote = False
+
+
+current_state = ContextVar('replica_routing', default=None)
+
+
+def reading_from_replica():
+    """Whether reads made now would go to the replica"""
+    state = current_state.get()
+    return (
+        state is not None and state.use_replica and not state.pinned and not state.wrote
+        and REPLICA_ALIAS in connections.settings
+        and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+    )
+
+
+def cache_timeout(timeout):
+    """
+    Timeout for a cache entry filled from the reads made now. Data read
+    from a lagging replica can predate the invalidation or version it is
+    stored under, so it only lives REPLICA_CACHE_TIMEOUT seconds.
+    """
+    if reading_from_replica():
+        return getattr(settings, 'REPLICA_CACHE_TIMEOUT', 30)
+    return timeout
+
+
+@contextmanager
+def replica_reads(sticky=True):
+    """
+    Route the reads made in this block to the replica (when there is one).
+    Outside a request, sticky=False keeps bookkeeping writes (e.g. job
+    progress) from moving the remaining reads to the primary.
+    """
+    state = current_state.get()
+    token = None
+    if state is None:
+        state = RoutingState(sticky=sticky)
+        token = current_state.set(state)
+    previous = state.use_replica
+    state.use_replica = True
+    try:
+        yield state
+    finally:
+        state.use_replica = previous
+        if token is not None:
+            current_state.reset(token)
+
+
+def _replica_iterator(content):
+    # Streaming responses are consumed after the view has returned
+    with replica_reads():
+        yield from content
+
+
+def reads_from_replica(view):
+    """View decorator: a read-only reporting view, served from the replica"""
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        with replica_reads():
+            response = view(request, *args, **kwargs)
+        if getattr(response, 'streaming', False):
+            response.streaming_content = _replica_iterator(response.streaming_content)
+        return response
+    return wrapped
+
+
+class ReplicaRouter:
+    """Reads in replica_reads() go to the replica; writes and the rest to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return REPLICA_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = current_state.get()
+        if state is not None and state.sticky:
+            # Sticky: later reads of this request must see the write
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA_ALIAS}
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica gets its schema through replication (or sync_replica)
+        return db != REPLICA_ALIAS
@@ -0,0 +1,233 @@
+"""
+Synthetic data for load and capacity testing.
+
+Everything random is drawn from one NumPy generator and one Faker instance
+seeded with the same value, in a fixed order, so the same options produce
+the same dataset (names, departments, arrivals, leave) on every run.
+"""
+import json
+import re
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from attendance.absence import is_working_day
+from attendance.models import ATTENDED_STATUSES, Attendance, LeaveRequest
+from attendance.stats import invalidate_employee_stats
+from attendance.status import half_day_seconds, late_arrival_time, seconds
+from attendance.summary import rebuild_summary
+from users.importer import departments_by_name
+from users.models import CustomUser, Employee, next_employee_ids
+
+DEFAULT_DEPARTMENTS = ['IT Department', 'HR Department', 'Finance Department', 'Marketing Department']
+
+LEAVE_REASONS = ['Medical appointment', 'Family event', 'Personal work', 'Travel', 'Feeling unwell']
+
+# Arrival and working-time distributions, in seconds
+ARRIVAL_MEAN = 8 * 3600 + 50 * 60
+ARRIVAL_STD = 20 * 60
+ARRIVAL_RANGE = (7 * 3600, 12 * 3600)
+WORKED_MEAN = 8.5 * 3600
+WORKED_STD = 45 * 60
+SHORT_DAY_RATE = 0.03
+SHORT_DAY_RANGE = (2 * 3600, 4 * 3600)
+MEAN_LEAVE_DAYS = 2
+
+
+def department_names(fake, count):
+    names = DEFAULT_DEPARTMENTS[:count]
+    while len(names) < count:
+        name = f"{fake.unique.word().title()} Department"
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def username_for(first_name, last_name, index):
+    return re.sub(r'[^a-z0-9.]', '', f"{first_name}.{last_name}.{index}".lower())
+
+
+def encoding_json(vector):
+    return json.dumps(np.round(vector, 6).tolist())
+
+
+def to_time(value):
+    value = int(value)
+    return time(value // 3600, value % 3600 // 60, value % 60)
+
+
+def leave_spans(rng, employees, days, leave_rate):
+    """(employee index, first day offset, length) of each approved leave"""
+    counts = rng.poisson(leave_rate * days / MEAN_LEAVE_DAYS, employees)
+    owners = np.repeat(np.arange(employees), counts)
+    starts = rng.integers(0, days, owners.size)
+    lengths = 1 + rng.poisson(MEAN_LEAVE_DAYS - 1, owners.size)
+    return owners, starts, np.minimum(lengths, days - starts)
+
+
+def day_rows(rng, employee_ids, day, on_leave, absence_rate, until=None):
+    """
+    Attendance rows for ``day``: statuses follow attendance.status.classify,
+    absent and on_leave rows mirror close_day. ``until`` (seconds) limits a
+    day still in progress to arrivals so far, without check-outs.
+    """
+    count = len(employee_ids)
+    arrival = np.clip(rng.normal(ARRIVAL_MEAN, ARRIVAL_STD, count), *ARRIVAL_RANGE).astype(np.int32)
+    worked = rng.normal(WORKED_MEAN, WORKED_STD, count)
+    short = rng.random(count) < SHORT_DAY_RATE
+    worked[short] = rng.uniform(*SHORT_DAY_RANGE, short.sum())
+    departure = np.minimum(arrival + worked.astype(np.int32), 24 * 3600 - 1)
+    absent = (rng.random(count) < absence_rate) & ~on_leave
+
+    status = np.where(arrival > seconds(late_arrival_time()), 'late', 'present').astype(object)
+    if until is None:
+        status[departure - arrival < half_day_seconds()] = 'half_day'
+        status[absent] = 'absent'
+        status[on_leave] = 'on_leave'
+        recorded = np.ones(count, dtype=bool)
+    else:
+        recorded = ~absent & ~on_leave & (arrival <= until)
+
+    rows = []
+    for i in np.flatnonzero(recorded):
+        attended = status[i] in ATTENDED_STATUSES
+        rows.append(Attendance(
+            employee_id=employee_ids[i],
+            date=day,
+            # Not a punch; midnight like close_day
+            time_in=to_time(arrival[i]) if attended else time.min,
+            time_out=to_time(departure[i]) if attended and until is None else None,
+            status=status[i],
+        ))
+    return rows
+
+
+def create_employees(fake, rng, count, departments, encoding_dim, password, joined, batch_size, progress):
+    """
+    Create ``count`` employees (reusing any whose username already exists
+    from an earlier run with the same seed); returns their pks in order.
+    """
+    names = [(fake.first_name(), fake.last_name()) for _ in range(count)]
+    usernames = [username_for(first, last, index) for index, (first, last) in enumerate(names)]
+    # A Dirichlet draw gives departments of uneven size, like a real company
+    weights = rng.dirichlet(np.full(len(departments), 2.0))
+    department_index = rng.choice(len(departments), count, p=weights)
+    password = make_password(password)
+
+    employee_ids = []
+    for offset in range(0, count, batch_size):
+        batch = range(offset, min(offset + batch_size, count))
+        encodings = rng.standard_normal((len(batch), encoding_dim)) * 0.1
+        existing = dict(
+            Employee.objects.filter(user__username__in=[usernames[i] for i in batch])
+            .values_list('user__username', 'pk')
+        )
+        new = [i for i in batch if usernames[i] not in existing]
+
+        with transaction.atomic():
+            users = CustomUser.objects.bulk_create([
+                CustomUser(
+                    username=usernames[i],
+                    first_name=names[i][0],
+                    last_name=names[i][1],
+                    email=f"{usernames[i]}@example.com",
+                    user_type='employee',
+                    password=password,
+                )
+                for i in new
+            ])
+            employees = Employee.objects.bulk_create([
+                Employee(
+                    user=user,
+                    employee_id=employee_id,
+                    department=departments[department_index[i]],
+                    face_encoding=encoding_json(encodings[i - offset]),
+                )
+                for i, user, employee_id in zip(new, users, next_employee_ids(len(new)))
+            ])
+            # date_joined is auto_now_add, so it can only be backdated afterwards
+            Employee.objects.filter(pk__in=[employee.pk for employee in employees]).update(date_joined=joined)
+        existing.update({employee.user.username: employee.pk for employee in employees})
+        employee_ids.extend(existing[usernames[i]] for i in batch)
+        progress(f"Employees: {batch.stop}/{count}")
+
+    return employee_ids
+
+
+def populate(employees=50, days=7, departments=4, leave_rate=0.03, absence_rate=0.05,
+             encoding_dim=128, seed=42, batch_size=5000, password='password123', progress=None):
+    """
+    Generate departments, employees with synthetic face encodings, approved
+    leave and ``days`` days of attendance up to today, all with bulk inserts.
+
+    Past working days are complete (as close_day leaves them); today only
+    has the check-ins before now. Meant for an empty database: a rerun
+    reuses the employees of the same seed but adds their leave again.
+    Returns a dict of created row counts.
+    """
+    from faker import Faker
+
+    progress = progress or (lambda message: None)
+    rng = np.random.default_rng(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+
+    names = department_names(fake, departments)
+    department_map = departments_by_name(names)
+    department_list = [department_map[name] for name in names]
+
+    # Joined before the first generated day, so close_day and reports see them
+    joined = timezone.make_aware(datetime.combine(start - timedelta(days=1), time(9)))
+    employee_ids = create_employees(
+        fake, rng, employees, department_list, encoding_dim, password, joined, batch_size, progress,
+    )
+
+    owners, starts, lengths = leave_spans(rng, employees, days, leave_rate)
+    leave_types = rng.choice([code for code, _ in LeaveRequest.LEAVE_TYPES], owners.size)
+    reasons = rng.choice(LEAVE_REASONS, owners.size)
+    LeaveRequest.objects.bulk_create(
+        [
+            LeaveRequest(
+                employee_id=employee_ids[owner],
+                leave_type=leave_type,
+                start_date=start + timedelta(days=int(first)),
+                end_date=start + timedelta(days=int(first + length - 1)),
+                reason=reason,
+                status='approved',
+            )
+            for owner, first, length, leave_type, reason in zip(owners, starts, lengths, leave_types, reasons)
+        ],
+        batch_size=batch_size,
+    )
+    on_leave = np.zeros((days, employees), dtype=bool)
+    for owner, first, length in zip(owners, starts, lengths):
+        on_leave[first:first + length, owner] = True
+
+    now = timezone.localtime()
+    attendance = 0
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        if not is_working_day(day):
+            continue
+        until = seconds(now.time()) if day == today else None
+        rows = day_rows(rng, employee_ids, day, on_leave[offset], absence_rate, until=until)
+        Attendance.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+        attendance += len(rows)
+        progress(f"Attendance: {day} ({len(rows)} rows)")
+
+    # bulk_create sends no signals: rebuild the derived data once at the end
+    rebuild_summary(start, today)
+    invalidate_employee_stats()
+
+    return {
+        'departments': len(department_list),
+        'employees': len(employee_ids),
+        'leave_requests': int(owners.size),
+        'attendance': attendance,
+    }
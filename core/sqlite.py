@@ -0,0 +1,58 @@
+"""
+SQLite production profile.
+
+With SQLITE_TUNING on, configure_connection() (a connection_created
+receiver, see CoreConfig.ready) applies sqlite_pragmas() to every new
+SQLite connection:
+
+- journal_mode=WAL lets readers run alongside the single writer.
+- synchronous=NORMAL syncs at checkpoints rather than on every commit. This
+  is still safe against application crashes under WAL.
+- busy_timeout makes a writer wait for the lock rather than fail with
+  "database is locked".
+- mmap_size and cache_size keep hot pages in memory.
+
+Together with CONN_MAX_AGE the pragmas run once per worker connection, not
+once per request.
+"""
+import sqlite3
+
+from django.conf import settings
+
+
+def sqlite_pragmas():
+    """PRAGMA name -> value, from the SQLITE_* settings"""
+    return {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': getattr(settings, 'SQLITE_BUSY_TIMEOUT', 5000),
+        'mmap_size': getattr(settings, 'SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        # Negative: KiB rather than pages
+        'cache_size': -getattr(settings, 'SQLITE_CACHE_SIZE_KB', 64 * 1024),
+        'temp_store': 'MEMORY',
+    }
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    for name, value in pragmas.items():
+        dbapi_connection.execute(f'PRAGMA {name} = {value}')
+
+
+def copy_database(source, target):
+    """
+    Consistent copy of a SQLite file through the backup API, safe while
+    the source is in use (benchmark copies, sync_replica)
+    """
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not getattr(settings, 'SQLITE_TUNING', False):
+        return
+    # On the DB-API connection: setup, not application queries to count or trace
+    apply_pragmas(connection.connection, sqlite_pragmas())
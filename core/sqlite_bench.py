@@ -0,0 +1,182 @@
+"""
+Concurrency benchmark for the SQLite production profile.
+
+Runs reader and writer threads against a copy of a database, once per
+profile. Readers issue the dashboard and records queries. Writers do a
+kiosk check-in: the punch upsert plus the daily summary bucket. The
+report gives throughput, latency and "database is locked" failures for
+each profile.
+
+- 'default' is stock Django: rollback journal, synchronous=FULL and a new
+  connection per request.
+- 'tuned' is SQLITE_TUNING with CONN_MAX_AGE: the core.sqlite pragmas on
+  one persistent connection per thread.
+"""
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from attendance.loadtest import percentiles
+from .sqlite import apply_pragmas, copy_database, sqlite_pragmas
+
+PROFILES = ('default', 'tuned')
+
+READ_QUERIES = (
+    # Dashboard trend (DailyAttendanceSummary)
+    'SELECT date, status, SUM(count) FROM attendance_dailyattendancesummary '
+    'WHERE date >= ? GROUP BY date, status ORDER BY date, status',
+    # Attendance records, first page
+    'SELECT a.id, a.date, a.time_in, a.time_out, a.status, e.employee_id FROM attendance_attendance a '
+    'JOIN users_employee e ON e.id = a.employee_id WHERE a.date >= ? ORDER BY a.date DESC, a.id DESC LIMIT 25',
+)
+
+PUNCH_SQL = (
+    'INSERT INTO attendance_attendance (employee_id, date, time_in, status, manual) VALUES (?, ?, ?, ?, FALSE) '
+    'ON CONFLICT (employee_id, date) DO UPDATE SET time_out = excluded.time_in '
+    'WHERE attendance_attendance.time_out IS NULL'
+)
+SUMMARY_SQL = (
+    'INSERT INTO attendance_dailyattendancesummary (date, status, count, department_id) VALUES (?, ?, 1, ?) '
+    'ON CONFLICT (date, COALESCE(department_id, 0), status) DO UPDATE SET count = count + 1'
+)
+
+
+def profile_settings(profile):
+    """(pragmas applied per connection, reuse connections)"""
+    if profile == 'tuned':
+        return sqlite_pragmas(), True
+    # Django's defaults; journal_mode persists in the file, so reset it
+    return {'journal_mode': 'DELETE', 'synchronous': 'FULL'}, False
+
+
+def connect(path, pragmas):
+    # Autocommit with explicit BEGIN, like Django's SQLite backend
+    connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    connection.execute('PRAGMA foreign_keys = ON')
+    apply_pragmas(connection, pragmas)
+    return connection
+
+
+def load_fixtures(path):
+    connection = sqlite3.connect(path)
+    try:
+        employees = connection.execute(
+            'SELECT id, department_id FROM users_employee WHERE is_active'
+        ).fetchall()
+        last_day = connection.execute('SELECT MAX(date) FROM attendance_attendance').fetchone()[0]
+    finally:
+        connection.close()
+    if not employees:
+        raise ValueError('The database has no active employees; run populate_sample_data first')
+    last_day = date.fromisoformat(last_day) if last_day else date.today()
+    return employees, last_day
+
+
+class Worker(threading.Thread):
+    def __init__(self, kind, path, pragmas, persistent, deadline, seed, fixtures):
+        super().__init__(daemon=True)
+        self.kind = kind
+        self.path = path
+        self.pragmas = pragmas
+        self.persistent = persistent
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+        self.employees, self.last_day = fixtures
+        self.latencies = []
+        self.lock_errors = 0
+        self.errors = 0
+
+    def read(self, connection):
+        since = (self.last_day - timedelta(days=6)).isoformat()
+        for sql in READ_QUERIES:
+            connection.execute(sql, [since]).fetchall()
+
+    def write(self, connection):
+        employee_id, department_id = self.rng.choice(self.employees)
+        # Days after the existing data, so most punches are real check-ins/outs
+        day = (self.last_day + timedelta(days=self.rng.randint(1, 30))).isoformat()
+        now = time.strftime('%H:%M:%S')
+        connection.execute('BEGIN')
+        try:
+            connection.execute(PUNCH_SQL, [employee_id, day, now, 'present'])
+            connection.execute(SUMMARY_SQL, [day, 'present', department_id])
+            connection.execute('COMMIT')
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+
+    def run(self):
+        operation = self.read if self.kind == 'read' else self.write
+        connection = connect(self.path, self.pragmas) if self.persistent else None
+        while time.monotonic() < self.deadline:
+            started = time.perf_counter()
+            try:
+                # Without persistence every request pays for its own connection
+                current = connection or connect(self.path, self.pragmas)
+                try:
+                    operation(current)
+                finally:
+                    if connection is None:
+                        current.close()
+            except sqlite3.OperationalError as e:
+                if 'locked' in str(e) or 'busy' in str(e):
+                    self.lock_errors += 1
+                else:
+                    self.errors += 1
+                continue
+            self.latencies.append(time.perf_counter() - started)
+        if connection is not None:
+            connection.close()
+
+
+def run_profile(source, profile, readers, writers, duration, seed):
+    """Run one profile on a fresh copy of ``source`` and return its report"""
+    pragmas, persistent = profile_settings(profile)
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / 'bench.sqlite3')
+        copy_database(source, path)
+        # journal_mode is stored in the file: set it before the threads start
+        connect(path, pragmas).close()
+        fixtures = load_fixtures(path)
+
+        deadline = time.monotonic() + duration
+        workers = [
+            Worker(kind, path, pragmas, persistent, deadline, seed + index, fixtures)
+            for index, kind in enumerate(['read'] * readers + ['write'] * writers)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+    report = {'profile': profile, 'pragmas': pragmas, 'persistent_connections': persistent}
+    for kind in ('read', 'write'):
+        group = [worker for worker in workers if worker.kind == kind]
+        latencies = [latency for worker in group for latency in worker.latencies]
+        report[kind] = {
+            'threads': len(group),
+            'operations': len(latencies),
+            'throughput_ops': round(len(latencies) / elapsed, 1) if elapsed else 0,
+            'latency_ms': percentiles(latencies),
+            'lock_errors': sum(worker.lock_errors for worker in group),
+            'errors': sum(worker.errors for worker in group),
+        }
+    return report
+
+
+def benchmark(source, profiles=PROFILES, readers=8, writers=4, duration=10, seed=42):
+    """Run each profile against its own copy of ``source``; the source is never written"""
+    source = str(source)
+    if not Path(source).exists():
+        raise ValueError(f'No database at {source}')
+    return {
+        'config': {'database': source, 'readers': readers, 'writers': writers, 'duration': duration, 'seed': seed},
+        'profiles': [run_profile(source, profile, readers, writers, duration, seed) for profile in profiles],
+    }
@@ -1,3 +1,583 @@
-from django.test import TestCase
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import time as datetime_time, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+import attendance.urls
+import core.urls
+import users.urls
+from attendance.loadtest import load_images
+from attendance.models import Attendance, DailyAttendanceSummary, LeaveRequest, ReportJob
+from attendance.stats import cached_dashboard_stats, get_employee_stats
+from attendance.summary import rebuild_summary
+from attendance.tasks import run_report
+from attendance.utils import FaceRecognition
+from core import log
+from core.log import JsonFormatter, LockedRotatingFileHandler, start_background_logging
+from core.metrics import MetricsStore, store
+from core.routers import REPLICA_PIN_COOKIE, ReplicaRouter, replica_reads
+from core.sqlite import copy_database
+from core.sqlite_bench import benchmark
+from users.auth_cache import CachedModelBackend
+from users.models import CustomUser, Department, Employee
+
+
+# Maximum number of queries each view may issue when rendered for a staff
+# user against the seeded dataset. Every URL in attendance.urls, users.urls
+# and core.urls must be listed here; lower a budget when a view gets cheaper.
+# Budgets include the session and user lookups (2 queries) of every request.
+QUERY_BUDGETS = {
+    # core.urls
+    'home': 2,
+    'dashboard': 8,
+    'metrics': 2,
+
+    # attendance.urls
+    'mark_attendance': 5,
+    'attendance_records': 4,
+    'export_records': 4,
+    'attendance_dashboard': 8,
+    'manual_attendance': 3,
+    'register_face': 4,
+    'face_registration_success': 2,
+    'manage_faces': 6,
+    'delete_face': 2,
+    'submit_leave': 3,
+    'my_leaves': 4,
+    'manage_leaves': 3,
+    'approve_leave': 6,
+    'reject_leave': 5,
+    'reports': 4,
+    'report_status': 3,
+    'download_report': 3,
+    'timesheets': 5,
+    'timesheet_api': 4,
+
+    # users.urls
+    'users:register_face': 2,
+    'users:employee_list': 8,
+    'users:employee_search': 3,
+    'users:profile': 4,
+    'users:register': 2,
+    'users:change_password': 2,
+    'users:password_reset': 2,
+}
+
+# Views whose GET ends in a redirect for a logged-in staff user
+REDIRECTING_VIEWS = {'delete_face', 'approve_leave', 'users:register'}
+
+EMPLOYEE_COUNT = 12
+DAYS = 7
+
+
+def url_names():
+    """Yield the fully qualified name of every named URL in the app urlconfs"""
+    for module, namespace in ((core.urls, None), (attendance.urls, None), (users.urls, 'users')):
+        for pattern in module.urlpatterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                yield f'{namespace}:{pattern.name}' if namespace else pattern.name
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='query_budget_media_'))
+class QueryBudgetTests(TestCase):
+    """
+    Render every app URL against a seeded dataset and fail when a view
+    issues more queries than its declared budget.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        departments = [
+            Department.objects.create(name=f'Department {i}') for i in range(3)
+        ]
+
+        cls.staff = CustomUser.objects.create_user(
+            username='admin', password='password123', first_name='Admin', last_name='User',
+            is_staff=True, user_type='admin',
+        )
+        cls.staff_employee = Employee.objects.create(
+            user=cls.staff, employee_id='EMP0000', department=departments[0],
+        )
+
+        today = timezone.now().date()
+        employees = [cls.staff_employee]
+        for i in range(1, EMPLOYEE_COUNT):
+            user = CustomUser.objects.create_user(
+                username=f'employee{i}', password='password123',
+                first_name=f'First{i}', last_name=f'Last{i}',
+            )
+            employees.append(Employee.objects.create(
+                user=user,
+                employee_id=f'EMP{i:04d}',
+                department=departments[i % len(departments)],
+                face_encoding='[0.1, 0.2]' if i % 2 else None,
+            ))
+
+        for day in range(DAYS):
+            for employee in employees:
+                Attendance.objects.create(employee=employee, status='present')
+            Attendance.objects.filter(date=today).update(date=today - timedelta(days=DAYS - day))
+        for employee in employees:
+            Attendance.objects.create(employee=employee, status='present')
+        # The date shuffling above bypasses the summary signals
+        rebuild_summary()
+
+        cls.leave = LeaveRequest.objects.create(
+            employee=employees[1], start_date=today, end_date=today + timedelta(days=2),
+            reason='Family event',
+        )
+        LeaveRequest.objects.create(
+            employee=cls.staff_employee, start_date=today, end_date=today, reason='Appointment',
+            status='approved',
+        )
+        cls.face_employee_id = employees[1].employee_id
+
+        cls.report_job = ReportJob.objects.create(year=today.year, month=today.month, file_format='xlsx')
+        run_report(cls.report_job.id)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def url_for(self, name):
+        kwargs = {}
+        if name == 'delete_face':
+            kwargs = {'employee_id': self.face_employee_id}
+        elif name in ('approve_leave', 'reject_leave'):
+            kwargs = {'leave_id': self.leave.id}
+        elif name in ('report_status', 'download_report'):
+            kwargs = {'job_id': self.report_job.id}
+        return reverse(name, kwargs=kwargs)
+
+    def test_every_view_declares_a_budget(self):
+        missing = sorted(set(url_names()) - set(QUERY_BUDGETS))
+        self.assertEqual(missing, [], 'Declare a query budget in QUERY_BUDGETS for these views')
+
+    def test_views_stay_within_query_budget(self):
+        results = []
+        for name in url_names():
+            if name not in QUERY_BUDGETS:
+                continue
+            url = self.url_for(name)
+
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = self.client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+
+            results.append((name, len(queries), elapsed))
+
+            with self.subTest(view=name):
+                expected = (302,) if name in REDIRECTING_VIEWS else (200,)
+                self.assertIn(response.status_code, expected)
+                self.assertLessEqual(
+                    len(queries), QUERY_BUDGETS[name],
+                    f'{name} issued {len(queries)} queries (budget {QUERY_BUDGETS[name]}):\n'
+                    + '\n'.join(q['sql'] for q in queries.captured_queries)
+                )
+
+        self.report(results)
+
+    def report(self, results):
+        """Print the measured query counts and timings when QUERY_BUDGET_REPORT is set"""
+        if os.environ.get('QUERY_BUDGET_REPORT'):
+            for name, count, elapsed in sorted(results):
+                print(f'{name:32} {count:4d} queries {elapsed * 1000:8.1f} ms')
+
+
+class SampleDataTests(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def generate(self, *args):
+        call_command(
+            'populate_sample_data', '--employees', '30', '--days', '10', '--departments', '6',
+            '--encoding-dim', '16', '--seed', '7', *args, stdout=StringIO(),
+        )
+
+    def snapshot(self):
+        return sorted(
+            Attendance.objects.values_list('employee__user__username', 'date', 'time_in', 'time_out', 'status')
+        )
+
+    def test_generates_requested_sizes(self):
+        self.generate()
+
+        self.assertEqual(Department.objects.count(), 6)
+        self.assertEqual(Employee.objects.count(), 30)
+        encoding = Employee.objects.first().get_face_encoding_list()
+        self.assertEqual(len(encoding), 16)
+
+        today = timezone.localdate()
+        start = today - timedelta(days=9)
+        past = Attendance.objects.filter(date__lt=today)
+        days = past.values('date').distinct().count()
+        # Past working days are closed: one row per employee and day
+        self.assertEqual(past.count(), 30 * days)
+        self.assertFalse(Attendance.objects.filter(date__lt=start).exists())
+        self.assertFalse(Attendance.objects.filter(date=today, time_out__isnull=False).exists())
+        for record in past.filter(status__in=['absent', 'on_leave']):
+            self.assertEqual(record.time_in, datetime_time.min)
+        self.assertEqual(
+            DailyAttendanceSummary.objects.aggregate(total=Sum('count'))['total'],
+            Attendance.objects.count(),
+        )
+
+    def test_same_seed_same_data(self):
+        self.generate()
+        first = self.snapshot()
+
+        CustomUser.objects.all().delete()
+        Department.objects.all().delete()
+        self.generate()
+
+        self.assertEqual(self.snapshot(), first)
+
+    def test_rejects_invalid_rate(self):
+        with self.assertRaises(CommandError):
+            self.generate('--leave-rate', '2')
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username='admin', is_staff=True)
+        store.reset()
+
+    def tearDown(self):
+        store.reset()
+        cache.clear()
+
+    def scrape(self, **headers):
+        return self.client.get(reverse('metrics'), **headers)
+
+    def test_records_views_queries_and_cache(self):
+        Employee.objects.create(user=self.admin, employee_id='EMP0001')
+        self.client.force_login(self.admin)
+        self.client.get(reverse('dashboard'))
+        self.client.get(reverse('dashboard'))
+        self.client.get(reverse('users:profile'))
+        self.client.get(reverse('users:profile'))
+
+        text = self.scrape().content.decode()
+        self.assertIn('http_requests_total{method="GET",status="200",view="dashboard"} 2', text)
+        self.assertIn('http_request_duration_seconds_count{view="dashboard"} 2', text)
+        self.assertIn('http_request_duration_seconds_bucket{view="dashboard",le="+Inf"} 2', text)
+        self.assertIn('http_response_size_bytes_count{view="dashboard"} 2', text)
+        self.assertIn('db_queries_total{view="dashboard"}', text)
+        # The second profile render is served from the employee stats cache
+        self.assertIn('cache_requests_total{result="hit",view="users:profile"}', text)
+        self.assertIn('cache_requests_total{result="miss",view="users:profile"}', text)
+
+    def test_staff_or_token_only(self):
+        self.assertEqual(self.scrape().status_code, 403)
+        self.client.force_login(CustomUser.objects.create_user(username='employee'))
+        self.assertEqual(self.scrape().status_code, 403)
+        self.client.logout()
+
+        with override_settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.scrape(HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+            self.assertEqual(self.scrape(HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    def test_worker_files_are_summed(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            other = MetricsStore()
+            other.inc('http_requests_total', {'view': 'home', 'method': 'GET', 'status': '200'}, 5)
+            other.observe('http_request_duration_seconds', {'view': 'home'}, 0.02)
+            other.flush(force=True)
+            os.rename(other.path, os.path.join(directory, 'metrics-1.json'))
+
+            self.client.get(reverse('home'))
+            self.client.force_login(self.admin)
+            text = self.scrape().content.decode()
+
+        self.assertIn('http_requests_total{method="GET",status="200",view="home"} 6', text)
+        self.assertIn('http_request_duration_seconds_count{view="home"} 2', text)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='tracing_media_'))
+class TracingTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username='admin', is_staff=True)
+        # Enrolled from the frames checked in below, so recognition matches
+        self.images = load_images(count=3)
+        for number, (name, payload) in enumerate(self.images):
+            encoding, _ = FaceRecognition.encode_face_from_image(SimpleUploadedFile(name, payload))
+            Employee.objects.create(
+                user=CustomUser.objects.create_user(username=f'user{number}'),
+                employee_id=f'EMP000{number}',
+                face_encoding=json.dumps(encoding),
+            )
+        self.client.force_login(self.admin)
+        store.reset()
+
+    def tearDown(self):
+        store.reset()
+        cache.clear()
+
+    def check_in(self, **headers):
+        name, payload = self.images[0]
+        return self.client.post(
+            reverse('mark_attendance'), {'face_image': SimpleUploadedFile(name, payload, 'image/jpeg')}, **headers,
+        )
+
+    def test_stage_histograms(self):
+        self.check_in()
+
+        text = self.client.get(reverse('metrics')).content.decode()
+        for stage in ('gallery.load', 'recognize', 'decode', 'encode', 'match', 'db.punch'):
+            self.assertIn(f'pipeline_stage_duration_seconds_count{{stage="{stage}"}} 1', text)
+        self.assertIn('recognition_gallery_size_count 1', text)
+        self.assertIn('recognition_gallery_size_sum 3', text)
+        self.assertIn('recognition_image_pixels_sum 307200', text)
+
+    @override_settings(TRACING_HEADER=True)
+    def test_server_timing_header(self):
+        response = self.check_in()
+
+        self.assertIn('gallery-load;dur=', response['Server-Timing'])
+        self.assertIn('db-punch;dur=', response['Server-Timing'])
+        self.assertEqual(len(response['X-Trace-Id']), 32)
+        # Pages without pipeline stages only report the total
+        self.assertRegex(self.client.get(reverse('home'))['Server-Timing'], r'^total;dur=[\d.]+$')
+
+    def test_otlp_export(self):
+        trace_id = '4bf92f3577b34da6a3ce929d0e0e4736'
+        with tempfile.NamedTemporaryFile(suffix='.jsonl') as output:
+            with override_settings(TRACING_EXPORT_FILE=output.name):
+                self.check_in(HTTP_TRACEPARENT=f'00-{trace_id}-00f067aa0ba902b7-01')
+                # Requests without pipeline spans are not exported
+                self.client.get(reverse('home'))
+            lines = output.read().decode().splitlines()
+
+        self.assertEqual(len(lines), 1)
+        spans = json.loads(lines[0])['resourceSpans'][0]['scopeSpans'][0]['spans']
+        root = spans[0]
+        self.assertEqual(root['name'], 'mark_attendance')
+        self.assertEqual(root['parentSpanId'], '00f067aa0ba902b7')
+        self.assertEqual({span['traceId'] for span in spans}, {trace_id})
+        by_name = {span['name']: span for span in spans}
+        self.assertEqual(by_name['match']['parentSpanId'], by_name['recognize']['spanId'])
+        self.assertEqual(by_name['recognize']['parentSpanId'], root['spanId'])
+        self.assertIn({'key': 'gallery.size', 'value': {'intValue': '3'}}, by_name['gallery.load']['attributes'])
+
+
+class LoggingTests(SimpleTestCase):
+    def make_record(self, message='Face registered', **fields):
+        return logging.makeLogRecord({'name': 'attendance', 'levelname': 'INFO', 'msg': message, **fields})
+
+    def test_json_formatter_includes_fields(self):
+        line = JsonFormatter().format(self.make_record(employee_id='EMP0001', gallery_size=3))
+        data = json.loads(line)
+        self.assertEqual(data['message'], 'Face registered')
+        self.assertEqual(data['employee_id'], 'EMP0001')
+        self.assertEqual(data['gallery_size'], 3)
+
+    def test_rotation_shared_between_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'app.log')
+            # Two handlers on one file stand in for two worker processes
+            first = LockedRotatingFileHandler(path, maxBytes=200, backupCount=3)
+            second = LockedRotatingFileHandler(path, maxBytes=200, backupCount=3)
+            try:
+                for number in range(20):
+                    handler = first if number % 2 else second
+                    handler.emit(self.make_record(f'line {number:02d} ' + 'x' * 40))
+            finally:
+                first.close()
+                second.close()
+
+            files = sorted(name for name in os.listdir(directory) if not name.endswith('.lock'))
+            lines = []
+            for name in files:
+                with open(os.path.join(directory, name)) as handle:
+                    lines += handle.read().splitlines()
+                self.assertLess(os.path.getsize(os.path.join(directory, name)), 200)
+
+        self.assertEqual(files, ['app.log', 'app.log.1', 'app.log.2', 'app.log.3'])
+        # Nothing overwritten but what rotated past backupCount
+        self.assertEqual(len(lines), len(set(lines)))
+        self.assertIn('line 19 ' + 'x' * 40, lines)
+
+    def test_records_are_formatted_on_the_listener_thread(self):
+        threads = []
+
+        class Recorder(logging.Handler):
+            def emit(self, record):
+                threads.append((threading.current_thread().name, self.format(record)))
+
+        logger = logging.getLogger('core.tests.background')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(Recorder())
+        listeners = start_background_logging([logger.name])
+        try:
+            logger.info("Recognized %s", 'EMP0001')
+        finally:
+            for listener in listeners:
+                listener.stop()
+                log._listeners.remove(listener)
+            logger.handlers.clear()
+
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0][0], threading.current_thread().name)
+        self.assertEqual(threads[0][1], 'Recognized EMP0001')
+
+
+class SQLiteProfileTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'db.sqlite3')
+
+    def tearDown(self):
+        self.directory.cleanup()
+        cache.clear()
+
+    def pragmas(self):
+        wrapper = DatabaseWrapper(dict(connection.settings_dict, NAME=self.path), alias='pragma_test')
+        try:
+            with wrapper.cursor() as cursor:
+                return {
+                    name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                    for name in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size')
+                }
+        finally:
+            wrapper.close()
+
+    def test_connection_hook_applies_pragmas(self):
+        with self.settings(SQLITE_TUNING=False):
+            self.assertEqual(self.pragmas()['journal_mode'], 'delete')
+        with self.settings(SQLITE_TUNING=True, SQLITE_BUSY_TIMEOUT=7000, SQLITE_CACHE_SIZE_KB=2048):
+            # synchronous: 1 = NORMAL
+            self.assertEqual(self.pragmas(), {
+                'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 7000, 'cache_size': -2048,
+            })
+
+    def test_benchmark_reports_both_profiles(self):
+        call_command('populate_sample_data', '--employees', '5', '--days', '3', '--encoding-dim', '4', stdout=StringIO())
+        # backup() would wait for the test transaction; a dump reads through
+        # it (minus the FTS5 search index, which does not dump cleanly)
+        target = sqlite3.connect(self.path)
+        target.executescript('\n'.join(
+            statement for statement in connection.connection.iterdump() if 'users_employee_search' not in statement
+        ))
+        target.close()
+
+        report = benchmark(self.path, readers=1, writers=1, duration=0.3)
+
+        self.assertEqual([result['profile'] for result in report['profiles']], ['default', 'tuned'])
+        for result in report['profiles']:
+            self.assertGreater(result['read']['operations'], 0)
+            self.assertGreater(result['write']['operations'], 0)
+            self.assertEqual(result['write']['errors'], 0)
+        # The source file is only copied
+        self.assertEqual(sqlite3.connect(self.path).execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+
+
+@override_settings(DATABASE_ROUTERS=['core.routers.ReplicaRouter'])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Primary and replica as two SQLite files; the replica only changes on sync()"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.primary = os.path.join(self.directory.name, 'primary.sqlite3')
+        self.replica = os.path.join(self.directory.name, 'replica.sqlite3')
+        self.staff = CustomUser.objects.create_user(username='staff', is_staff=True)
+        self.employee = Employee.objects.create(
+            user=CustomUser.objects.create_user(username='alice'), employee_id='EMP0001',
+        )
+        connections.settings['replica'] = dict(connections['default'].settings_dict, NAME=self.replica)
+        self.sync()
+        self.client.force_login(self.staff)
+
+    def tearDown(self):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        self.directory.cleanup()
+        cache.clear()
+
+    def sync(self):
+        # The in-memory test database -> file -> replica, like replication would
+        target = sqlite3.connect(self.primary)
+        connection.connection.backup(target)
+        target.close()
+        connections['replica'].close()
+        copy_database(self.primary, self.replica)
+
+    def record_ids(self, response):
+        return [record.employee.employee_id for record in response.context['records']]
+
+    def test_reporting_reads_use_replica_until_client_writes(self):
+        Attendance.objects.create(employee=self.employee, status='present')
+        records = reverse('attendance_records')
+
+        # Not replicated yet
+        self.assertEqual(self.record_ids(self.client.get(records)), [])
+        response = self.client.post(reverse('manual_attendance'), {
+            'employee_id': 'EMP0001', 'date': timezone.now().date() - timedelta(days=1), 'status': 'present',
+        })
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+
+        # Pinned to the primary: the client sees its own writes
+        self.assertEqual(self.record_ids(self.client.get(records)), ['EMP0001', 'EMP0001'])
+        del self.client.cookies[REPLICA_PIN_COOKIE]
+        self.assertEqual(self.record_ids(self.client.get(records)), [])
+
+        self.sync()
+        self.assertEqual(len(self.record_ids(self.client.get(records))), 2)
+
+    def test_writes_and_transactions_stay_on_primary(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Attendance), 'default')
+        with replica_reads() as state:
+            self.assertEqual(router.db_for_read(Attendance), 'replica')
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Attendance), 'default')
+            self.assertEqual(router.db_for_write(Attendance), 'default')
+            # Sticky after a write
+            self.assertTrue(state.wrote)
+            self.assertEqual(router.db_for_read(Attendance), 'default')
+        with replica_reads(sticky=False):
+            router.db_for_write(Attendance)
+            self.assertEqual(router.db_for_read(Attendance), 'replica')
+
+    # USE_REDIS: a shared cache, so only the replica shortens the entries
+    @override_settings(REPLICA_CACHE_TIMEOUT=5, USE_REDIS=True)
+    def test_caches_filled_from_replica_expire_soon(self):
+        def timeouts():
+            return [call.args[-1] for call in set_.call_args_list + set_many.call_args_list]
+
+        with mock.patch.object(cache, 'set', wraps=cache.set) as set_, \
+                mock.patch.object(cache, 'set_many', wraps=cache.set_many) as set_many:
+            with replica_reads():
+                cached_dashboard_stats(days=7)
+                get_employee_stats(self.employee)
+                CachedModelBackend().get_user(self.staff.pk)
+            self.assertEqual(timeouts(), [5, 5, 5])
+
+            cache.clear()
+            set_.reset_mock()
+            set_many.reset_mock()
+            cached_dashboard_stats(days=7)
+            get_employee_stats(self.employee)
+            CachedModelBackend().get_user(self.staff.pk)
+            self.assertNotIn(5, timeouts())
@@ -0,0 +1,196 @@
+"""
+Lightweight spans for the recognition pipeline.
+
+``with span('detect') as s: ... s.set('faces.count', n)`` times a stage.
+Every span feeds the pipeline_stage_duration_seconds histogram of
+core.metrics, and known attributes (image size, faces, gallery size) feed
+their own histograms. Inside a request (TracingMiddleware) the spans also
+form a trace: optionally summarized in a Server-Timing response header,
+and appended to TRACING_EXPORT_FILE as OpenTelemetry (OTLP/JSON) lines.
+Costs a few microseconds per span, so it can stay on in production.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .metrics import store
+
+# Span attributes that are also recorded as histograms
+ATTRIBUTE_HISTOGRAMS = {
+    'image.pixels': 'recognition_image_pixels',
+    'faces.count': 'recognition_faces_detected',
+    'gallery.size': 'recognition_gallery_size',
+}
+
+SERVICE_NAME = 'face_attendance_system'
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+
+current_trace = ContextVar('current_trace', default=None)
+current_span = ContextVar('current_span', default=None)
+
+_export_lock = threading.Lock()
+
+
+def _new_id(length):
+    return os.urandom(length).hex()
+
+
+class Span:
+    __slots__ = ('name', 'span_id', 'parent_id', 'kind', 'start_ns', 'end_ns', 'attributes', 'error')
+
+    def __init__(self, name, parent_id=None, kind=KIND_INTERNAL, **attributes):
+        self.name = name
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def duration(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+
+class Trace:
+    """Spans of one request; ids follow W3C trace context so traces can be joined"""
+
+    def __init__(self, name, traceparent=None):
+        self.trace_id, parent_id = _parse_traceparent(traceparent) or (_new_id(16), None)
+        self.root = Span(name, parent_id=parent_id, kind=KIND_SERVER)
+        self.spans = [self.root]
+
+
+def _parse_traceparent(value):
+    # version-traceid-parentid-flags, e.g. 00-4bf9...-00f0...-01
+    parts = (value or '').split('-')
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16 and set(parts[1]) != {'0'}:
+        return parts[1], parts[2]
+    return None
+
+
+def tracing_enabled():
+    return getattr(settings, 'TRACING_ENABLED', True)
+
+
+def _record(finished):
+    store.observe('pipeline_stage_duration_seconds', {'stage': finished.name}, finished.duration)
+    for key, metric in ATTRIBUTE_HISTOGRAMS.items():
+        if key in finished.attributes:
+            store.observe(metric, {}, finished.attributes[key])
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a pipeline stage (a no-op object when TRACING_ENABLED is False)"""
+    if not tracing_enabled():
+        yield Span(name)
+        return
+
+    trace = current_trace.get()
+    parent = current_span.get()
+    current = Span(name, parent_id=parent.span_id if parent else None, **attributes)
+    token = current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        current_span.reset(token)
+        current.end_ns = time.time_ns()
+        _record(current)
+        if trace is not None:
+            trace.spans.append(current)
+
+
+def start_trace(name, traceparent=None):
+    trace = Trace(name, traceparent)
+    return trace, current_trace.set(trace), current_span.set(trace.root)
+
+
+def finish_trace(trace, tokens):
+    current_trace.reset(tokens[0])
+    current_span.reset(tokens[1])
+    trace.root.end_ns = time.time_ns()
+
+
+def server_timing(trace):
+    """Server-Timing header value: total time per stage, in milliseconds"""
+    totals = {}
+    for item in trace.spans[1:]:
+        totals[item.name] = totals.get(item.name, 0) + item.duration
+    entries = [f'{name.replace(".", "-")};dur={seconds * 1000:.2f}' for name, seconds in totals.items()]
+    entries.append(f'total;dur={trace.root.duration * 1000:.2f}')
+    return ', '.join(entries)
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+def otlp_json(trace):
+    """The trace as an OTLP/JSON ExportTraceServiceRequest"""
+    spans = []
+    for item in trace.spans:
+        data = {
+            'traceId': trace.trace_id,
+            'spanId': item.span_id,
+            'name': item.name,
+            'kind': item.kind,
+            'startTimeUnixNano': str(item.start_ns),
+            'endTimeUnixNano': str(item.end_ns or item.start_ns),
+            'attributes': [_attribute(key, value) for key, value in item.attributes.items()],
+            # STATUS_CODE_ERROR = 2, STATUS_CODE_UNSET = 0
+            'status': {'code': 2, 'message': item.error} if item.error else {'code': 0},
+        }
+        if item.parent_id:
+            data['parentSpanId'] = item.parent_id
+        spans.append(data)
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [
+                _attribute('service.name', SERVICE_NAME),
+                _attribute('process.pid', os.getpid()),
+            ]},
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': spans}],
+        }],
+    }
+
+
+def export(trace):
+    """
+    Append the trace to TRACING_EXPORT_FILE as one JSON line (the OTel
+    collector's file exporter format). One O_APPEND write per trace keeps
+    lines from several worker processes intact.
+    """
+    path = getattr(settings, 'TRACING_EXPORT_FILE', '')
+    if not path:
+        return
+    line = (json.dumps(otlp_json(trace), separators=(',', ':')) + '\n').encode()
+    with _export_lock:
+        handle = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(handle, line)
+        finally:
+            os.close(handle)
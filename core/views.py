@@ -1,10 +1,13 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from users.models import Employee, Department
 from attendance.models import Attendance
-from django.utils import timezone
-from django.db.models import Count, Q
-from datetime import timedelta
+from attendance.stats import cached_dashboard_stats
+from .metrics import render_prometheus, store
+from .routers import reads_from_replica
 import json
 
 
@@ -13,63 +16,41 @@ def home(request):
 
 
 @login_required
+@reads_from_replica
 def dashboard(request):
-    # Get statistics
-    total_employees = Employee.objects.filter(is_active=True).count()
-    total_departments = Department.objects.count()
-
-    today = timezone.now().date()
-    present_today = Attendance.objects.filter(date=today, status='present').count()
-
-    employees_with_faces = Employee.objects.filter(face_encoding__isnull=False).count()
+    stats = cached_dashboard_stats(days=7)
 
     # Recent attendance (last 10 records)
     recent_attendance = Attendance.objects.select_related(
         'employee__user', 'employee__department'
     ).order_by('-date', '-time_in')[:10]
 
-    # Department-wise stats
-    department_stats = Department.objects.annotate(
-        employee_count=Count('employee'),
-        present_today_count=Count(
-            'employee__attendance',
-            filter=Q(employee__attendance__date=today, employee__attendance__status='present')
-        )
-    )
-
-    # Weekly attendance trend (last 7 days)
-    dates = []
-    present_counts = []
-
-    for i in range(7):
-        date = today - timedelta(days=i)
-        dates.append(date.strftime('%a'))
-        count = Attendance.objects.filter(date=date, status='present').count()
-        present_counts.append(count)
-
-    dates.reverse()
-    present_counts.reverse()
-
-    # For the weekly trend in the template (alternative format)
-    weekly_trend = []
-    for i in range(6, -1, -1):
-        date = today - timedelta(days=i)
-        count = Attendance.objects.filter(date=date, status='present').count()
-        weekly_trend.append((date.strftime("%Y-%m-%d"), count))
-
     context = {
-        'total_employees': total_employees,
-        'total_departments': total_departments,
-        'present_today': present_today,
-        'employees_with_faces': employees_with_faces,
+        'total_employees': stats.total_employees,
+        'total_departments': stats.total_departments,
+        'present_today': stats.present_today,
+        'employees_with_faces': stats.employees_with_faces,
         'recent_attendance': recent_attendance,
-        'department_stats': department_stats,
-        'today': today,
-        'attendance_dates': json.dumps(dates),
-        'attendance_counts': json.dumps(present_counts),
-        'weekly_trend': weekly_trend,
+        'department_stats': stats.department_stats,
+        'today': stats.today,
+        'attendance_dates': json.dumps(stats.trend_labels),
+        'attendance_counts': json.dumps(stats.trend_counts),
+        'weekly_trend': stats.weekly_trend,
     }
 
     # ✅ CORRECTED TEMPLATE PATH
     return render(request, 'attendance/dashboard.html', context)
 
+
+def metrics(request):
+    """
+    Request metrics in the Prometheus text format, for staff users or a
+    scraper sending ``Authorization: Bearer <METRICS_TOKEN>``
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    authorization = request.headers.get('Authorization', '')
+    scraper = bool(token) and hmac.compare_digest(authorization, f'Bearer {token}')
+    if not scraper and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponse('Access denied\n', status=403, content_type='text/plain')
+
+    return HttpResponse(render_prometheus(*store.collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
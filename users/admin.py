@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Department, Employee
+from import_export.admin import ImportExportModelAdmin
+from .models import CustomUser, Department, Employee, IdSequence
+from .resources import EmployeeResource
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
@@ -12,6 +14,11 @@ class DepartmentAdmin(admin.ModelAdmin):
     list_display = ['name', 'description']
 
 @admin.register(Employee)
-class EmployeeAdmin(admin.ModelAdmin):
+class EmployeeAdmin(ImportExportModelAdmin):
+    resource_classes = [EmployeeResource]
     list_display = ['employee_id', 'user', 'department', 'is_active']
-    list_filter = ['department', 'is_active']
\ No newline at end of file
+    list_filter = ['department', 'is_active']
+
+@admin.register(IdSequence)
+class IdSequenceAdmin(admin.ModelAdmin):
+    list_display = ['name', 'value']
\ No newline at end of file
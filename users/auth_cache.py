@@ -0,0 +1,49 @@
+"""
+Opt-in fast authentication (FAST_AUTH).
+
+CachedModelBackend keeps each signed-in CustomUser in the cache together
+with its Employee and department, so with cached_db sessions a logged-in
+request reaches the view without a single query. Saves and deletes of the
+user, the employee or the department drop the entry (see users.signals);
+AUTH_USER_CACHE_TIMEOUT bounds how long a queryset.update(), which sends
+no signals, can go unnoticed.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+
+from core.routers import cache_timeout
+
+AUTH_USER_CACHE_KEY = 'users:auth'
+
+
+def user_cache_key(user_id):
+    return f'{AUTH_USER_CACHE_KEY}:{user_id}'
+
+
+def invalidate_cached_users(user_ids):
+    """Drop the cached users once the current transaction commits"""
+    keys = [user_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose get_user() reads through the cache"""
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = (
+                get_user_model()._default_manager
+                .select_related('employee__department')
+                .filter(pk=user_id)
+                .first()
+            )
+            if user is None:
+                return None
+            cache.set(key, user, cache_timeout(getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300)))
+        return user if self.user_can_authenticate(user) else None
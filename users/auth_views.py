@@ -4,10 +4,16 @@ from django.contrib.auth import login, authenticate, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import PasswordChangeForm
 from django.core.mail import send_mail
+from django.core.paginator import Paginator
 from django.conf import settings
-from .models import CustomUser, Employee, Department
+from django.db import transaction
+from django.http import JsonResponse
+from .models import CustomUser, Employee, Department, next_employee_ids
+from .search import filter_employees, search_employees
 import re
 
+EMPLOYEES_PER_PAGE = 50
+
 
 def register(request):
     """User registration view"""
@@ -55,27 +61,27 @@ def register(request):
                     messages.error(request, error)
                 return redirect('users:register')
 
-            # Create user
-            user = CustomUser.objects.create_user(
-                username=username,
-                email=email,
-                password=password1,
-                first_name=first_name,
-                last_name=last_name,
-                phone=phone,
-                user_type='employee'
-            )
-
-            # Generate employee ID
-            employee_count = Employee.objects.count()
-            employee_id = f"EMP{str(employee_count + 1).zfill(4)}"
-
-            # Create employee profile
-            Employee.objects.create(
-                user=user,
-                employee_id=employee_id,
-                is_active=True
-            )
+            with transaction.atomic():
+                # Create user
+                user = CustomUser.objects.create_user(
+                    username=username,
+                    email=email,
+                    password=password1,
+                    first_name=first_name,
+                    last_name=last_name,
+                    phone=phone,
+                    user_type='employee'
+                )
+
+                # Generate employee ID from the sequence (count() + 1 raced)
+                employee_id = next_employee_ids(1)[0]
+
+                # Create employee profile
+                Employee.objects.create(
+                    user=user,
+                    employee_id=employee_id,
+                    is_active=True
+                )
 
             # Send welcome email
             try:
@@ -109,7 +115,7 @@ def register(request):
 def profile(request):
     """User profile view"""
     try:
-        employee = Employee.objects.get(user=request.user)
+        employee = request.user.employee
     except Employee.DoesNotExist:
         messages.error(request, "Employee profile not found!")
         return redirect('dashboard')
@@ -124,49 +130,17 @@ def profile(request):
             request.user.save()
 
             messages.success(request, "✅ Profile updated successfully!")
-            return redirect('profile')
+            return redirect('users:profile')
 
         except Exception as e:
             messages.error(request, f"❌ Error updating profile: {str(e)}")
 
-    # Get attendance statistics
-    from attendance.models import Attendance, LeaveRequest
-    from django.utils import timezone
-    from datetime import timedelta
-
-    today = timezone.now().date()
-    current_month = timezone.now().month
-    current_year = timezone.now().year
-
-    # Monthly attendance
-    monthly_attendance = Attendance.objects.filter(
-        employee=employee,
-        date__year=current_year,
-        date__month=current_month
-    ).count()
-
-    # Total attendance
-    total_attendance = Attendance.objects.filter(employee=employee).count()
-
-    # Pending leaves
-    pending_leaves = LeaveRequest.objects.filter(
-        employee=employee,
-        status='pending'
-    ).count()
-
-    # Approved leaves this year
-    approved_leaves = LeaveRequest.objects.filter(
-        employee=employee,
-        status='approved',
-        start_date__year=current_year
-    ).count()
+    # Get attendance statistics (cached per employee)
+    from attendance.stats import get_employee_stats
 
     context = {
         'employee': employee,
-        'monthly_attendance': monthly_attendance,
-        'total_attendance': total_attendance,
-        'pending_leaves': pending_leaves,
-        'approved_leaves': approved_leaves,
+        **get_employee_stats(employee),
     }
 
     return render(request, 'users/profile.html', context)
@@ -181,7 +155,7 @@ def change_password(request):
             user = form.save()
             update_session_auth_hash(request, user)
             messages.success(request, "✅ Password changed successfully!")
-            return redirect('profile')
+            return redirect('users:profile')
         else:
             for error in form.errors.values():
                 messages.error(request, error)
@@ -214,16 +188,10 @@ def employee_list(request):
     elif has_face == 'no':
         employees = employees.filter(face_encoding__isnull=True)
 
-    # Search functionality
+    # Search functionality (indexed, see users.search)
     search_query = request.GET.get('search')
     if search_query:
-        employees = employees.filter(
-            user__first_name__icontains=search_query
-        ) | employees.filter(
-            user__last_name__icontains=search_query
-        ) | employees.filter(
-            employee_id__icontains=search_query
-        )
+        employees = filter_employees(employees, search_query)
 
     # Get all departments for filter
     departments = Department.objects.all()
@@ -233,8 +201,22 @@ def employee_list(request):
     with_faces = Employee.objects.filter(is_active=True, face_encoding__isnull=False).count()
     without_faces = total_employees - with_faces
 
+    page = Paginator(employees, EMPLOYEES_PER_PAGE).get_page(request.GET.get('page'))
+
+    # Attendance statistics for the employees on this page, from the same cache
+    from attendance.stats import get_employee_stats_bulk
+
+    stats = get_employee_stats_bulk([employee.pk for employee in page])
+    for employee in page:
+        employee.stats = stats.get(employee.pk, {})
+
+    # Filters without the page number, for building the page links
+    filters = request.GET.copy()
+    filters.pop('page', None)
+
     context = {
-        'employees': employees,
+        'employees': page,
+        'filter_query': filters.urlencode(),
         'departments': departments,
         'total_employees': total_employees,
         'with_faces': with_faces,
@@ -244,6 +226,35 @@ def employee_list(request):
     return render(request, 'users/employee_list.html', context)
 
 
+@login_required
+def employee_search(request):
+    """
+    Employee autocomplete: ?q=<prefix>&limit=<n>, optionally
+    &has_face=yes|no. Returns active employees matching every word.
+    """
+    try:
+        limit = int(request.GET.get('limit', 10))
+    except ValueError:
+        limit = 10
+
+    employees = Employee.objects.filter(is_active=True)
+    has_face = request.GET.get('has_face')
+    if has_face == 'yes':
+        employees = employees.filter(face_encoding__isnull=False)
+    elif has_face == 'no':
+        employees = employees.filter(face_encoding__isnull=True)
+
+    results = [
+        {
+            'employee_id': employee.employee_id,
+            'name': employee.user.get_full_name(),
+            'department': employee.department.name if employee.department else None,
+        }
+        for employee in search_employees(employees, request.GET.get('q', ''), limit)
+    ]
+    return JsonResponse({'results': results})
+
+
 def password_reset_request(request):
     """Password reset request view"""
     if request.method == 'POST':
@@ -266,4 +277,4 @@ def password_reset_request(request):
                              "✅ If an account exists with this email, password reset instructions have been sent!")
             return redirect('login')
 
-    return render(request, 'registration/password_reset.html')
\ No newline at end of file
+    return render(request, 'users/password_reset.html')
\ No newline at end of file
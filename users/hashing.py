@@ -0,0 +1,49 @@
+"""
+Process-pool password hashing for bulk imports.
+
+Kept free of model imports: spawned workers unpickle these functions
+before Django is set up.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _setup_worker():
+    # Spawned workers start a fresh interpreter: load settings for the hashers
+    import django
+
+    django.setup()
+
+
+def _make_password(password):
+    from django.contrib.auth.hashers import make_password
+
+    return make_password(password)
+
+
+def password_pool(workers=None):
+    """
+    Process pool for make_password: PBKDF2 is CPU bound, so threads would
+    serialize on the GIL. Spawned rather than forked so children never
+    share the parent's database connections.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_setup_worker,
+    )
+
+
+def hash_passwords(passwords, pool=None):
+    """make_password for each password; blank ones become unusable passwords"""
+    from django.contrib.auth.hashers import make_password
+
+    to_hash = [password for password in passwords if password]
+    if pool is not None and to_hash:
+        # A few chunks per worker: fewer round trips, still balanced
+        chunksize = max(1, len(to_hash) // ((os.cpu_count() or 1) * 4))
+        hashed = iter(pool.map(_make_password, to_hash, chunksize=chunksize))
+    else:
+        hashed = iter([make_password(password) for password in to_hash])
+    return [next(hashed) if password else make_password(None) for password in passwords]
@@ -0,0 +1,152 @@
+import csv
+from pathlib import Path
+
+from django.db import transaction
+
+from attendance.stats import invalidate_dashboard_stats
+
+from .hashing import hash_passwords, password_pool
+from .models import CustomUser, Department, Employee, claim_employee_ids, next_employee_ids
+
+IMPORT_BATCH_SIZE = 1000
+
+IMPORT_COLUMNS = ['username', 'email', 'first_name', 'last_name', 'phone', 'department', 'password', 'employee_id']
+
+
+def read_rows(path):
+    """Yield one dict per data row of a .csv or .xlsx file (headers lowercased)"""
+    path = Path(path)
+    if path.suffix.lower() == '.xlsx':
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [str(header or '').strip().lower() for header in next(rows, [])]
+        for values in rows:
+            yield {
+                header: '' if value is None else str(value).strip()
+                for header, value in zip(headers, values)
+            }
+        workbook.close()
+        return
+
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        for row in csv.DictReader(handle):
+            yield {
+                (key or '').strip().lower(): (value or '').strip()
+                for key, value in row.items()
+            }
+
+
+def departments_by_name(names):
+    """Department per name, creating the missing ones in one bulk insert"""
+    names = {name for name in names if name}
+    departments = {d.name: d for d in Department.objects.filter(name__in=names)}
+    missing = [Department(name=name) for name in sorted(names - departments.keys())]
+    if missing:
+        Department.objects.bulk_create(missing)
+        departments.update({d.name: d for d in Department.objects.filter(name__in=[d.name for d in missing])})
+    return departments
+
+
+def create_users(rows, pool=None):
+    """
+    Bulk-create users for ``rows`` whose username is new and not repeated
+    within the batch; returns (created users by username, skipped rows).
+    """
+    usernames = [row.get('username', '') for row in rows]
+    existing = set(CustomUser.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+    new_rows, skipped, seen = [], [], set()
+    for row in rows:
+        username = row.get('username', '')
+        if not username or username in existing or username in seen:
+            skipped.append(row)
+        else:
+            seen.add(username)
+            new_rows.append(row)
+
+    passwords = hash_passwords([row.get('password', '') for row in new_rows], pool)
+    users = CustomUser.objects.bulk_create([
+        CustomUser(
+            username=row['username'],
+            email=row.get('email', '').lower(),
+            first_name=row.get('first_name', ''),
+            last_name=row.get('last_name', ''),
+            phone=row.get('phone') or None,
+            user_type='employee',
+            password=password,
+        )
+        for row, password in zip(new_rows, passwords)
+    ])
+    return {user.username: user for user in users}, skipped
+
+
+def import_batch(rows, pool=None):
+    """Import one batch in a transaction; returns (created, skipped)"""
+    with transaction.atomic():
+        users, skipped = create_users(rows, pool)
+        rows = [row for row in rows if row.get('username') in users]
+
+        used = set(Employee.objects.filter(
+            employee_id__in=[row['employee_id'] for row in rows if row.get('employee_id')]
+        ).values_list('employee_id', flat=True))
+        # IDs missing, taken or repeated within the batch come from the sequence
+        needs_id, explicit = [], []
+        for row in rows:
+            if not row.get('employee_id') or row['employee_id'] in used:
+                needs_id.append(row)
+            else:
+                used.add(row['employee_id'])
+                explicit.append(row['employee_id'])
+        claim_employee_ids(explicit)
+        for row, employee_id in zip(needs_id, next_employee_ids(len(needs_id)) if needs_id else []):
+            row['employee_id'] = employee_id
+
+        departments = departments_by_name(row.get('department') for row in rows)
+        Employee.objects.bulk_create([
+            Employee(
+                user=users[row['username']],
+                employee_id=row['employee_id'],
+                department=departments.get(row.get('department')),
+                is_active=True,
+            )
+            for row in rows
+        ])
+        invalidate_dashboard_stats()
+    return len(rows), len(skipped)
+
+
+def import_employees(rows, batch_size=IMPORT_BATCH_SIZE, workers=None, progress=None):
+    """
+    Import employees (and their user accounts) from an iterable of dicts
+    with IMPORT_COLUMNS keys, in transactions of ``batch_size`` rows.
+
+    Passwords are hashed in a process pool of ``workers`` (0 hashes in
+    this process). Rows with a taken or repeated username are skipped;
+    employee IDs missing, already taken or repeated come from the sequence.
+    Returns (created, skipped).
+    """
+    created = skipped = 0
+    pool = password_pool(workers) if workers != 0 else None
+
+    try:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                counts = import_batch(batch, pool)
+                created, skipped = created + counts[0], skipped + counts[1]
+                batch = []
+                if progress:
+                    progress(created, skipped)
+        if batch:
+            counts = import_batch(batch, pool)
+            created, skipped = created + counts[0], skipped + counts[1]
+            if progress:
+                progress(created, skipped)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return created, skipped
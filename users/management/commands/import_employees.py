@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.importer import IMPORT_BATCH_SIZE, IMPORT_COLUMNS, import_employees, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk import employees from a CSV or XLSX file with the columns '
+        + ', '.join(IMPORT_COLUMNS) + ' (only username is required)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file to import')
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+            help=f'Rows per transaction (default: {IMPORT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Password hashing processes (default: CPU count, 0 hashes in this process)',
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'File not found: {path}')
+        if path.suffix.lower() not in ('.csv', '.xlsx'):
+            raise CommandError('Only .csv and .xlsx files can be imported')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        def progress(created, skipped):
+            self.stdout.write(f'{created} imported, {skipped} skipped')
+
+        created, skipped = import_employees(
+            read_rows(path),
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created} employees ({skipped} skipped: duplicate or missing username)'
+        ))
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0002_employee_face_image"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                fields=["is_active", "employee_id"], name="employee_active_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                condition=models.Q(
+                    ("face_encoding__isnull", False), ("is_active", True)
+                ),
+                fields=["employee_id"],
+                name="employee_active_face_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,92 @@
+from django.db import migrations
+
+SEARCH_TABLE = 'users_employee_search'
+
+# Row for one employee, selected by the WHERE clause appended to it
+SEARCH_ROW = (
+    f"INSERT INTO {SEARCH_TABLE} (rowid, name, employee_id, department) "
+    "SELECT e.id, u.first_name || ' ' || u.last_name, e.employee_id, COALESCE(d.name, '') "
+    "FROM users_employee e "
+    "JOIN users_customuser u ON u.id = e.user_id "
+    "LEFT JOIN users_department d ON d.id = e.department_id"
+)
+
+SQLITE_FORWARD = [
+    f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(name, employee_id, department, tokenize = 'unicode61')",
+    SEARCH_ROW,
+    f"""CREATE TRIGGER users_employee_search_insert AFTER INSERT ON users_employee BEGIN
+        {SEARCH_ROW} WHERE e.id = NEW.id;
+    END""",
+    f"""CREATE TRIGGER users_employee_search_update AFTER UPDATE ON users_employee BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id;
+        {SEARCH_ROW} WHERE e.id = NEW.id;
+    END""",
+    f"""CREATE TRIGGER users_employee_search_delete AFTER DELETE ON users_employee BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id;
+    END""",
+    f"""CREATE TRIGGER users_customuser_search_update AFTER UPDATE OF first_name, last_name ON users_customuser BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid IN (SELECT id FROM users_employee WHERE user_id = NEW.id);
+        {SEARCH_ROW} WHERE e.user_id = NEW.id;
+    END""",
+    f"""CREATE TRIGGER users_department_search_update AFTER UPDATE OF name ON users_department BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid IN (SELECT id FROM users_employee WHERE department_id = NEW.id);
+        {SEARCH_ROW} WHERE e.department_id = NEW.id;
+    END""",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS users_department_search_update',
+    'DROP TRIGGER IF EXISTS users_customuser_search_update',
+    'DROP TRIGGER IF EXISTS users_employee_search_delete',
+    'DROP TRIGGER IF EXISTS users_employee_search_update',
+    'DROP TRIGGER IF EXISTS users_employee_search_insert',
+    f'DROP TABLE IF EXISTS {SEARCH_TABLE}',
+]
+
+# Expressions match Django's icontains SQL (UPPER(col::text) LIKE UPPER(...))
+POSTGRES_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS users_customuser_first_name_trgm '
+    'ON users_customuser USING gin (UPPER(first_name::text) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS users_customuser_last_name_trgm '
+    'ON users_customuser USING gin (UPPER(last_name::text) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS users_employee_employee_id_trgm '
+    'ON users_employee USING gin (UPPER(employee_id::text) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS users_department_name_trgm '
+    'ON users_department USING gin (UPPER(name::text) gin_trgm_ops)',
+]
+
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS users_department_name_trgm',
+    'DROP INDEX IF EXISTS users_employee_employee_id_trgm',
+    'DROP INDEX IF EXISTS users_customuser_last_name_trgm',
+    'DROP INDEX IF EXISTS users_customuser_first_name_trgm',
+]
+
+
+def run(statements_by_vendor):
+    def apply(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        statements = statements_by_vendor.get(vendor, [])
+        if vendor == 'sqlite' and statements is SQLITE_FORWARD:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+                if not cursor.fetchone()[0]:
+                    # No FTS5 in this SQLite build: users.search falls back to LIKE
+                    return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0003_employee_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:17
+
+import re
+
+from django.db import migrations, models
+
+
+def seed_employee_ids(apps, schema_editor):
+    """Start the employee ID sequence after the highest existing EMP number"""
+    Employee = apps.get_model("users", "Employee")
+    IdSequence = apps.get_model("users", "IdSequence")
+
+    highest = 0
+    for employee_id in Employee.objects.values_list("employee_id", flat=True).iterator():
+        match = re.fullmatch(r"EMP(\d+)", employee_id)
+        if match:
+            highest = max(highest, int(match.group(1)))
+    IdSequence.objects.create(name="employee_id", value=highest)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0004_employee_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_employee_ids, migrations.RunPython.noop),
+    ]
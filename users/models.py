@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import AbstractUser
 import json
+import re
 
 
 class CustomUser(AbstractUser):
@@ -32,9 +34,28 @@ class Employee(models.Model):
     is_active = models.BooleanField(default=True)
     date_joined = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'employee_id'], name='employee_active_idx'),
+            # Recognition gallery and "faces registered" counts
+            models.Index(
+                fields=['employee_id'],
+                condition=models.Q(is_active=True, face_encoding__isnull=False),
+                name='employee_active_face_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.first_name} {self.user.last_name} ({self.employee_id})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'department_id' in field_names:
+            # The daily attendance summary counts this employee's rows under it
+            instance._loaded_department_id = values[field_names.index('department_id')]
+        return instance
+
     def get_face_encoding_list(self):
         """Convert stored JSON encoding to list"""
         if self.face_encoding:
@@ -49,4 +70,66 @@ class Employee(models.Model):
         if encoding_list:
             self.face_encoding = json.dumps(encoding_list)
         else:
-            self.face_encoding = None
\ No newline at end of file
+            self.face_encoding = None
+
+class IdSequence(models.Model):
+    """Named counter handing out unique ids (e.g. employee IDs) without count() races"""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+    @classmethod
+    def allocate(cls, name, count=1):
+        """
+        Reserve ``count`` consecutive values and return them as a range.
+
+        The UPDATE takes the row lock before the read, so concurrent callers
+        never receive the same values.
+        """
+        with transaction.atomic():
+            if not cls.objects.filter(name=name).update(value=F('value') + count):
+                cls.objects.get_or_create(name=name)
+                cls.objects.filter(name=name).update(value=F('value') + count)
+            last = cls.objects.get(name=name).value
+        return range(last - count + 1, last + 1)
+
+    @classmethod
+    def advance(cls, name, value):
+        """Move the sequence up to ``value`` (never back), so it hands out later values only"""
+        cls.objects.get_or_create(name=name)
+        cls.objects.filter(name=name, value__lt=value).update(value=value)
+
+
+EMPLOYEE_ID_SEQUENCE = 'employee_id'
+EMPLOYEE_ID_PATTERN = re.compile(r'EMP(\d+)')
+
+
+def format_employee_id(number):
+    return f"EMP{str(number).zfill(4)}"
+
+
+def next_employee_ids(count=1):
+    """
+    Allocate ``count`` new employee IDs (EMP0001, EMP0002, ...), skipping
+    any already taken, e.g. typed in by hand in the admin.
+    """
+    employee_ids = []
+    while len(employee_ids) < count:
+        allocated = [
+            format_employee_id(number)
+            for number in IdSequence.allocate(EMPLOYEE_ID_SEQUENCE, count - len(employee_ids))
+        ]
+        taken = set(Employee.objects.filter(employee_id__in=allocated).values_list('employee_id', flat=True))
+        employee_ids.extend(employee_id for employee_id in allocated if employee_id not in taken)
+    return employee_ids
+
+
+def claim_employee_ids(employee_ids):
+    """Move the sequence past explicit EMP IDs (imports) so it never allocates them"""
+    numbers = [
+        int(match.group(1)) for match in map(EMPLOYEE_ID_PATTERN.fullmatch, employee_ids) if match
+    ]
+    if numbers:
+        IdSequence.advance(EMPLOYEE_ID_SEQUENCE, max(numbers))
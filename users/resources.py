@@ -0,0 +1,78 @@
+from import_export import fields, resources
+from import_export.widgets import ForeignKeyWidget
+
+from attendance.stats import invalidate_dashboard_stats
+
+from .hashing import password_pool
+from .importer import create_users, departments_by_name
+from .models import CustomUser, Department, Employee, claim_employee_ids, next_employee_ids
+
+
+class EmployeeResource(resources.ModelResource):
+    """
+    Employee import/export for the admin.
+
+    Import files use the same columns as `manage.py import_employees`:
+    users are created in bulk (passwords hashed in a process pool) and
+    missing employee IDs allocated from the sequence before the rows are
+    imported, with the employees themselves bulk-inserted.
+    """
+    username = fields.Field(
+        attribute='user', column_name='username', widget=ForeignKeyWidget(CustomUser, 'username'),
+    )
+    department = fields.Field(
+        attribute='department', column_name='department', widget=ForeignKeyWidget(Department, 'name'),
+    )
+
+    class Meta:
+        model = Employee
+        fields = ('employee_id', 'username', 'department', 'is_active')
+        export_order = ('employee_id', 'username', 'department', 'is_active')
+        import_id_fields = ('employee_id',)
+        skip_unchanged = True
+        use_bulk = True
+        batch_size = 1000
+
+    def before_import(self, dataset, using_transactions, dry_run, **kwargs):
+        headers = [header.strip().lower() for header in dataset.headers]
+        dataset.headers = headers
+        if 'employee_id' not in headers:
+            dataset.append_col([''] * dataset.height, header='employee_id')
+            headers = dataset.headers
+        if 'is_active' not in headers:
+            dataset.append_col([True] * dataset.height, header='is_active')
+            headers = dataset.headers
+
+        rows = [
+            {header: '' if value is None else str(value).strip() for header, value in zip(headers, values)}
+            for values in dataset
+        ]
+        existing_ids = set(Employee.objects.filter(
+            employee_id__in=[row['employee_id'] for row in rows if row['employee_id']]
+        ).values_list('employee_id', flat=True))
+        # Rows for existing employees update them; only new people need users
+        new_rows = [row for row in rows if row['employee_id'] not in existing_ids]
+
+        if len(new_rows) > 50:
+            with password_pool() as pool:
+                create_users(new_rows, pool)
+        else:
+            create_users(new_rows)
+        departments_by_name(row.get('department') for row in rows)
+
+        needs_id = [row for row in new_rows if not row['employee_id']]
+        claim_employee_ids(row['employee_id'] for row in new_rows if row['employee_id'])
+        for row, employee_id in zip(needs_id, next_employee_ids(len(needs_id)) if needs_id else []):
+            row['employee_id'] = employee_id
+
+        column = headers.index('employee_id')
+        for index, row in enumerate(rows):
+            values = list(dataset[index])
+            values[column] = row['employee_id']
+            dataset[index] = values
+
+    def after_import(self, dataset, result, using_transactions, dry_run, **kwargs):
+        super().after_import(dataset, result, using_transactions, dry_run, **kwargs)
+        # Bulk inserts send no post_save signals
+        if not dry_run:
+            invalidate_dashboard_stats()
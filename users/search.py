@@ -0,0 +1,73 @@
+import re
+
+from django.db import OperationalError, connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# FTS5 table kept in sync with employees, users and departments by the
+# triggers in migration 0004 (SQLite only)
+SEARCH_TABLE = 'users_employee_search'
+
+MAX_RESULTS = 50
+
+_fts5_available = None
+
+
+def search_tokens(query):
+    return re.findall(r'\w+', query or '')[:5]
+
+
+def fts5_available():
+    """Whether the SQLite FTS5 index exists (checked once per process)"""
+    global _fts5_available
+    if _fts5_available is None:
+        if connection.vendor != 'sqlite':
+            _fts5_available = False
+        else:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SEARCH_TABLE])
+                    _fts5_available = cursor.fetchone() is not None
+            except OperationalError:
+                _fts5_available = False
+    return _fts5_available
+
+
+def _match_expression(tokens):
+    # Every token must prefix-match a word in name, employee_id or department
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def filter_employees(employees, query):
+    """
+    Narrow an Employee queryset to those matching every word of ``query``
+    by prefix, over name, employee ID and department.
+
+    Uses the FTS5 index on SQLite and the pg_trgm indexes on PostgreSQL;
+    elsewhere falls back to istartswith lookups.
+    """
+    tokens = search_tokens(query)
+    if not tokens:
+        return employees
+
+    if fts5_available():
+        return employees.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [_match_expression(tokens)]
+        ))
+
+    # icontains is served by the trigram indexes on PostgreSQL
+    lookup = 'icontains' if connection.vendor == 'postgresql' else 'istartswith'
+    for token in tokens:
+        employees = employees.filter(
+            Q(**{f'user__first_name__{lookup}': token})
+            | Q(**{f'user__last_name__{lookup}': token})
+            | Q(**{f'employee_id__{lookup}': token})
+            | Q(**{f'department__name__{lookup}': token})
+        )
+    return employees
+
+
+def search_employees(employees, query, limit=10):
+    """Up to ``limit`` (at most MAX_RESULTS) matches ordered by employee ID"""
+    limit = max(1, min(limit, MAX_RESULTS))
+    return list(filter_employees(employees, query).select_related('user', 'department').order_by('employee_id')[:limit])
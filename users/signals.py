@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .auth_cache import invalidate_cached_users
+from .models import CustomUser, Department, Employee
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Profile edits, password changes, deactivation and last_login updates
+    invalidate_cached_users([instance.pk])
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_cached_employee(sender, instance, **kwargs):
+    invalidate_cached_users([instance.user_id])
+
+
+@receiver(post_save, sender=Department)
+@receiver(pre_delete, sender=Department)
+def invalidate_cached_department(sender, instance, **kwargs):
+    # pre_delete: the employees still point at the department
+    invalidate_cached_users(Employee.objects.filter(department=instance).values_list('user_id', flat=True))
@@ -1,3 +1,216 @@
-from django.test import TestCase
+import os
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .auth_cache import user_cache_key
+from .models import CustomUser, Department, Employee, IdSequence, next_employee_ids
+from .resources import EmployeeResource
+from .search import filter_employees, fts5_available
+
+
+class EmployeeSearchTests(TestCase):
+    def setUp(self):
+        it = Department.objects.create(name='Engineering')
+        hr = Department.objects.create(name='Human Resources')
+        for i, (first, last, department) in enumerate([
+            ('Alice', 'Smith', it), ('Alicia', 'Stone', hr), ('Bob', 'Smithers', it),
+        ]):
+            Employee.objects.create(
+                user=CustomUser.objects.create_user(username=f'user{i}', first_name=first, last_name=last),
+                employee_id=f'EMP{i:04d}',
+                department=department,
+            )
+        self.staff = CustomUser.objects.create_user(username='staff', is_staff=True)
+
+    def matches(self, query):
+        return sorted(filter_employees(Employee.objects.all(), query).values_list('employee_id', flat=True))
+
+    def assert_search(self):
+        self.assertEqual(self.matches('ali'), ['EMP0000', 'EMP0001'])
+        self.assertEqual(self.matches('smith eng'), ['EMP0000', 'EMP0002'])
+        self.assertEqual(self.matches('emp0002'), ['EMP0002'])
+        self.assertEqual(self.matches('human'), ['EMP0001'])
+
+    def test_fts_index_follows_renames(self):
+        self.assertTrue(fts5_available())
+        self.assert_search()
+
+        user = CustomUser.objects.get(first_name='Bob')
+        user.first_name = 'Robert'
+        user.save()
+        Department.objects.filter(name='Human Resources').update(name='People')
+        department = Department.objects.get(name='People')
+        department.name = 'People Ops'
+        department.save()
+
+        self.assertEqual(self.matches('rob'), ['EMP0002'])
+        self.assertEqual(self.matches('people'), ['EMP0001'])
+        self.assertEqual(self.matches('human'), [])
+
+    def test_fallback_without_fts(self):
+        with mock.patch('users.search.fts5_available', return_value=False):
+            self.assert_search()
+
+    def test_autocomplete_endpoint(self):
+        self.client.force_login(self.staff)
+        response = self.client.get('/users/employees/search/', {'q': 'ali', 'limit': 1})
+        self.assertEqual(response.json()['results'], [
+            {'employee_id': 'EMP0000', 'name': 'Alice Smith', 'department': 'Engineering'},
+        ])
+
+
+class EmployeeImportTests(TestCase):
+    def write_csv(self, rows):
+        import csv
+        import tempfile
+
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, newline='')
+        self.addCleanup(os.remove, handle.name)
+        writer = csv.writer(handle)
+        writer.writerow(['Username', 'Email', 'First_Name', 'Last_Name', 'Department', 'Password', 'Employee_ID'])
+        writer.writerows(rows)
+        handle.close()
+        return handle.name
+
+    def test_command_imports_in_batches_with_pooled_hashing(self):
+        Employee.objects.create(user=CustomUser.objects.create_user(username='taken'), employee_id='EMP0007')
+        path = self.write_csv([
+            ['ann', 'Ann@example.com', 'Ann', 'Lee', 'Sales', 'secret123', ''],
+            ['ben', 'ben@example.com', 'Ben', 'Ray', 'Sales', '', 'EMP0007'],
+            ['taken', 'x@example.com', 'Dup', 'User', '', '', ''],
+            ['cid', 'cid@example.com', 'Cid', 'Fox', 'Support', 'hunter22', 'X-1'],
+        ])
+
+        out = StringIO()
+        call_command('import_employees', path, '--batch-size', '2', '--workers', '2', stdout=out)
+
+        self.assertIn('Imported 3 employees (1 skipped', out.getvalue())
+        employees = {e.user.username: e for e in Employee.objects.select_related('user', 'department')}
+        self.assertEqual(employees['ann'].department.name, 'Sales')
+        self.assertTrue(employees['ann'].user.check_password('secret123'))
+        self.assertFalse(employees['ben'].user.has_usable_password())
+        self.assertEqual(employees['cid'].employee_id, 'X-1')
+        self.assertEqual(
+            sorted([employees['ann'].employee_id, employees['ben'].employee_id]), ['EMP0001', 'EMP0002'],
+        )
+
+    def test_register_uses_the_sequence(self):
+        IdSequence.objects.filter(name='employee_id').update(value=41)
+        self.client.post('/users/register/', {
+            'first_name': 'Dee', 'last_name': 'Kay', 'username': 'dee', 'email': 'dee@example.com',
+            'password1': 'longpassword', 'password2': 'longpassword',
+        })
+        self.assertEqual(Employee.objects.get(user__username='dee').employee_id, 'EMP0042')
+
+    def test_register_after_importing_explicit_ids(self):
+        call_command('import_employees', self.write_csv([
+            ['ann', 'ann@example.com', 'Ann', 'Lee', '', '', 'EMP0050'],
+        ]), '--workers', '0', stdout=StringIO())
+
+        self.client.post('/users/register/', {
+            'first_name': 'Dee', 'last_name': 'Kay', 'username': 'dee', 'email': 'dee@example.com',
+            'password1': 'longpassword', 'password2': 'longpassword',
+        })
+        self.assertEqual(Employee.objects.get(user__username='dee').employee_id, 'EMP0051')
+
+    def test_repeated_ids_in_a_batch_come_from_the_sequence(self):
+        call_command('import_employees', self.write_csv([
+            ['ann', 'ann@example.com', 'Ann', 'Lee', '', '', 'EMP0050'],
+            ['ben', 'ben@example.com', 'Ben', 'Ray', '', '', 'EMP0050'],
+        ]), '--workers', '0', stdout=StringIO())
+
+        self.assertEqual(
+            dict(Employee.objects.values_list('user__username', 'employee_id')),
+            {'ann': 'EMP0050', 'ben': 'EMP0051'},
+        )
+
+    def test_allocation_skips_taken_ids(self):
+        Employee.objects.create(user=CustomUser.objects.create_user(username='manual'), employee_id='EMP0001')
+        self.assertEqual(next_employee_ids(2), ['EMP0002', 'EMP0003'])
+
+    def test_admin_resource_creates_users_and_ids(self):
+        import tablib
+
+        dataset = tablib.Dataset(
+            ['eve', 'eve@example.com', 'Eve', 'Ng', 'Ops', 'pass1234'],
+            headers=['username', 'email', 'first_name', 'last_name', 'department', 'password'],
+        )
+        result = EmployeeResource().import_data(dataset, dry_run=False, raise_errors=True)
+
+        self.assertFalse(result.has_errors())
+        employee = Employee.objects.select_related('user', 'department').get()
+        self.assertEqual((employee.user.username, employee.department.name), ('eve', 'Ops'))
+        self.assertTrue(employee.employee_id.startswith('EMP'))
+
+
+FAST_AUTH_SETTINGS = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+    'AUTHENTICATION_BACKENDS': [
+        'users.auth_cache.CachedModelBackend', 'django.contrib.auth.backends.ModelBackend',
+    ],
+}
+
+
+class FastAuthTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='alice', password='old-password-123')
+        self.employee = Employee.objects.create(
+            user=self.user, employee_id='EMP0001', department=Department.objects.create(name='IT'),
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def profile_queries(self):
+        # Second request: the employee stats are cached by then either way
+        self.client.get(reverse('users:profile'))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse('users:profile')).status_code, 200)
+        return len(queries)
+
+    def test_skips_session_user_and_employee_queries(self):
+        self.client.force_login(self.user)
+        default = self.profile_queries()
+        cache.clear()
+        with self.settings(**FAST_AUTH_SETTINGS):
+            self.client.force_login(self.user)
+            fast = self.profile_queries()
+        self.assertEqual(default - fast, 3)
+
+    @override_settings(**FAST_AUTH_SETTINGS)
+    def test_password_change_drops_cached_user(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('users:profile'))
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+
+        other = self.client_class()
+        other.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('users:change_password'), {
+                'old_password': 'old-password-123',
+                'new_password1': 'new-password-456',
+                'new_password2': 'new-password-456',
+            })
+        self.assertRedirects(response, reverse('users:profile'))
+
+        # The other session was signed with the old password hash
+        self.assertEqual(other.get(reverse('users:profile')).status_code, 302)
+        self.assertEqual(self.client.get(reverse('users:profile')).status_code, 200)
+
+    @override_settings(**FAST_AUTH_SETTINGS)
+    def test_department_rename_refreshes_cached_employee(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('users:profile'))
+        with self.captureOnCommitCallbacks(execute=True):
+            department = self.employee.department
+            department.name = 'Engineering'
+            department.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertContains(self.client.get(reverse('users:profile')), 'Engineering')
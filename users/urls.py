@@ -23,6 +23,12 @@ urlpatterns = [
         name='employee_list'
     ),
 
+    path(
+        'employees/search/',
+        auth_views.employee_search,
+        name='employee_search'
+    ),
+
     # -------------------------
     # User Profile
     # -------------------------
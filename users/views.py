@@ -60,7 +60,9 @@ def register_face(request):
             return redirect('register_face')
 
     # GET request - show registration form
-    employees = Employee.objects.filter(is_active=True, face_encoding__isnull=True)
+    employees = Employee.objects.filter(
+        is_active=True, face_encoding__isnull=True
+    ).select_related('user', 'department')
 
     # Check if face recognition is available
     face_recognition_available = getattr(settings, 'FACE_RECOGNITION_AVAILABLE', True)